@@ -0,0 +1,75 @@
+import binascii
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from account.account import Account
+
+
+# Snapshot (checkpoint) of the account state at a block of the chain
+#
+# The node writes the account state together with the height and hash of the head every CHECKPOINT_INTERVAL blocks.
+# On startup, the state is loaded from the snapshot and only the blocks after the snapshot are replayed.
+# The snapshot is written to a temporary file and renamed over the previous one, so the file on the disk is
+# always either the previous or the new snapshot in full.
+# The values are taken from the account state first (get_account_value_list) so that the file can be written in a
+# worker thread while the account state keeps changing.
+
+SNAPSHOT_FILE_NAME = "account_snapshot.json"
+
+# (public_key_hex, stake, balance) of an account
+AccountValue = Tuple[bytes, float, float]
+
+
+class AccountSnapshotStore:
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, SNAPSHOT_FILE_NAME)
+
+    def save(self, height: int, block_hash: bytes, account_value_list: List[AccountValue]) -> None:
+        # account state after applying the block at the input height
+        snapshot_dict = {
+            "height": height,
+            "block_hash_hex": binascii.hexlify(block_hash).decode('utf-8'),
+            "account_dict_list": [
+                {"public_key_hex": public_key_hex.decode('utf-8'), "stake": stake, "balance": balance}
+                for public_key_hex, stake, balance in account_value_list
+            ]
+        }
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as fp:
+            json.dump(snapshot_dict, fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, self.path)
+
+        # make the rename itself durable
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def load(self) -> Optional[Tuple[int, bytes, Dict[bytes, Account]]]:
+        # return (height, block hash, account dict) of the latest snapshot - None if there is no snapshot
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as fp:
+            snapshot_dict = json.load(fp)
+
+        account_dict = dict()
+        for account_dict_item in snapshot_dict["account_dict_list"]:
+            public_key_hex = account_dict_item["public_key_hex"].encode('utf-8')
+            account = Account(public_key_hex)
+            account.stake = account_dict_item["stake"]
+            account.balance = account_dict_item["balance"]
+            account_dict[public_key_hex] = account
+
+        block_hash = binascii.unhexlify(snapshot_dict["block_hash_hex"].encode('utf-8'))
+        return snapshot_dict["height"], block_hash, account_dict
+
+
+def get_account_value_list(account_dict: Dict[bytes, Account]) -> List[AccountValue]:
+    return [(account.public_key_hex, account.stake, account.balance) for account in account_dict.values()]
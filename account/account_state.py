@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from account.account import Account
+from transaction.transaction_type import TransactionType
+
+if TYPE_CHECKING:
+    from transaction.transaction import Transaction
+
+
+# Copy-on-write view of the account state (account dict)
+#
+# Accounts are copied from the base state the first time they are accessed through the view and changed there only.
+# A block is validated and applied on a view - the view is committed to the base state if the block is accepted
+# and thrown away otherwise. Cost is proportional to the number of accounts the block touches, not to the whole state.
+# Views can be stacked - base state of a view can be another view.
+
+class AccountStateView:
+    def __init__(self, base_account_dict: Dict[bytes, Account]):
+        self.base_account_dict = base_account_dict
+        self.account_dict: Dict[bytes, Optional[Account]] = dict()  # { public_key_hex: copied Account } - None if deleted
+
+    def __contains__(self, public_key_hex: bytes):
+        if public_key_hex in self.account_dict:
+            return self.account_dict[public_key_hex] is not None
+        return public_key_hex in self.base_account_dict
+
+    def __getitem__(self, public_key_hex: bytes) -> Account:
+        account = self.get(public_key_hex)
+        if account is None:
+            raise KeyError(public_key_hex)
+        return account
+
+    def __setitem__(self, public_key_hex: bytes, account: Account):
+        self.account_dict[public_key_hex] = account
+
+    def __delitem__(self, public_key_hex: bytes):
+        if public_key_hex not in self:
+            raise KeyError(public_key_hex)
+        self.account_dict[public_key_hex] = None
+
+    def get(self, public_key_hex: bytes, default: Optional[Account] = None) -> Optional[Account]:
+        # returned account belongs to the view - changing it does not change the base state
+        if public_key_hex not in self.account_dict:
+            base_account = self.base_account_dict.get(public_key_hex, None)
+            if base_account is None:
+                return default
+            account = Account(public_key_hex)
+            account.stake = base_account.stake
+            account.balance = base_account.balance
+            self.account_dict[public_key_hex] = account
+        account = self.account_dict[public_key_hex]
+        return account if account is not None else default
+
+    def commit(self) -> Dict[bytes, Optional[Tuple[int, int]]]:
+        # write the changes to the base state and return undo journal of the changes
+        # { public_key_hex: (stake, balance) before the change - None if the account is created }
+        undo_journal = dict()
+        for public_key_hex, account in self.account_dict.items():
+            base_account = self.base_account_dict.get(public_key_hex, None)
+            if base_account is None:
+                if account is not None:
+                    undo_journal[public_key_hex] = None
+                    self.base_account_dict[public_key_hex] = account
+                continue
+
+            undo_journal[public_key_hex] = (base_account.stake, base_account.balance)
+            if account is None:
+                del self.base_account_dict[public_key_hex]
+            else:
+                base_account.stake, base_account.balance = account.stake, account.balance
+        self.account_dict = dict()
+        return undo_journal
+
+
+# (transaction type, source public key hex, target public key hex, token amount, fee) - picklable part of a transaction
+# that changes the account state
+TransactionItem = Tuple[int, bytes, Optional[bytes], Optional[float], Optional[float]]
+
+
+def get_transaction_item(transaction: Transaction) -> TransactionItem:
+    return (
+        transaction.transaction_source.transaction_type,
+        transaction.transaction_source.source_public_key_hex,
+        transaction.transaction_target.target_public_key_hex,
+        transaction.transaction_target.tx_token,
+        transaction.transaction_source.tx_fee
+    )
+
+
+def apply_transaction(transaction: Transaction, get_account: Callable[[bytes], Account]) -> None:
+    # apply stake and balance changes of a validated transaction
+    # get_account returns the account to change - created if it does not exist
+    apply_transaction_item(get_transaction_item(transaction), get_account)
+
+
+def apply_transaction_item(transaction_item: TransactionItem, get_account: Callable[[bytes], Account]) -> None:
+    tx_type, public_key_hex, target_public_key_hex, tx_token, tx_fee = transaction_item
+
+    account = get_account(public_key_hex)
+    target_account = get_account(target_public_key_hex) if target_public_key_hex is not None else None
+
+    if tx_type == TransactionType.STAKE:
+        account.stake += tx_token
+        account.balance -= tx_token
+    elif tx_type == TransactionType.TRANSFER:
+        target_account.balance += tx_token
+        account.balance -= tx_token
+    elif tx_type == TransactionType.TIP:
+        target_account.balance += tx_token
+        account.balance -= tx_token
+    elif tx_type == TransactionType.ICO:
+        account.stake += tx_token
+
+    if tx_fee is not None:
+        account.balance -= tx_fee
+        # TODO: add fee to balance
+
+
+def get_or_create_account(account_dict: Dict[bytes, Account], public_key_hex: bytes) -> Account:
+    if public_key_hex not in account_dict:
+        account_dict[public_key_hex] = Account(public_key_hex)
+    return account_dict[public_key_hex]
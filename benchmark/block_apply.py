@@ -0,0 +1,100 @@
+# benchmark of applying a block with thousands of transactions serially and across worker processes
+# two workloads - transfers between random pairs of accounts (which connect almost all accounts into one group)
+# and transfers within communities of COMMUNITY_SIZE accounts (independent groups)
+#
+# (venv) $ python -m benchmark.block_apply
+import itertools
+import os
+import random
+import time
+
+from account.account import Account
+from account.account_full import FullAccount
+from account.account_state import apply_transaction, get_or_create_account
+from block.block_applier import BlockApplier, partition_transactions
+from transaction.transaction_type import TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils.crypto import get_public_key_hex
+
+N_TRANSACTIONS_LIST = [2000, 10000, 50000]
+N_ACCOUNTS = 2000
+COMMUNITY_SIZE = 10
+N_REPEATS = 3
+
+
+def _create_transaction_list(account_list, n: int, community_size: int):
+    rng = random.Random(0)
+    transaction_list = []
+    for _ in range(n):
+        community_start = rng.randrange(0, len(account_list), community_size)
+        source_account, target_account = rng.sample(account_list[community_start:community_start + community_size], 2)
+        transaction_list.append(generate_transaction(
+            source_account.private_key.public_key(),
+            TransactionType.TRANSFER,
+            tx_fee=0.1,
+            target_public_key=target_account.private_key.public_key(),
+            tx_token=1
+        ))
+    return transaction_list
+
+
+def _create_account_dict(public_key_hex_list):
+    account_dict = dict()
+    for public_key_hex in public_key_hex_list:
+        account = Account(public_key_hex)
+        account.balance = 1000000
+        account_dict[public_key_hex] = account
+    return account_dict
+
+
+def _run(label: str, fn) -> float:
+    # best of N_REPEATS
+    elapsed_list = []
+    for _ in range(N_REPEATS):
+        start = time.perf_counter()
+        fn()
+        elapsed_list.append(time.perf_counter() - start)
+    elapsed = min(elapsed_list)
+    print(f"{label:<32} {elapsed * 1e3:10.1f} ms")
+    return elapsed
+
+
+def main():
+    account_list = [FullAccount() for _ in range(N_ACCOUNTS)]
+    public_key_hex_list = [get_public_key_hex(account.private_key.public_key()) for account in account_list]
+    worker_count_list = sorted({2, 4, os.cpu_count() or 1} - {1})
+    print(f"{os.cpu_count()} cores")
+
+    for (workload, community_size), n_transactions in itertools.product(
+        [("random pairs", N_ACCOUNTS), ("communities", COMMUNITY_SIZE)], N_TRANSACTIONS_LIST
+    ):
+        transaction_list = _create_transaction_list(account_list, n_transactions, community_size)
+        group_count = len(partition_transactions(transaction_list))
+        print(f"{workload} - {n_transactions} transactions in {group_count} groups")
+
+        def apply_serially():
+            account_dict = _create_account_dict(public_key_hex_list)
+            for transaction in transaction_list:
+                apply_transaction(transaction, lambda key: get_or_create_account(account_dict, key))
+
+        serial = _run("serial", apply_serially)
+        _run("partition only", lambda: partition_transactions(transaction_list))
+
+        for worker_count in worker_count_list:
+            block_applier = BlockApplier(max_workers=worker_count, min_parallel_transactions=1)
+            try:
+                # start the worker processes before timing
+                block_applier.apply(transaction_list[:worker_count * 4], lambda key: Account(key))
+
+                def apply_in_parallel():
+                    account_dict = _create_account_dict(public_key_hex_list)
+                    block_applier.apply(transaction_list, lambda key: get_or_create_account(account_dict, key))
+
+                elapsed = _run(f"{worker_count} workers", apply_in_parallel)
+                print(f"{'':<32} {serial / elapsed:10.2f}x serial")
+            finally:
+                block_applier.shutdown()
+
+
+if __name__ == '__main__':
+    main()
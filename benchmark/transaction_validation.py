@@ -0,0 +1,75 @@
+# micro-benchmark of per-transaction validation cost
+# compares re-encoding the presigned dict for every use (hash, verification, wire encoding) with the cached bytes
+#
+# (venv) $ python -m benchmark.transaction_validation
+import json
+import os
+import time
+
+from account.account_full import FullAccount
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import create_transaction_from_dict, generate_transaction
+
+N_TRANSACTIONS = 500
+
+
+def _create_tx_dict_list(n: int):
+    account = FullAccount()
+    tx_dict_list = []
+    for idx in range(n):
+        transaction = generate_transaction(
+            account.private_key.public_key(),
+            TransactionType.COMMENT,
+            content=f"Random comment {idx}",
+            content_type=TransactionContentType.STRING,
+            target_transaction_hash=os.urandom(32),
+            tx_fee=0.1
+        )
+        transaction.sign_transaction(account.private_key)
+        tx_dict_list.append(transaction.to_dict())
+    return tx_dict_list
+
+
+def _run(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<48} {elapsed / n * 1e6:10.1f} us/tx")
+    return elapsed
+
+
+def main():
+    tx_dict_list = _create_tx_dict_list(N_TRANSACTIONS)
+    transaction_list = [create_transaction_from_dict(tx_dict) for tx_dict in tx_dict_list]
+
+    # encoding cost of one validation: hash on decode, signature verification, to_dict for gossip
+    def encode_uncached():
+        for tx in transaction_list:
+            for _ in range(2):
+                json.dumps(tx._to_presigned_dict()).encode('utf-8')
+            tx_dict = tx._to_presigned_dict()
+            tx_dict["transaction_hash_hex"] = tx.transaction_hash_hex.decode('utf-8')
+
+    def encode_cached():
+        for tx in transaction_list:
+            # the one encode that the cache cannot avoid (done on decode) is part of the timed work
+            tx._presigned_cache = None
+            for _ in range(2):
+                tx.get_presigned_bytes()
+            tx.to_dict()
+
+    print(f"{N_TRANSACTIONS} transactions")
+    uncached = _run("presigned encoding - re-encoded for each use", encode_uncached, N_TRANSACTIONS)
+    cached = _run("presigned encoding - cached", encode_cached, N_TRANSACTIONS)
+    print(f"encoding speedup: {uncached / cached:.1f}x")
+
+    # end to end: decode from dict (hash) + signature verification + validation task
+    def validate():
+        for tx_dict in tx_dict_list:
+            create_transaction_from_dict(tx_dict).validate(None)
+
+    _run("decode + validate (end to end)", validate, N_TRANSACTIONS)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,18 @@
 import binascii
 import json
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 
 from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import hashes
 
 from account.account import Account
+from account.account_state import AccountStateView, get_or_create_account
+from block.block_applier import block_applier
 from transaction.transaction import Transaction
-from transaction.transaction_type import TransactionType
 from transaction.transaction_utils import create_transaction_from_dict
 from utils import constants
+from utils.crypto import load_public_key
 from validation.block.task import BlockValidationTask
 
 
@@ -29,12 +31,33 @@ class Block:
         self.timestamp = timestamp
         self.validator_public_key_hex = validator_public_key_hex
 
+        # height of the block in the chain (initial block is 0)
+        # unknown (None) until the block is linked to the chain when only previous_block_hash_hex is given
+        if previous_block is not None:
+            self.height = previous_block.height + 1 if previous_block.height is not None else None
+        elif previous_block_hash_hex is None:
+            self.height = 0
+        else:
+            self.height = None
+
+        # presigned dict and its canonical json bytes - computed once and reused for hashing, signing,
+        # verification and to_dict until any presigned field changes
+        self._presigned_key = None
+        self._presigned_cache: Optional[Tuple[dict, bytes]] = None
+
         # block hash is used as an id of the block
         self.block_hash = self._get_hash()
 
         self.signature = None
 
+        # values of the accounts touched by the block before the block was applied - set by update_account_dict
+        # { public_key_hex: (stake, balance) } - None for accounts created by the block
+        self.undo_journal: Optional[Dict[bytes, Optional[Tuple[float, float]]]] = None
+
     def __len__(self):
+        if self.height is not None:
+            return self.height + 1
+
         cnt = 1
         current_block = self
         while current_block.previous_block:
@@ -60,7 +83,7 @@ class Block:
 
         # for transactions, use list of transaction hashes
         transaction_hash_hex_list = list(map(
-            lambda tx: binascii.hexlify(tx.transaction_hash).decode('utf-8'), self.transaction_list))
+            lambda tx: tx.transaction_hash_hex.decode('utf-8'), self.transaction_list))
 
         return {
             "previous_block_hash_hex": previous_block_hash_hex,
@@ -69,9 +92,43 @@ class Block:
             "timestamp": self.timestamp,
         }
 
+    def _get_presigned_key(self) -> tuple:
+        # all values that the presigned dict is made of
+        return (
+            self.previous_block_hash_hex,
+            self.previous_block.block_hash if self.previous_block is not None else None,
+            tuple(tx.transaction_hash for tx in self.transaction_list),
+            self.validator_public_key_hex,
+            self.timestamp
+        )
+
+    def _get_presigned(self) -> Tuple[dict, bytes]:
+        presigned_key = self._get_presigned_key()
+        if self._presigned_cache is None or self._presigned_key != presigned_key:
+            presigned_dict = self._to_presigned_dict()
+            self._presigned_cache = (presigned_dict, json.dumps(presigned_dict).encode('utf-8'))
+            self._presigned_key = presigned_key
+        return self._presigned_cache
+
+    def get_presigned_bytes(self) -> bytes:
+        # canonical bytes that are hashed and signed
+        return self._get_presigned()[1]
+
     def to_dict(self) -> dict:
         # convert to json serializable dictionary with all block data
-        block_dict = self._to_presigned_dict()
+        block_dict = self.to_compact_dict()
+
+        # add transaction_list
+        block_dict["transaction_dict_list"] = list(
+            map(lambda tx: tx.to_dict(), self.transaction_list))
+
+        return block_dict
+
+    def to_compact_dict(self) -> dict:
+        # convert to json serializable dictionary without transaction data - transactions are referred by hashes
+        block_dict = dict(self._get_presigned()[0])
+        # presigned transaction hash list is shared with the cache
+        block_dict["transaction_hash_hex_list"] = list(block_dict["transaction_hash_hex_list"])
 
         # add signature hex
         if self.signature is not None:
@@ -81,83 +138,98 @@ class Block:
         block_dict["block_hash_hex"] = binascii.hexlify(
             self.block_hash).decode('utf-8')
 
-        # add transaction_list
-        block_dict["transaction_dict_list"] = list(
-            map(lambda tx: tx.to_dict(), self.transaction_list))
-
         return block_dict
 
     def _get_hash(self) -> bytes:
         digest = hashes.Hash(hashes.SHA256())
-        digest.update(json.dumps(self._to_presigned_dict()).encode('utf-8'))
+        digest.update(self.get_presigned_bytes())
         return digest.finalize()
 
     def sign_block(self, private_key: ec.EllipticCurvePrivateKey):
         self.signature = private_key.sign(
-            json.dumps(self._to_presigned_dict()).encode('utf-8'),
+            self.get_presigned_bytes(),
             ec.ECDSA(hashes.SHA256())
         )
 
     def _verify_block(self) -> None:
         if self.signature is None:
             raise InvalidSignature
-        public_key_hash = binascii.unhexlify(self.validator_public_key_hex)
-        public_key = serialization.load_der_public_key(public_key_hash)
+        public_key = load_public_key(self.validator_public_key_hex)
         public_key.verify(
             self.signature,
-            json.dumps(self._to_presigned_dict()).encode('utf-8'),
+            self.get_presigned_bytes(),
             ec.ECDSA(hashes.SHA256())
         )
 
     def _is_initial_block(self):
         return self.previous_block is None and self.previous_block_hash_hex is None
 
+    def get_signature_item(self) -> Tuple[bytes, bytes, Optional[bytes]]:
+        # (public key hex, signed payload, signature) used for batch signature verification
+        return self.validator_public_key_hex, self.get_presigned_bytes(), self.signature
+
     def validate(
         self,
         account_dict: Dict[bytes, Account],
-        block_validator_dict: Optional[Dict[bytes, bytes]] = None
-    ):
+        block_validator_dict: Optional[Dict[bytes, bytes]] = None,
+        verify_signatures: bool = True
+    ) -> AccountStateView:
+        # verify_signatures is False when block and transaction signatures are already verified in a batch
+        # return account state after the block as a view over account_dict - account_dict itself is not changed
+        # the block is applied by commit_state_view of the returned view
+
         # 1. Verify the block signature - if invalid, throw InvalidSignature exception
-        self._verify_block()
+        if verify_signatures:
+            self._verify_block()
 
-        # 2. Run block validation task
-        block_validation = BlockValidationTask(self, account_dict, block_validator_dict=block_validator_dict)
+        # 2. Run block validation task - transactions are validated and applied to the view in order
+        state_view = AccountStateView(account_dict)
+        block_validation = BlockValidationTask(
+            self, state_view, block_validator_dict=block_validator_dict, verify_signatures=verify_signatures
+        )
         block_validation.run()
 
+        # 3. Give tokens to the validator
+        get_or_create_account(state_view, self.validator_public_key_hex).balance += constants.VALIDATION_REWARD
+        return state_view
+
+    def commit_state_view(self, state_view: AccountStateView):
+        # apply the block validated into state_view to the account state under the view
+        # same as update_account_dict but without applying the transactions again
+        self.undo_journal = state_view.commit()
+
     def update_account_dict(self, account_dict: Dict[bytes, Account]):
         # assume block is already validated
-        # update account_dict in place
-        for tx in self.transaction_list:
-            public_key_hex = tx.transaction_source.source_public_key_hex
-            target_public_key_hex = tx.transaction_target.target_public_key_hex
-            tx_type = tx.transaction_source.transaction_type
-            tx_token = tx.transaction_target.tx_token
-            tx_fee = tx.transaction_source.tx_fee
-
-            if public_key_hex not in account_dict:
-                account_dict[public_key_hex] = Account(public_key_hex)
-            if target_public_key_hex is not None and target_public_key_hex not in account_dict:
-                account_dict[target_public_key_hex] = Account(target_public_key_hex)
-
-            if tx_type == TransactionType.STAKE:
-                account_dict[public_key_hex].stake += tx_token
-                account_dict[public_key_hex].balance -= tx_token
-            elif tx_type == TransactionType.TRANSFER:
-                account_dict[target_public_key_hex].balance += tx_token
-                account_dict[public_key_hex].balance -= tx_token
-            elif tx_type == TransactionType.TIP:
-                account_dict[target_public_key_hex].balance += tx_token
-                account_dict[public_key_hex].balance -= tx_token
-            elif tx_type == TransactionType.ICO:
-                account_dict[public_key_hex].stake += tx_token
-
-            if tx_fee is not None:
-                account_dict[public_key_hex].balance -= tx_fee
-                # TODO: add fee to balance
-
-        if self.validator_public_key_hex not in account_dict:
-            account_dict[self.validator_public_key_hex] = Account(self.validator_public_key_hex)
-        account_dict[self.validator_public_key_hex].balance += constants.VALIDATION_REWARD
+        # update account_dict in place and record the previous values of the touched accounts in undo_journal
+        undo_journal = dict()
+
+        def touch(public_key_hex: bytes) -> Account:
+            if public_key_hex not in undo_journal:
+                account = account_dict.get(public_key_hex, None)
+                if account is None:
+                    undo_journal[public_key_hex] = None
+                    account_dict[public_key_hex] = Account(public_key_hex)
+                else:
+                    undo_journal[public_key_hex] = (account.stake, account.balance)
+            return account_dict[public_key_hex]
+
+        block_applier.apply(self.transaction_list, touch)
+
+        touch(self.validator_public_key_hex).balance += constants.VALIDATION_REWARD
+        self.undo_journal = undo_journal
+
+    def revert_account_dict(self, account_dict: Dict[bytes, Account]):
+        # undo update_account_dict of this block - assume the block is the last block applied to account_dict
+        # update account_dict in place - cost is proportional to the number of accounts the block touched
+        if self.undo_journal is None:
+            raise ValueError(f"No undo journal of block {binascii.hexlify(self.block_hash)}")
+
+        for public_key_hex, previous_values in self.undo_journal.items():
+            if previous_values is None:
+                del account_dict[public_key_hex]
+            else:
+                account = account_dict[public_key_hex]
+                account.stake, account.balance = previous_values
 
 
 def create_block_from_dict(block_dict: Dict, previous_block: Optional[Block] = None) -> Block:
@@ -175,7 +247,18 @@ def create_block_from_dict(block_dict: Dict, previous_block: Optional[Block] = N
         map(lambda tx_dict: create_transaction_from_dict(tx_dict),
             block_dict["transaction_dict_list"])
     )
+    return create_block_from_compact_dict(block_dict, transaction_list, previous_block=previous_block)
+
 
+def create_block_from_compact_dict(
+    block_dict: Dict,
+    transaction_list: List[Transaction],
+    previous_block: Optional[Block] = None
+) -> Block:
+    """ Create a Block instance from input compact block dict and already decoded transactions
+    block_dict has the same items as in create_block_from_dict except transaction_dict_list
+    transaction_list must be in the order of transaction_hash_hex_list
+    """
     if block_dict["signature_hex"] is not None:
         signature_hex = block_dict["signature_hex"].encode('utf-8')
         signature = binascii.unhexlify(signature_hex)
@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from account.account import Account
+from account.account_state import TransactionItem, apply_transaction, apply_transaction_item, get_or_create_account, \
+    get_transaction_item
+from transaction.transaction import Transaction
+from utils import constants
+
+
+# Applies transactions of a large block across a pool of worker processes
+#
+# Transactions are partitioned by the accounts they touch (source and target) - transactions in different groups
+# touch disjoint accounts, so groups are applied independently. Each group is applied in block order starting from
+# the account values before the block, so every account ends up exactly as if the block was applied serially.
+# Results of the groups touch disjoint accounts, so they are merged in any order.
+#
+# Only blocks applied without validation go through the applier - chain replay on startup and during sync, and the
+# ICO block (update_account_dict). Blocks received live are applied transaction by transaction while they are
+# validated (BlockValidationTask), since each transaction is checked against the balances left by the previous ones.
+
+# (transaction items of the group in block order, { public_key_hex: (stake, balance) before the group })
+GroupItem = Tuple[List[TransactionItem], Dict[bytes, Tuple[float, float]]]
+
+
+def partition_transactions(transaction_list: List[Transaction]) -> List[List[int]]:
+    # return indexes of the transactions of each group - groups are in the order of their first transaction
+    # union-find over the touched accounts
+    parent_dict: Dict[bytes, bytes] = dict()
+
+    def find(public_key_hex: bytes) -> bytes:
+        parent_dict.setdefault(public_key_hex, public_key_hex)
+        while parent_dict[public_key_hex] != public_key_hex:
+            parent_dict[public_key_hex] = parent_dict[parent_dict[public_key_hex]]  # path halving
+            public_key_hex = parent_dict[public_key_hex]
+        return public_key_hex
+
+    for transaction in transaction_list:
+        root = find(transaction.transaction_source.source_public_key_hex)
+        target_public_key_hex = transaction.transaction_target.target_public_key_hex
+        if target_public_key_hex is not None:
+            target_root = find(target_public_key_hex)
+            if target_root != root:
+                parent_dict[target_root] = root
+
+    group_dict: Dict[bytes, List[int]] = dict()  # { root: transaction indexes }
+    for idx, transaction in enumerate(transaction_list):
+        group_dict.setdefault(find(transaction.transaction_source.source_public_key_hex), []).append(idx)
+    return list(group_dict.values())
+
+
+def _apply_group_chunk(group_item_list: List[GroupItem]) -> List[Dict[bytes, Tuple[float, float]]]:
+    # runs in a worker process - return { public_key_hex: (stake, balance) after the group } of each group
+    result_list = []
+    for transaction_item_list, value_dict in group_item_list:
+        account_dict = dict()
+        for public_key_hex, (stake, balance) in value_dict.items():
+            account = Account(public_key_hex)
+            account.stake, account.balance = stake, balance
+            account_dict[public_key_hex] = account
+        for transaction_item in transaction_item_list:
+            apply_transaction_item(transaction_item, lambda key: get_or_create_account(account_dict, key))
+        result_list.append({key: (account.stake, account.balance) for key, account in account_dict.items()})
+    return result_list
+
+
+class BlockApplier:
+    # blocks with fewer than min_parallel_transactions transactions are applied serially in the calling process
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_parallel_transactions: int = constants.PARALLEL_APPLY_MIN_TRANSACTIONS
+    ):
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.min_parallel_transactions = min_parallel_transactions
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawn instead of fork - the node process runs an event loop and http client threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    def apply(self, transaction_list: List[Transaction], get_account: Callable[[bytes], Account]) -> None:
+        # apply stake and balance changes of validated transactions
+        # get_account returns the account to change - created if it does not exist
+        if self.max_workers <= 1 or len(transaction_list) < self.min_parallel_transactions:
+            for transaction in transaction_list:
+                apply_transaction(transaction, get_account)
+            return
+
+        # 1. Partition transactions and read values of the touched accounts before the block
+        group_item_list = []
+        for idx_list in partition_transactions(transaction_list):
+            transaction_item_list = [get_transaction_item(transaction_list[idx]) for idx in idx_list]
+            value_dict = dict()
+            for _, public_key_hex, target_public_key_hex, _, _ in transaction_item_list:
+                for key in (public_key_hex, target_public_key_hex):
+                    if key is not None and key not in value_dict:
+                        account = get_account(key)
+                        value_dict[key] = (account.stake, account.balance)
+            group_item_list.append((transaction_item_list, value_dict))
+
+        # 2. Apply groups in worker processes - a few chunks per worker so that workers finishing early pick up the rest
+        # groups are spread over the chunks by size so that a few large groups do not end up in the same chunk
+        chunk_count = min(len(group_item_list), self.max_workers * 4)
+        chunk_list = [[] for _ in range(chunk_count)]
+        chunk_size_list = [0] * chunk_count
+        for group_item in sorted(group_item_list, key=lambda item: len(item[0]), reverse=True):
+            chunk_idx = chunk_size_list.index(min(chunk_size_list))
+            chunk_list[chunk_idx].append(group_item)
+            chunk_size_list[chunk_idx] += len(group_item[0])
+
+        # 3. Merge results of the groups
+        for chunk_result_list in self._get_executor().map(_apply_group_chunk, chunk_list):
+            for value_dict in chunk_result_list:
+                for public_key_hex, (stake, balance) in value_dict.items():
+                    account = get_account(public_key_hex)
+                    account.stake, account.balance = stake, balance
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+# shared by all blocks applied without validation (chain replay and the ICO block)
+block_applier = BlockApplier()
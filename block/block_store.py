@@ -0,0 +1,184 @@
+import json
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils import constants
+
+
+# Append-only on-disk block storage
+#
+# Blocks are serialized with Block.to_dict() and appended to segment files (blk00000.dat, blk00001.dat, ...)
+# as length prefixed json records. index.dat holds one fixed size record per block
+# (height, block hash, segment number, offset, length) so that a block can be read with a single seek
+# by either its height or its hash.
+
+SEGMENT_FILE_FORMAT = "blk{:05d}.dat"
+INDEX_FILE_NAME = "index.dat"
+
+RECORD_HEADER = struct.Struct(">I")  # length of the serialized block
+INDEX_RECORD = struct.Struct(">Q32sIQI")  # height, block hash, segment, offset, length
+
+
+class BlockStore:
+    def __init__(self, directory: str, segment_size: int = constants.BLOCK_STORE_SEGMENT_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+
+        self.location_list: List[Tuple[int, int, int]] = []  # height-ordered (segment, offset, length)
+        self.block_hash_list: List[bytes] = []  # height-ordered block hashes
+        self.height_dict: Dict[bytes, int] = dict()  # { block_hash: height }
+
+        self._load_index()
+
+    def __len__(self):
+        return len(self.location_list)
+
+    def __contains__(self, block_hash: bytes):
+        return block_hash in self.height_dict
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_FILE_FORMAT.format(segment))
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE_NAME)
+
+    def _load_index(self):
+        index_path = self._index_path()
+        if not os.path.exists(index_path):
+            return
+
+        with open(index_path, 'rb') as fp:
+            index_bytes = fp.read()
+
+        segment_size_dict = dict()  # { segment: file size }
+        for offset in range(0, len(index_bytes) - INDEX_RECORD.size + 1, INDEX_RECORD.size):
+            height, block_hash, segment, block_offset, length = INDEX_RECORD.unpack_from(index_bytes, offset)
+            if segment not in segment_size_dict:
+                segment_path = self._segment_path(segment)
+                segment_size_dict[segment] = os.path.getsize(segment_path) if os.path.exists(segment_path) else 0
+
+            # stop at the first record that was not fully written (e.g. crash while appending)
+            if height != len(self.location_list) or \
+                    block_offset + RECORD_HEADER.size + length > segment_size_dict[segment]:
+                break
+
+            self.location_list.append((segment, block_offset, length))
+            self.block_hash_list.append(block_hash)
+            self.height_dict[block_hash] = height
+
+        # drop anything written after the last complete record
+        self.truncate(len(self.location_list))
+
+    def _read(self, location: Tuple[int, int, int]) -> dict:
+        segment, offset, length = location
+        with open(self._segment_path(segment), 'rb') as fp:
+            fp.seek(offset + RECORD_HEADER.size)
+            return json.loads(fp.read(length))
+
+    def get_block_hash(self, height: int) -> bytes:
+        return self.block_hash_list[height]
+
+    def get_height(self, block_hash: bytes) -> Optional[int]:
+        return self.height_dict.get(block_hash, None)
+
+    def get_block_dict(self, height: int) -> dict:
+        return self._read(self.location_list[height])
+
+    def get_block_dict_by_hash(self, block_hash: bytes) -> Optional[dict]:
+        height = self.height_dict.get(block_hash, None)
+        if height is None:
+            return None
+        return self.get_block_dict(height)
+
+    def iter_block_dicts(self, start_height: int = 0, end_height: Optional[int] = None) -> Iterator[dict]:
+        # read blocks from start_height to end_height (exclusive - the head if None) in order
+        # keeps one segment file open at a time
+        fp, fp_segment = None, None
+        try:
+            for segment, offset, length in self.location_list[start_height:end_height]:
+                if segment != fp_segment:
+                    if fp is not None:
+                        fp.close()
+                    fp, fp_segment = open(self._segment_path(segment), 'rb'), segment
+                fp.seek(offset + RECORD_HEADER.size)
+                yield json.loads(fp.read(length))
+        finally:
+            if fp is not None:
+                fp.close()
+
+    def append(self, block) -> int:
+        # append serialized block to the last segment and return the height of the block
+        self.append_list([block])
+        return len(self.location_list) - 1
+
+    def append_list(self, block_list: list) -> None:
+        # append serialized blocks in order - each file is written and synced once for the whole batch
+        if self.location_list:
+            segment, offset, length = self.location_list[-1]
+            offset += RECORD_HEADER.size + length
+        else:
+            segment, offset = 0, 0
+
+        segment_record_dict: Dict[int, List[bytes]] = dict()  # { segment: records to append }
+        index_record_list = []
+        location_list = []
+        for block in block_list:
+            block_bytes = json.dumps(block.to_dict()).encode('utf-8')
+            if offset > 0 and offset + RECORD_HEADER.size + len(block_bytes) > self.segment_size:
+                segment, offset = segment + 1, 0
+            segment_record_dict.setdefault(segment, []).append(RECORD_HEADER.pack(len(block_bytes)) + block_bytes)
+            height = len(self.location_list) + len(location_list)
+            index_record_list.append(INDEX_RECORD.pack(height, block.block_hash, segment, offset, len(block_bytes)))
+            location_list.append((segment, offset, len(block_bytes)))
+            offset += RECORD_HEADER.size + len(block_bytes)
+
+        # write blocks first and then the index so that a partially written block is never indexed
+        for segment, record_list in segment_record_dict.items():
+            _append_to_file(self._segment_path(segment), b"".join(record_list))
+        if index_record_list:
+            _append_to_file(self._index_path(), b"".join(index_record_list))
+
+        for block, location in zip(block_list, location_list):
+            self.block_hash_list.append(block.block_hash)
+            self.height_dict[block.block_hash] = len(self.location_list)
+            self.location_list.append(location)
+
+    def replace_from(self, height: int, block_list: list) -> None:
+        # replace blocks from input height on with input blocks - used to switch the stored chain to another branch
+        self.truncate(height)
+        self.append_list(block_list)
+
+    def truncate(self, height: int) -> None:
+        # keep blocks with height lower than input height and remove the rest from the disk
+        for block_hash in self.block_hash_list[height:]:
+            del self.height_dict[block_hash]
+        del self.location_list[height:]
+        del self.block_hash_list[height:]
+
+        if self.location_list:
+            segment, offset, length = self.location_list[-1]
+            end_segment, end_offset = segment, offset + RECORD_HEADER.size + length
+        else:
+            end_segment, end_offset = 0, 0
+
+        segment = end_segment
+        while os.path.exists(self._segment_path(segment)):
+            if segment == end_segment:
+                with open(self._segment_path(segment), 'r+b') as fp:
+                    fp.truncate(end_offset)
+            else:
+                os.remove(self._segment_path(segment))
+            segment += 1
+
+        if os.path.exists(self._index_path()):
+            with open(self._index_path(), 'r+b') as fp:
+                fp.truncate(len(self.location_list) * INDEX_RECORD.size)
+
+
+def _append_to_file(path: str, content: bytes) -> None:
+    with open(path, 'ab') as fp:
+        fp.write(content)
+        fp.flush()
+        os.fsync(fp.fileno())
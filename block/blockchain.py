@@ -1,31 +1,199 @@
 import binascii
-from typing import Dict, List, Optional
+import heapq
+import itertools
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from account.account import Account
 from block.block import Block, create_block_from_dict
+from block.block_store import BlockStore
+from block.transaction_index import TransactionIndex
+from transaction.transaction import Transaction
+from utils import constants
+from utils.signature_verifier import signature_verifier
 from validation.block.exception import BlockNotHeadError
 
 
-# Blockchain is stored in RAM (at least for now)
+# Blockchain is stored in RAM and written to the block store when one is set
+# Changes of the chain are written in batches (write_to_block_store) - the node writes them off the event loop
+# With a block store, only the latest memory_window blocks are kept in memory once they are written
+# (release_stored_blocks) - older blocks are read from the block store by height or hash when needed.
+# The transaction index covers the whole chain.
 
 class Blockchain:
-    def __init__(self, head: Optional[Block] = None):
+    def __init__(
+        self,
+        head: Optional[Block] = None,
+        block_store: Optional[BlockStore] = None,
+        memory_window: int = constants.BLOCK_MEMORY_WINDOW
+    ):
         self.head = head
+        self.block_store = block_store
+        self.memory_window = memory_window
+
+        self.base_height = 0  # height of block_list[0] - blocks below it are in the block store only
+        self.block_list: List[Block] = []  # height-ordered blocks in memory
+        self.block_hash_dict: Dict[bytes, Block] = dict()  # { block_hash: Block } of the blocks in memory
+        self.transaction_index = TransactionIndex()
+        # recent blocks that are not in the chain (competing branches) - linked to their previous blocks
+        # bounded by size - blocks at the lowest height are evicted first
+        self.max_side_block_count = constants.SIDE_BLOCK_POOL_SIZE
+        self.side_block_dict: Dict[bytes, Block] = dict()  # { block_hash: Block }
+        self.side_height_dict: Dict[int, Dict[bytes, None]] = dict()  # { height: { block_hash: None } } - dict as an ordered set
+        self.side_height_heap: List[int] = []  # heights of side_height_dict - heights left without blocks are dropped at the top
+        self._index_blocks()
 
     def __len__(self):
-        if self.head is None:
-            return 0
-        return len(self.head)
+        return self.base_height + len(self.block_list)
 
-    def to_dict_list(self) -> List[dict]:
-        # convert the whole chain to a list of blocks (blocks represented as dict)
-        # convert the blockchain into a JSON serializable format - used for converting before sending
-        blockchain_list = []  # head is at index 0
+    def _index_blocks(self) -> None:
+        # walk the chain from head once and set block heights
+        # the walk stops at the initial block or at the lowest block kept in memory (unlinked from its previous block)
+        block_list = []  # head is at index 0
         current_block = self.head
         while current_block:
-            blockchain_list.append(current_block.to_dict())
+            block_list.append(current_block)
             current_block = current_block.previous_block
-        return blockchain_list
+
+        self.block_list = list(reversed(block_list))
+        self.base_height = 0
+        if self.block_store is not None and self.block_list and self.block_list[0].previous_block_hash_hex is not None \
+                and self.block_list[0].height is not None:
+            self.base_height = self.block_list[0].height
+        self.block_hash_dict = dict()
+        self.side_block_dict = dict()
+        self.side_height_dict = dict()
+        self.side_height_heap = []
+        self.transaction_index.clear()
+        if self.base_height > 0:
+            for height, block_dict in enumerate(self.block_store.iter_block_dicts(0, self.base_height)):
+                self.transaction_index.add_block_dict(height, block_dict)
+        for height, block in enumerate(self.block_list, start=self.base_height):
+            block.height = height
+            self.block_hash_dict[block.block_hash] = block
+            self.transaction_index.add_block(block)
+
+    def get_block_by_hash(self, block_hash: bytes) -> Optional[Block]:
+        block = self.block_hash_dict.get(block_hash, None)
+        if block is not None:
+            return block
+        height = self.get_height(block_hash)
+        return self.get_block_by_height(height) if height is not None else None
+
+    def get_height(self, block_hash: bytes) -> Optional[int]:
+        # height of the block in the chain - None if the block is not in the chain
+        block = self.block_hash_dict.get(block_hash, None)
+        if block is not None:
+            return block.height
+        height = self.block_store.get_height(block_hash) if self.block_store is not None else None
+        return height if height is not None and height < self.base_height else None
+
+    def get_side_block(self, block_hash: bytes) -> Optional[Block]:
+        return self.side_block_dict.get(block_hash, None)
+
+    def has_block(self, block_hash: bytes) -> bool:
+        # block is either in the chain or in a side branch
+        return block_hash in self.side_block_dict or self.get_height(block_hash) is not None
+
+    def get_block_by_height(self, height: int) -> Optional[Block]:
+        # block below the window is decoded from the block store - not linked to its previous block
+        if height < 0 or height >= len(self):
+            return None
+        if height >= self.base_height:
+            return self.block_list[height - self.base_height]
+        block = create_block_from_dict(self.block_store.get_block_dict(height))
+        block.height = height
+        return block
+
+    def get_block_hash(self, height: int) -> Optional[bytes]:
+        if height < 0 or height >= len(self):
+            return None
+        if height >= self.base_height:
+            return self.block_list[height - self.base_height].block_hash
+        return self.block_store.get_block_hash(height)
+
+    def iter_blocks(self, start_height: int, end_height: int) -> Iterator[Block]:
+        # blocks from start_height to end_height (exclusive) in order - blocks below the window are decoded one at a time
+        # blocks in memory are taken when called so that the iterator can be consumed in another thread
+        memory_block_list = self.block_list[max(start_height - self.base_height, 0):max(end_height - self.base_height, 0)]
+        stored_block_iter = (
+            create_block_from_dict(block_dict)
+            for block_dict in self.block_store.iter_block_dicts(start_height, min(end_height, self.base_height))
+        ) if start_height < self.base_height else iter([])
+        return itertools.chain(stored_block_iter, memory_block_list)
+
+    def get_transaction(self, transaction_hash: bytes) -> Optional[Transaction]:
+        location = self.transaction_index.get_location(transaction_hash)
+        if location is None:
+            return None
+        height, position = location
+        return self.get_block_by_height(height).transaction_list[position]
+
+    def get_account_transactions(
+        self,
+        public_key_hex: bytes,
+        limit: int,
+        before: Optional[Tuple[int, int]] = None
+    ) -> List[Tuple[Tuple[int, int], Transaction]]:
+        # return (location, transaction) of transactions sent or received by the account - newest first
+        location_list = self.transaction_index.get_account_locations(public_key_hex, limit, before=before)
+        return self._get_transactions_at(location_list)
+
+    def get_transaction_children(
+        self,
+        transaction_hash_hex: bytes,
+        limit: int,
+        before: Optional[Tuple[int, int]] = None
+    ) -> List[Tuple[Tuple[int, int], Transaction]]:
+        # return (location, transaction) of transactions targeting the input transaction - newest first
+        location_list = self.transaction_index.get_children_locations(transaction_hash_hex, limit, before=before)
+        return self._get_transactions_at(location_list)
+
+    def _get_transactions_at(self, location_list: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int], Transaction]]:
+        # a block below the window is read from the block store once for all of its transactions
+        block_dict: Dict[int, Block] = dict()  # { height: Block }
+        transaction_list = []
+        for height, position in location_list:
+            if height not in block_dict:
+                block_dict[height] = self.get_block_by_height(height)
+            transaction_list.append(((height, position), block_dict[height].transaction_list[position]))
+        return transaction_list
+
+    def get_header_dict_list(self, start_height: int, limit: int) -> List[dict]:
+        # headers of blocks from start_height in ascending order - used to find the common ancestor when syncing
+        # headers below the window are made of the block hashes in the block store index
+        header_dict_list = []
+        for height in range(max(start_height, 0), min(start_height + limit, len(self))):
+            if height >= self.base_height:
+                block = self.block_list[height - self.base_height]
+                block_hash = block.block_hash
+                previous_block_hash_hex = block.to_compact_dict()["previous_block_hash_hex"]
+            else:
+                block_hash = self.block_store.get_block_hash(height)
+                previous_block_hash_hex = binascii.hexlify(self.block_store.get_block_hash(height - 1)).decode('utf-8') \
+                    if height > 0 else None
+            header_dict_list.append({
+                "height": height,
+                "block_hash_hex": binascii.hexlify(block_hash).decode('utf-8'),
+                "previous_block_hash_hex": previous_block_hash_hex
+            })
+        return header_dict_list
+
+    def get_block_dict_list(self, start_height: int, limit: int) -> List[dict]:
+        # blocks from start_height in ascending order (unlike to_dict_list)
+        start_height, end_height = max(start_height, 0), min(start_height + limit, len(self))
+        block_dict_list = list(self.block_store.iter_block_dicts(start_height, min(end_height, self.base_height))) \
+            if start_height < self.base_height else []
+        block_dict_list.extend(
+            block.to_dict()
+            for block in self.block_list[max(start_height - self.base_height, 0):max(end_height - self.base_height, 0)]
+        )
+        return block_dict_list
+
+    def to_dict_list(self) -> List[dict]:
+        # convert the whole chain to a list of blocks (blocks represented as dict)
+        # convert the blockchain into a JSON serializable format - used for converting before sending
+        # head is at index 0
+        return list(reversed(self.get_block_dict_list(0, len(self))))
 
     def from_dict_list(self, blockchain_dict_list: List[dict]):
         # convert list of blocks (blockes represented as dict) in JSON serializable format
@@ -36,6 +204,61 @@ class Blockchain:
             current_block = create_block_from_dict(block_dict, previous_block)
             previous_block = current_block
         self.head = current_block
+        self._index_blocks()
+
+    def set_block_store(self, block_store: Optional[BlockStore]) -> None:
+        # attach the block store and make it hold the same chain as the one in memory
+        self.block_store = block_store
+        if self.block_store is not None:
+            self.write_to_block_store()
+
+    def write_to_block_store(self) -> None:
+        self.block_store.replace_from(*self.get_block_store_change())
+        self.release_stored_blocks()
+
+    def get_block_store_change(self) -> Tuple[int, List[Block]]:
+        # return (height, blocks) to write to the block store from height on so that it holds the same chain
+        # the stored chain differs from the chain in memory only near the head - compared from the top down
+        # blocks below the window are in the block store already
+        height = min(len(self.block_store), len(self))
+        while height > self.base_height and \
+                self.block_store.get_block_hash(height - 1) != self.block_list[height - 1 - self.base_height].block_hash:
+            height -= 1
+        return height, self.block_list[height - self.base_height:]
+
+    def release_stored_blocks(self) -> None:
+        # drop blocks below the window from memory if the block store holds them
+        # the lowest block kept is unlinked from its previous block so that the dropped blocks can be freed
+        if self.block_store is None:
+            return
+        base_height = min(len(self) - self.memory_window, self.get_block_store_change()[0])
+        if base_height <= self.base_height:
+            return
+        for block in self.block_list[:base_height - self.base_height]:
+            del self.block_hash_dict[block.block_hash]
+        del self.block_list[:base_height - self.base_height]
+        self.base_height = base_height
+
+        lowest_block = self.block_list[0]
+        if lowest_block.previous_block is not None:
+            lowest_block.previous_block_hash_hex = binascii.hexlify(lowest_block.previous_block.block_hash)
+            lowest_block.previous_block = None
+
+    def truncate(self, height: int) -> None:
+        # remove blocks from input height on - used to replace the chain above a common ancestor
+        while self.block_list and len(self) > height:
+            block = self.block_list.pop()
+            del self.block_hash_dict[block.block_hash]
+            self.transaction_index.remove_block(block)
+        if len(self) > height:
+            # blocks below the window - the block at height - 1 is read from the block store to be the head
+            self.transaction_index.truncate(height)
+            block = self.get_block_by_height(height - 1)
+            self.base_height = max(height - 1, 0)
+            if block is not None:
+                self.block_list = [block]
+                self.block_hash_dict[block.block_hash] = block
+        self.head = self.block_list[-1] if self.block_list else None
 
     def add_new_block(self, block: Block) -> None:
         # assume that input block is validated
@@ -47,34 +270,154 @@ class Blockchain:
             block.previous_block = self.head
         self.head = block
 
+        block.height = len(self)
+        self.block_list.append(block)
+        self.block_hash_dict[block.block_hash] = block
+        self._pop_side_block(block.block_hash)
+        self.transaction_index.add_block(block)
+
+        # keep undo journals of the last MAX_REORG_DEPTH blocks only
+        old_height = block.height - constants.MAX_REORG_DEPTH - 1
+        if old_height >= self.base_height:
+            self.block_list[old_height - self.base_height].undo_journal = None
+
+    def remove_head(self) -> Block:
+        # move the head back to the side blocks and return it - used to unapply blocks when switching branches
+        block = self.block_list.pop()
+        del self.block_hash_dict[block.block_hash]
+        self.transaction_index.remove_block(block)
+        self.head = self.block_list[-1] if self.block_list else None
+        self._add_side_block_entry(block)
+        return block
+
+    def prune_undo_journals(self) -> None:
+        # blocks deeper than MAX_REORG_DEPTH are never unapplied - drop their undo journals
+        for block in self.block_list[:-constants.MAX_REORG_DEPTH]:
+            block.undo_journal = None
+
+    def add_side_block(self, block: Block) -> bool:
+        # keep block of a competing branch - assume its previous block is in the chain or is a side block
+        # return False if the block is evicted right away (the pool is full of blocks at higher heights)
+        previous_block_hash = binascii.unhexlify(block.previous_block_hash_hex)
+        previous_block = self.block_hash_dict.get(previous_block_hash, None) or self.side_block_dict[previous_block_hash]
+        block.previous_block = previous_block
+        block.height = previous_block.height + 1
+        self._add_side_block_entry(block)
+        self._prune_side_blocks()
+        while len(self.side_block_dict) > self.max_side_block_count:
+            lowest_height = self._peek_side_height()
+            self.remove_side_block(self.side_block_dict[next(iter(self.side_height_dict[lowest_height]))])
+        return block.block_hash in self.side_block_dict
+
+    def _add_side_block_entry(self, block: Block) -> None:
+        self.side_block_dict[block.block_hash] = block
+        if block.height not in self.side_height_dict:
+            self.side_height_dict[block.height] = dict()
+            heapq.heappush(self.side_height_heap, block.height)
+        self.side_height_dict[block.height][block.block_hash] = None
+
+    def _pop_side_block(self, block_hash: bytes) -> Optional[Block]:
+        block = self.side_block_dict.pop(block_hash, None)
+        if block is None:
+            return None
+        block_hash_dict = self.side_height_dict[block.height]
+        del block_hash_dict[block_hash]
+        if not block_hash_dict:
+            del self.side_height_dict[block.height]
+            if len(self.side_height_heap) > 2 * len(self.side_height_dict) + 32:
+                self.side_height_heap = list(self.side_height_dict)
+                heapq.heapify(self.side_height_heap)
+        return block
+
+    def _peek_side_height(self) -> Optional[int]:
+        # drop heights without side blocks from the top and return the lowest height of the side blocks
+        while self.side_height_heap and self.side_height_heap[0] not in self.side_height_dict:
+            heapq.heappop(self.side_height_heap)
+        return self.side_height_heap[0] if self.side_height_heap else None
+
+    def _prune_side_blocks(self) -> None:
+        # side blocks forking deeper than MAX_REORG_DEPTH are never switched to - only the lowest heights are visited
+        min_height = len(self) - constants.MAX_REORG_DEPTH
+        lowest_height = self._peek_side_height()
+        while lowest_height is not None and lowest_height < min_height:
+            for block_hash in list(self.side_height_dict[lowest_height]):
+                self._pop_side_block(block_hash)
+            lowest_height = self._peek_side_height()
+
+    def remove_side_block(self, block: Block) -> None:
+        # drop side block and its descendants - e.g. when the block turns out to be invalid
+        # descendants are at the following heights - stop at the first height without one
+        removed_hash_set = {block.block_hash}
+        height = block.height + 1
+        while True:
+            child_hash_list = [
+                block_hash for block_hash in self.side_height_dict.get(height, dict())
+                if self.side_block_dict[block_hash].previous_block.block_hash in removed_hash_set
+            ]
+            if not child_hash_list:
+                break
+            removed_hash_set.update(child_hash_list)
+            height += 1
+        for block_hash in removed_hash_set:
+            self._pop_side_block(block_hash)
+
+    def get_fork(self, block: Block) -> Optional[Tuple[List[Block], List[Block]]]:
+        # return (blocks to unapply - head first, side blocks to apply - fork point first) to make the input side block the head
+        # return None if the branch does not reach the chain within the side blocks kept
+        branch_block_list = []
+        current_block = block
+        while current_block is not None and current_block.block_hash in self.side_block_dict:
+            branch_block_list.append(current_block)
+            current_block = current_block.previous_block
+        if current_block is None or self.block_hash_dict.get(current_block.block_hash, None) is not current_block:
+            return None
+        return list(reversed(self.block_list[current_block.height + 1 - self.base_height:])), list(reversed(branch_block_list))
+
     def validate(self):
-        # validate the whole blockchain from head to the initial block
-        account_dict = {}
-        block_dict_list = self.to_dict_list()
-        previous_block = None
-        for block_dict in reversed(block_dict_list):
-            block = create_block_from_dict(block_dict, previous_block=previous_block)
-            block.validate(account_dict)
-            block.update_account_dict(account_dict)
-            previous_block = block
+        # validate the whole blockchain from the initial block to head
+        # blocks are already decoded and linked - validated in place without converting them to dict and back
+        validate_block_list(list(self.iter_blocks(0, len(self))), dict())
+        self.prune_undo_journals()
 
-    def initialize_accounts(self) -> Dict[bytes, Account]:
+    def initialize_accounts(self, snapshot: Optional[Tuple[int, Dict[bytes, Account]]] = None) -> Dict[bytes, Account]:
         # initialize Account dict - assume blockchain is valid
+        # snapshot is (height, account dict after applying the block at height) - only the blocks after it are replayed
         # return { public key: Account object }
         if self.head is None:
             return {}
 
-        account_dict = dict()
-        block_dict_list = self.to_dict_list()
-        previous_block = None
-        for block_dict in reversed(block_dict_list):
-            block = create_block_from_dict(block_dict, previous_block=previous_block)
+        # blocks of the chain are applied so that they keep undo journals to be unapplied later
+        if snapshot is not None:
+            height, account_dict = snapshot
+        else:
+            height, account_dict = -1, dict()
+        for block in self.iter_blocks(height + 1, len(self)):
             block.update_account_dict(account_dict)
-            previous_block = block
+        self.prune_undo_journals()
 
         print(f"[INFO] Initialized {len(account_dict)} accounts")
         return account_dict
 
-        # TODO: add functino to append blocks to head instead of re-initializing
 
-        # TODO: add utility function for blockchain e.g. finding specific transaction in the blocks of the chain
+def validate_block_list(block_list: List[Block], account_dict: Dict[bytes, Account]) -> None:
+    # validate linked blocks in order on top of account_dict and apply them to account_dict in place
+    # verify signatures of all blocks and transactions in one parallel batch
+    signature_item_list = []
+    for block in block_list:
+        signature_item_list.append(block.get_signature_item())
+        signature_item_list.extend(tx.get_signature_item() for tx in block.transaction_list)
+    signature_verifier.verify_all(signature_item_list)
+
+    for block in block_list:
+        block.commit_state_view(block.validate(account_dict, verify_signatures=False))
+
+
+def load_blockchain_from_store(block_store: BlockStore, memory_window: int = constants.BLOCK_MEMORY_WINDOW) -> Blockchain:
+    # rebuild the blockchain from the blocks saved on the disk - no need to fetch it from other nodes
+    # only the latest memory_window blocks are decoded - older blocks stay on the disk
+    start_height = max(len(block_store) - memory_window, 0)
+    previous_block = None
+    for height, block_dict in enumerate(block_store.iter_block_dicts(start_height), start=start_height):
+        previous_block = create_block_from_dict(block_dict, previous_block=previous_block)
+        previous_block.height = height
+    return Blockchain(previous_block, block_store=block_store, memory_window=memory_window)
@@ -0,0 +1,66 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from block.block import Block
+from utils import constants
+
+
+# Blocks received before their previous block (e.g. gossip delivered them out of order)
+# Blocks are keyed by previous_block_hash_hex so that they are connected as soon as the previous block is accepted.
+# The pool is bounded by size and age - the oldest blocks are evicted first.
+
+class OrphanBlockPool:
+    def __init__(self, max_size: int = constants.ORPHAN_BLOCK_POOL_SIZE, ttl: float = constants.ORPHAN_BLOCK_TTL):
+        self.max_size = max_size
+        self.ttl = ttl  # seconds a block is kept
+
+        # { block_hash: (block, origin, time added) } - in the order of arrival
+        self.block_dict: Dict[bytes, Tuple[Block, str, float]] = dict()
+        # { previous_block_hash_hex: { block_hash: None } } - dict as an ordered set
+        self.children_dict: Dict[bytes, Dict[bytes, None]] = dict()
+
+    def __len__(self):
+        return len(self.block_dict)
+
+    def __contains__(self, block_hash: bytes):
+        return block_hash in self.block_dict
+
+    def add(self, block: Block, origin: str, now: Optional[float] = None) -> bool:
+        # return False if the block is already in the pool
+        # assume block has previous_block_hash_hex
+        if block.block_hash in self.block_dict:
+            return False
+        now = time.monotonic() if now is None else now
+
+        self.evict_expired(now)
+        while len(self.block_dict) >= self.max_size:
+            self._remove(next(iter(self.block_dict)))
+
+        self.block_dict[block.block_hash] = (block, origin, now)
+        self.children_dict.setdefault(block.previous_block_hash_hex, dict())[block.block_hash] = None
+        return True
+
+    def has_children(self, block_hash_hex: bytes) -> bool:
+        return block_hash_hex in self.children_dict
+
+    def pop_children(self, block_hash_hex: bytes, now: Optional[float] = None) -> List[Tuple[Block, str]]:
+        # remove and return (block, origin) of the blocks whose previous block is the input block - in the order of arrival
+        self.evict_expired(time.monotonic() if now is None else now)
+        child_hash_list = list(self.children_dict.get(block_hash_hex, dict()))
+        return [self._remove(child_hash) for child_hash in child_hash_list]
+
+    def evict_expired(self, now: float) -> None:
+        # blocks are in the order of arrival - stop at the first block that has not expired
+        while self.block_dict:
+            block_hash = next(iter(self.block_dict))
+            if now - self.block_dict[block_hash][2] < self.ttl:
+                break
+            self._remove(block_hash)
+
+    def _remove(self, block_hash: bytes) -> Tuple[Block, str]:
+        block, origin, _ = self.block_dict.pop(block_hash)
+        child_hash_dict = self.children_dict[block.previous_block_hash_hex]
+        del child_hash_dict[block_hash]
+        if not child_hash_dict:
+            del self.children_dict[block.previous_block_hash_hex]
+        return block, origin
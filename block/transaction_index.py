@@ -0,0 +1,129 @@
+import binascii
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+from block.block import Block
+
+
+# Index of transactions in the blockchain
+# transaction location is (height of the block, position of the transaction in the block)
+
+class TransactionIndex:
+    def __init__(self):
+        self.location_dict: Dict[bytes, Tuple[int, int]] = dict()  # { transaction_hash: (height, position) }
+        # transactions sent or received by an account - locations are in ascending order
+        self.account_location_dict: Dict[bytes, List[Tuple[int, int]]] = dict()  # { public_key_hex: [(height, position)] }
+        # children (comments, replies, etc.) of a transaction - locations are in ascending order
+        self.children_location_dict: Dict[bytes, List[Tuple[int, int]]] = dict()  # { target_transaction_hash_hex: [(height, position)] }
+
+    def __len__(self):
+        return len(self.location_dict)
+
+    def __contains__(self, transaction_hash: bytes):
+        return transaction_hash in self.location_dict
+
+    def clear(self) -> None:
+        self.location_dict.clear()
+        self.account_location_dict.clear()
+        self.children_location_dict.clear()
+
+    def add_block(self, block: Block) -> None:
+        # assume block height is already set
+        for position, transaction in enumerate(block.transaction_list):
+            self._add(
+                (block.height, position),
+                transaction.transaction_hash,
+                transaction.transaction_source.source_public_key_hex,
+                transaction.transaction_target.target_public_key_hex,
+                transaction.transaction_target.target_transaction_hash_hex
+            )
+
+    def add_block_dict(self, height: int, block_dict: dict) -> None:
+        # index block read from the block store without decoding it to a Block
+        for position, transaction_dict in enumerate(block_dict["transaction_dict_list"]):
+            target_public_key_hex = transaction_dict["target_public_key_hex"]
+            target_transaction_hash_hex = transaction_dict["target_transaction_hash_hex"]
+            self._add(
+                (height, position),
+                binascii.unhexlify(transaction_dict["transaction_hash_hex"]),
+                transaction_dict["source_public_key_hex"].encode('utf-8'),
+                target_public_key_hex.encode('utf-8') if target_public_key_hex is not None else None,
+                target_transaction_hash_hex.encode('utf-8') if target_transaction_hash_hex is not None else None
+            )
+
+    def _add(
+        self,
+        location: Tuple[int, int],
+        transaction_hash: bytes,
+        source_public_key_hex: bytes,
+        target_public_key_hex: Optional[bytes],
+        target_transaction_hash_hex: Optional[bytes]
+    ) -> None:
+        self.location_dict[transaction_hash] = location
+        self.account_location_dict.setdefault(source_public_key_hex, []).append(location)
+        if target_public_key_hex is not None and target_public_key_hex != source_public_key_hex:
+            self.account_location_dict.setdefault(target_public_key_hex, []).append(location)
+        if target_transaction_hash_hex is not None:
+            self.children_location_dict.setdefault(target_transaction_hash_hex, []).append(location)
+
+    def remove_block(self, block: Block) -> None:
+        # assume block is the last block added - its locations are at the end of the location lists
+        for transaction in reversed(block.transaction_list):
+            self.location_dict.pop(transaction.transaction_hash, None)
+
+            source_public_key_hex = transaction.transaction_source.source_public_key_hex
+            target_public_key_hex = transaction.transaction_target.target_public_key_hex
+            _pop_location(self.account_location_dict, source_public_key_hex)
+            if target_public_key_hex is not None and target_public_key_hex != source_public_key_hex:
+                _pop_location(self.account_location_dict, target_public_key_hex)
+
+            target_transaction_hash_hex = transaction.transaction_target.target_transaction_hash_hex
+            if target_transaction_hash_hex is not None:
+                _pop_location(self.children_location_dict, target_transaction_hash_hex)
+
+    def truncate(self, height: int) -> None:
+        # remove transactions of the blocks from input height on - used when blocks are not in memory to be removed
+        self.location_dict = {
+            transaction_hash: location for transaction_hash, location in self.location_dict.items() if location[0] < height
+        }
+        for location_list_dict in (self.account_location_dict, self.children_location_dict):
+            for key in list(location_list_dict):
+                location_list = location_list_dict[key]
+                del location_list[bisect.bisect_left(location_list, (height, 0)):]
+                if not location_list:
+                    del location_list_dict[key]
+
+    def get_location(self, transaction_hash: bytes) -> Optional[Tuple[int, int]]:
+        return self.location_dict.get(transaction_hash, None)
+
+    def get_account_locations(
+        self,
+        public_key_hex: bytes,
+        limit: int,
+        before: Optional[Tuple[int, int]] = None
+    ) -> List[Tuple[int, int]]:
+        # return up to limit locations of transactions of the account in descending order
+        # that are older than before (exclusive)
+        return _get_page(self.account_location_dict.get(public_key_hex, []), limit, before)
+
+    def get_children_locations(
+        self,
+        transaction_hash_hex: bytes,
+        limit: int,
+        before: Optional[Tuple[int, int]] = None
+    ) -> List[Tuple[int, int]]:
+        # return up to limit locations of children transactions in descending order
+        # that are older than before (exclusive)
+        return _get_page(self.children_location_dict.get(transaction_hash_hex, []), limit, before)
+
+
+def _get_page(location_list: List[Tuple[int, int]], limit: int, before: Optional[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    end = len(location_list) if before is None else bisect.bisect_left(location_list, before)
+    return location_list[max(0, end - limit):end][::-1]
+
+
+def _pop_location(location_list_dict: Dict[bytes, List[Tuple[int, int]]], key: bytes) -> None:
+    location_list = location_list_dict[key]
+    location_list.pop()
+    if not location_list:
+        del location_list_dict[key]
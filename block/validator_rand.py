@@ -2,7 +2,7 @@ import binascii
 import json
 import secrets
 import time
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import hashes
@@ -32,6 +32,11 @@ class ValidatorRand:
 
         self.signature = signature
 
+        # presigned dict and its canonical json bytes - reused for signing, verification and to_dict
+        # until any presigned field changes
+        self._presigned_key = None
+        self._presigned_cache: Optional[Tuple[Dict, bytes]] = None
+
     def _to_presigned_dict(self) -> Dict:
         return {
             "previous_block_hash_hex": self.previous_block_hash_hex.decode('utf-8'),
@@ -40,8 +45,20 @@ class ValidatorRand:
             "timestamp": self.timestamp
         }
 
+    def _get_presigned(self) -> Tuple[Dict, bytes]:
+        presigned_key = (self.previous_block_hash_hex, self.validator_public_key_hex, self.rand, self.timestamp)
+        if self._presigned_cache is None or self._presigned_key != presigned_key:
+            presigned_dict = self._to_presigned_dict()
+            self._presigned_cache = (presigned_dict, json.dumps(presigned_dict).encode('utf-8'))
+            self._presigned_key = presigned_key
+        return self._presigned_cache
+
+    def get_presigned_bytes(self) -> bytes:
+        # canonical bytes that are signed
+        return self._get_presigned()[1]
+
     def to_dict(self) -> Dict:
-        validator_rand_dict = self._to_presigned_dict()
+        validator_rand_dict = dict(self._get_presigned()[0])
         # add signature hex
         if self.signature is not None:
             validator_rand_dict["signature_hex"] = binascii.hexlify(self.signature).decode('utf-8')
@@ -50,6 +67,6 @@ class ValidatorRand:
 
     def sign(self, private_key: ec.EllipticCurvePrivateKey) -> None:
         self.signature = private_key.sign(
-            json.dumps(self._to_presigned_dict()).encode('utf-8'),
+            self.get_presigned_bytes(),
             ec.ECDSA(hashes.SHA256())
         )
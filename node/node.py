@@ -1,25 +1,34 @@
 import asyncio
 import binascii
-import copy
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import itertools
 import json
 import time
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives.asymmetric import ec
 import httpx
 import requests
 from account.account import Account
-
-from block.block import Block
-from block.blockchain import Blockchain
+from account.account_snapshot import AccountSnapshotStore, AccountValue, get_account_value_list
+from account.account_state import AccountStateView, get_or_create_account
+
+from block.block import Block, create_block_from_compact_dict, create_block_from_dict
+from block.block_applier import block_applier
+from block.block_store import BlockStore
+from block.blockchain import Blockchain, validate_block_list
+from block.orphan_pool import OrphanBlockPool
 from block.validator_rand import ValidatorRand
 from transaction.transaction import Transaction
+from transaction.transaction_pool import TransactionPool
+from transaction.transaction_utils import create_transaction_from_dict
 from utils import constants
-from node.utils import get_stakes_from_accounts
+from node.stake_index import StakeIndex
 from utils.crypto import get_public_key_hex
+from utils.signature_verifier import signature_verifier
 from validation.block.exception import BlockNotHeadError, BlockValidationError
+from validation.transaction.exception import TransactionValidationError
 from validation.validator_rand.task import ValidatorRandValidationTask
 
 
@@ -27,24 +36,42 @@ class Node:
     def __init__(
         self,
         address: str,
-        private_key: Optional[Optional[ec.EllipticCurvePrivateKey]] = None  # TODO: differentiate between full node and light node
+        private_key: Optional[Optional[ec.EllipticCurvePrivateKey]] = None,  # TODO: differentiate between full node and light node
+        block_store: Optional[BlockStore] = None,
+        snapshot_store: Optional[AccountSnapshotStore] = None
     ):
         self.address = address
         self.private_key = private_key  # private key of this node - used for signing block, etc.
         self.known_node_address_set = self._initialize_known_node_address_set()
         self.blockchain = None
+        self.block_store = block_store  # blocks of self.blockchain are persisted here if set
+        self.snapshot_store = snapshot_store  # account state is saved here every CHECKPOINT_INTERVAL blocks if set
+        self.snapshot_height = -1  # height of the head when the account state was saved last
+        # (height, block hash, account values) taken but not written yet
+        self.pending_snapshot: Optional[Tuple[int, bytes, List[AccountValue]]] = None
 
-        self.transaction_pool: Dict[bytes, Transaction] = dict()  # { transaction_hash_hex: Transaction }
+        self.transaction_pool = TransactionPool()  # { transaction_hash_hex: Transaction } ordered by priority
         self.transaction_broadcasted = dict()  # { transactino_hash_hex: set }
+        self.transaction_broadcast_queue: List[Tuple[Transaction, str]] = []  # (transaction, origin) to broadcast
+        self.transaction_broadcast_task: Optional[asyncio.Task] = None
         self.block_broadcasted = dict()  # { block_hash_hex: set }
+        self.orphan_block_pool = OrphanBlockPool()  # blocks waiting for their previous block
 
         self.account_dict = dict()  # { account_public_key_hex: Account }
+        self.stake_index = StakeIndex()  # validators in self.account_dict - updated with the accounts each block touches
 
         self.block_validator_dict: Dict[bytes, bytes] = dict()  # { previous_block_hash_hex: validator_public_key_hash_hex }
         # { previous_block_hash_hex: { validator_public_key_hash: random_number } }
         self.block_validator_rand_dict: Dict[bytes, Dict[bytes, int]] = dict()
 
+        self.http_client: Optional[httpx.AsyncClient] = None  # shared by all requests to other nodes
+        self.peer_latency_dict: Dict[str, float] = dict()  # { address: seconds taken by the last delivery }
+        self.sync_task: Optional[asyncio.Task] = None  # chain sync running in the background - at most one at a time
+        self.orphan_task: Optional[asyncio.Task] = None  # blocks waiting for the validator of the head being accepted
+
         self.lock = asyncio.Lock()
+        self.block_store_lock = asyncio.Lock()  # block store is written by one task at a time
+        self.snapshot_lock = asyncio.Lock()  # account snapshot is written by one task at a time
 
     ##### Initialization functions #####
 
@@ -93,48 +120,6 @@ class Node:
 
         self.known_node_address_set.difference_update(disconnected_address_set)
 
-    def _get_longest_blockchain(self):
-        disconnected_address_set = set([])
-        origin_address = None
-        address_set = self.known_node_address_set.copy()
-        for address in address_set:
-            if address == self.address:
-                continue
-            url = address + "/data/blockchain"
-            try:
-                r = requests.get(url=url)
-                if self.blockchain is None:
-                    self.blockchain = Blockchain()
-                    # if r.json() is empty list => blockchain has head None
-                    self.blockchain.from_dict_list(r.json())
-                    try:
-                        self.blockchain.validate()
-                        origin_address = address
-                    except Exception as e:
-                        print(f"[ERROR] Error fetching longest chain: {e}")
-                        self.blockchain = None
-                else:
-                    # TODO: update after head instead of re-initializing
-                    if len(self.blockchain) < len(r.json()):
-                        self.blockchain.from_dict_list(r.json())
-                        try:
-                            self.blockchain.validate()
-                            origin_address = address
-                        except Exception as e:
-                            print(f"[ERROR] Error fetching longest chain: {e}")
-                            self.blockchain = None
-            except requests.exceptions.ConnectionError:
-                disconnected_address_set.add(address)
-
-        self.known_node_address_set.difference_update(disconnected_address_set)
-        if self.blockchain is not None:
-            self.account_dict = self.blockchain.initialize_accounts()
-
-        if origin_address is None:
-            print(f"[WARN] Did not receive longest blockchain")
-        else:
-            print(f"[INFO] Received longest blockchain from address {origin_address}")
-
     def join_network(self):
         # 1. Ask seed nodes for their known nodes
         self._request_addresses_from_known_nodes()
@@ -143,7 +128,362 @@ class Node:
         self._advertise_to_known_nodes()
 
         # 3. Get blockchain from known nodes
-        self._get_longest_blockchain()
+        # event loop of the server may be already running when the node is created at import time,
+        # so the sync runs on its own event loop in a worker thread with a http client of its own
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(asyncio.run, self._sync_blockchain_with_new_client()).result()
+
+    async def _sync_blockchain_with_new_client(self):
+        async with httpx.AsyncClient(timeout=constants.PEER_REQUEST_TIMEOUT) as client:
+            await self.sync_blockchain(client)
+
+    def load_blockchain(self, blockchain: Blockchain):
+        # initialize account state of the blockchain loaded from the disk
+        # start from the latest snapshot if it belongs to the blockchain - only the blocks after it are replayed
+        snapshot = self.snapshot_store.load() if self.snapshot_store is not None else None
+        if snapshot is not None:
+            height, block_hash, account_dict = snapshot
+            if blockchain.get_block_hash(height) == block_hash:
+                print(f"[INFO] Loaded account snapshot at height {height}")
+                self.snapshot_height = height
+                snapshot = (height, account_dict)
+            else:
+                print(f"[WARN] Account snapshot at height {height} does not belong to the blockchain")
+                snapshot = None
+
+        self.blockchain = blockchain
+        self.set_account_dict(blockchain.initialize_accounts(snapshot=snapshot))
+
+    def set_account_dict(self, account_dict: Dict[bytes, Account]):
+        # replace the whole account state
+        self.account_dict = account_dict
+        self.stake_index.rebuild(account_dict)
+
+    def _take_snapshot_if_due(self):
+        # take account state at the head every CHECKPOINT_INTERVAL blocks - written by _save_snapshot
+        # also when the saved head is no longer in the blockchain (switched to another branch)
+        # called where the head and the account state change together so that they match
+        if self.snapshot_store is None or self.blockchain is None or self.blockchain.head is None:
+            return
+        height = self.blockchain.head.height
+        if self.snapshot_height <= height < self.snapshot_height + constants.CHECKPOINT_INTERVAL:
+            return
+        self.pending_snapshot = (height, self.blockchain.head.block_hash, get_account_value_list(self.account_dict))
+        self.snapshot_height = height
+
+    async def _save_snapshot(self):
+        # write the latest snapshot taken in a worker thread - one write at a time
+        # a snapshot replaced by a later one before it is written is not written
+        async with self.snapshot_lock:
+            snapshot, self.pending_snapshot = self.pending_snapshot, None
+            if snapshot is None:
+                return
+            await asyncio.get_running_loop().run_in_executor(None, self.snapshot_store.save, *snapshot)
+        print(f"[INFO] Saved account snapshot at height {snapshot[0]}")
+
+    def set_blockchain(self, blockchain: Blockchain):
+        # replace the blockchain of the node - only validated blockchain is written to the block store
+        # the block store is written separately (_write_to_block_store) so that replacing the chain does no disk io
+        blockchain.block_store = self.block_store
+        self.blockchain = blockchain
+
+    async def _write_to_block_store(self, height: Optional[int] = None, block_list: Optional[List[Block]] = None):
+        # write input blocks to the block store from input height on - in one batch in a worker thread
+        # without input blocks, the blocks of the chain that the block store does not hold yet are written
+        if self.block_store is None:
+            return
+        async with self.block_store_lock:
+            if block_list is None:
+                if self.blockchain is None:
+                    return
+                height, block_list = self.blockchain.get_block_store_change()
+                if height == len(self.block_store) and not block_list:
+                    return
+            await asyncio.get_running_loop().run_in_executor(None, self.block_store.replace_from, height, block_list)
+            if self.blockchain is not None:
+                self.blockchain.release_stored_blocks()
+
+    ##### Chain synchronization #####
+
+    async def sync_blockchain(self, client: Optional[httpx.AsyncClient] = None) -> bool:
+        # headers-first sync with the longest chain among the peers
+        # only the blocks after the common ancestor are downloaded - in parallel chunks from the peers that have them
+        # return True if the blockchain is updated
+        if client is None:
+            client = self._get_http_client()
+
+        # 1. Get chain length of each peer
+        address_list = [address for address in self.known_node_address_set if address != self.address]
+        disconnected_address_set = set([])
+
+        async def get_length(address: str) -> Optional[int]:
+            try:
+                response = await client.get(address + constants.BLOCKCHAIN_LENGTH_PATH)
+            except httpx.TransportError:
+                disconnected_address_set.add(address)
+                return None
+            return response.json() if response.status_code == 200 else None
+
+        length_list = await asyncio.gather(*map(get_length, address_list))
+        async with self.lock:
+            self.known_node_address_set.difference_update(disconnected_address_set)
+
+        local_length = len(self.blockchain) if self.blockchain is not None else 0
+        length_dict = {
+            address: length for address, length in zip(address_list, length_list)
+            if isinstance(length, int) and length > local_length
+        }  # { address: chain length } of peers with longer chains
+
+        # 2. Sync with the peer that has the longest chain - fall back to the next one if it fails
+        for address in sorted(length_dict, key=lambda address: length_dict[address], reverse=True):
+            try:
+                if await self._sync_blockchain_from(client, address, length_dict):
+                    print(f"[INFO] Synced blockchain with address {address} - updated length: {len(self.blockchain)}")
+                    return True
+            except Exception as e:
+                print(f"[ERROR] Error syncing blockchain with {address}: {e}")
+
+        print(f"[WARN] Did not receive longer blockchain")
+        return False
+
+    def request_sync(self) -> asyncio.Task:
+        # sync the chain in the background so that the node keeps serving requests in the meantime
+        # requests made while a sync is running share that sync
+        if self.sync_task is None or self.sync_task.done():
+            self.sync_task = asyncio.ensure_future(self._sync_blockchain_in_background())
+        return self.sync_task
+
+    async def _sync_blockchain_in_background(self) -> bool:
+        try:
+            return await self.sync_blockchain()
+        except Exception as e:
+            print(f"[ERROR] Error syncing blockchain: {e}")
+            return False
+
+    async def _sync_blockchain_from(self, client: httpx.AsyncClient, address: str, length_dict: Dict[str, int]) -> bool:
+        # headers of the peer at address decide the chain to switch to - blocks may come from any peer
+        # 1. Find common ancestor
+        ancestor_height = await self._find_common_ancestor(client, address)
+        if ancestor_height is None:
+            return False
+
+        # 2. Get headers after the common ancestor
+        header_list = await self._get_header_list(client, address, ancestor_height, length_dict[address])
+        if not header_list:
+            return False
+
+        # 3. Start downloading blocks of the headers
+        chunk_task_list = self._get_block_chunk_tasks(client, address, header_list, length_dict)
+
+        # 4. Validate blocks as their chunks arrive and switch to the new chain
+        try:
+            return await self._apply_synced_block_list(ancestor_height, chunk_task_list)
+        finally:
+            for chunk_task in chunk_task_list:
+                chunk_task.cancel()
+
+    async def _find_common_ancestor(self, client: httpx.AsyncClient, address: str) -> Optional[int]:
+        # return height of the highest block that the local chain shares with the peer (-1 if none)
+        # look back from the local head in growing windows - a fork is usually a few blocks deep
+        if self.blockchain is None:
+            return -1
+
+        end_height = len(self.blockchain)  # blocks at end_height and above are known to differ
+        window = 1
+        while end_height > 0:
+            start_height = max(0, end_height - window)
+            header_dict_list = await self._get_from_peer(
+                client, address, constants.BLOCKCHAIN_HEADERS_PATH,
+                {"start_height": start_height, "limit": end_height - start_height}
+            )
+            if header_dict_list is None:
+                return None
+
+            # block hash commits to the previous block hash - the highest matching block is the common ancestor
+            for header_dict in reversed(header_dict_list):
+                block_hash = self.blockchain.get_block_hash(header_dict["height"])
+                if block_hash is not None and binascii.hexlify(block_hash).decode('utf-8') == header_dict["block_hash_hex"]:
+                    return header_dict["height"]
+
+            end_height = start_height
+            window = min(window * 2, constants.SYNC_HEADERS_LIMIT)
+        return -1
+
+    async def _get_header_list(
+        self,
+        client: httpx.AsyncClient,
+        address: str,
+        ancestor_height: int,
+        length: int
+    ) -> Optional[List[dict]]:
+        # return headers from ancestor_height + 1 to length - 1 that are linked to the common ancestor
+        header_dict_list = []
+        start_height = ancestor_height + 1
+        while start_height < length:
+            page = await self._get_from_peer(
+                client, address, constants.BLOCKCHAIN_HEADERS_PATH,
+                {"start_height": start_height, "limit": min(constants.SYNC_HEADERS_LIMIT, length - start_height)}
+            )
+            if not page:
+                return None
+            header_dict_list.extend(page)
+            start_height += len(page)
+
+        if ancestor_height >= 0:
+            previous_block_hash_hex = binascii.hexlify(self.blockchain.get_block_hash(ancestor_height)).decode('utf-8')
+        else:
+            previous_block_hash_hex = None
+        for height, header_dict in enumerate(header_dict_list, start=ancestor_height + 1):
+            if header_dict["height"] != height or header_dict["previous_block_hash_hex"] != previous_block_hash_hex:
+                print(f"[WARN] Received headers not linked to the common ancestor from {address}")
+                return None
+            previous_block_hash_hex = header_dict["block_hash_hex"]
+        return header_dict_list
+
+    def _get_block_chunk_tasks(
+        self,
+        client: httpx.AsyncClient,
+        address: str,
+        header_dict_list: List[dict],
+        length_dict: Dict[str, int]
+    ) -> List[asyncio.Task]:
+        # start downloading blocks of the headers in chunks spread over the peers that have them
+        # return the task of each chunk in height order - result is the decoded blocks or None if the chunk failed
+        # a chunk that does not match the headers is downloaded again from the peer at address
+        semaphore = asyncio.Semaphore(constants.SYNC_CONCURRENCY)
+        loop = asyncio.get_running_loop()
+
+        async def get_chunk(chunk_idx: int, chunk_header_dict_list: List[dict]) -> Optional[List[Block]]:
+            start_height = chunk_header_dict_list[0]["height"]
+            end_height = start_height + len(chunk_header_dict_list)
+            source_address_list = sorted(
+                source_address for source_address, length in length_dict.items() if length >= end_height
+            )
+            candidate_address_list = [source_address_list[chunk_idx % len(source_address_list)]]
+            if candidate_address_list[0] != address:
+                candidate_address_list.append(address)
+
+            async with semaphore:
+                for candidate_address in candidate_address_list:
+                    block_dict_list = await self._get_from_peer(
+                        client, candidate_address, constants.BLOCKCHAIN_BLOCKS_PATH,
+                        {"start_height": start_height, "limit": len(chunk_header_dict_list)}
+                    )
+                    # decoding hashes every block - done in a worker thread while other chunks are downloaded
+                    block_list = await loop.run_in_executor(
+                        None, _create_block_list_from_headers, block_dict_list, chunk_header_dict_list
+                    )
+                    if block_list is not None:
+                        return block_list
+            return None
+
+        return [
+            asyncio.ensure_future(get_chunk(chunk_idx, header_dict_list[idx:idx + constants.SYNC_BLOCKS_LIMIT]))
+            for chunk_idx, idx in enumerate(range(0, len(header_dict_list), constants.SYNC_BLOCKS_LIMIT))
+        ]
+
+    async def _apply_synced_block_list(self, ancestor_height: int, chunk_task_list: List[asyncio.Task]) -> bool:
+        # validate downloaded blocks on top of the account state at the common ancestor and switch to them
+        # each chunk is validated as soon as it arrives - download of the later chunks goes on meanwhile
+        # raise validation error if any block is invalid
+        head = self.blockchain.head if self.blockchain is not None else None
+        # blocks above the common ancestor - blocks below the window are not in memory and have no undo journals
+        base_height = self.blockchain.base_height if head is not None else 0
+        unapply_block_list = list(reversed(
+            self.blockchain.block_list[max(ancestor_height + 1 - base_height, 0):]
+        )) if head is not None else []
+        is_replayed = head is None or ancestor_height + 1 < base_height \
+            or any(block.undo_journal is None for block in unapply_block_list)
+        if not is_replayed:
+            # account state at the common ancestor is restored from the undo journals of the blocks above it
+            # in a view over the current account state - committed only when the chain is swapped
+            account_dict = AccountStateView(self.account_dict)
+            for block in unapply_block_list:
+                block.revert_account_dict(account_dict)
+        else:
+            # fork is deeper than the undo journals kept - account state is replayed up to the common ancestor
+            account_dict = dict()
+
+        # validation is CPU bound - run it in a worker thread so that the event loop keeps serving requests
+        # nothing shared with the current chain and account state is modified until the swap below
+        loop = asyncio.get_running_loop()
+        if is_replayed and head is not None:
+            replay_block_iter = self.blockchain.iter_blocks(0, ancestor_height + 1)
+            await loop.run_in_executor(None, _replay_block_list, replay_block_iter, account_dict)
+
+        block_list = []
+        previous_block = self.blockchain.get_block_by_height(ancestor_height) if ancestor_height >= 0 else None
+        for chunk_task in chunk_task_list:
+            chunk = await chunk_task
+            if chunk is None:
+                return False
+            for block in chunk:
+                block.previous_block = previous_block
+                previous_block = block
+            await loop.run_in_executor(None, validate_block_list, chunk, account_dict)
+            block_list.extend(chunk)
+
+        # write the new chain to the block store before the swap so that only the swap itself runs under the lock
+        # blocks below the window are read from the block store until the swap - those are written after it
+        if ancestor_height + 1 >= base_height:
+            await self._write_to_block_store(ancestor_height + 1, block_list)
+
+        # swap in the new chain and account state at once - no await in between
+        async with self.lock:
+            # chain may have changed while validating
+            is_swapped = (self.blockchain.head if self.blockchain is not None else None) is head
+            if is_swapped:
+                self._swap_synced_block_list(ancestor_height, unapply_block_list, block_list, account_dict, is_replayed)
+        # block store follows the current chain - nothing is written if the blocks were written before the swap
+        await self._write_to_block_store()
+        await self._save_snapshot()
+        return is_swapped
+
+    def _swap_synced_block_list(
+        self,
+        ancestor_height: int,
+        unapply_block_list: List[Block],
+        block_list: List[Block],
+        account_dict: Union[AccountStateView, Dict[bytes, Account]],
+        is_replayed: bool
+    ):
+        # account_dict is a view over the current account state unless the account state was replayed
+        if not is_replayed:
+            for _ in unapply_block_list:
+                self.blockchain.remove_head()
+            for block in block_list:
+                self.blockchain.add_new_block(block)
+            self.stake_index.update(self.account_dict, account_dict.commit())
+        elif self.blockchain is not None:
+            self.blockchain.truncate(ancestor_height + 1)
+            for block in block_list:
+                self.blockchain.add_new_block(block)
+            self.blockchain.prune_undo_journals()
+            self.set_account_dict(account_dict)
+        else:
+            blockchain = Blockchain(block_list[-1])
+            blockchain.prune_undo_journals()
+            self.set_blockchain(blockchain)
+            self.set_account_dict(account_dict)
+        self._update_transaction_pool(unapply_block_list, block_list)
+        self._take_snapshot_if_due()
+
+    async def _get_from_peer(
+        self,
+        client: httpx.AsyncClient,
+        address: str,
+        path: str,
+        params: Optional[dict] = None
+    ) -> Optional[Any]:
+        # return decoded json response - None if the peer is not reachable or the request fails
+        try:
+            response = await client.get(address + path, params=params)
+        except httpx.TransportError:
+            print(f"[WARN] Detected disconnection of {address}")
+            return None
+        if response.status_code != 200:
+            return None
+        return response.json()
 
     ##### ICO related functions #####
 
@@ -156,10 +496,17 @@ class Node:
         if self.blockchain is not None:
             self.blockchain.add_new_block(block)
             block.update_account_dict(self.account_dict)
+            self.stake_index.update(self.account_dict, block.undo_journal)
         else:
-            self.blockchain = Blockchain(block)
-            self.account_dict = self.blockchain.initialize_accounts()
-        # print(f"[INFO] Account stakes after ico block initialization: {get_stakes_from_accounts(self.account_dict)}")
+            self.set_blockchain(Blockchain(block))
+            self.set_account_dict(self.blockchain.initialize_accounts())
+        # called on startup before the event loop runs
+        if self.block_store is not None:
+            self.blockchain.write_to_block_store()
+        self._take_snapshot_if_due()
+        if self.pending_snapshot is not None:
+            self.snapshot_store.save(*self.pending_snapshot)
+            self.pending_snapshot = None
 
     ##### P2P data handling #####
 
@@ -168,103 +515,325 @@ class Node:
         self.known_node_address_set.add(address)
 
     async def accept_transaction(self, transaction: Transaction, origin: str):
-        transaction_hash_hex = binascii.hexlify(transaction.transaction_hash)
-        # print(f"[INFO {datetime.now().isoformat()}] Received transaction from {origin} - {transaction_hash_hex}")
+        # print(f"[INFO {datetime.now().isoformat()}] Received transaction from {origin} - {transaction.transaction_hash_hex}")
+
+        # 1-3. Validate transaction and add to transaction pool
+        if not await self._add_to_transaction_pool(transaction):
+            return None
+
+        # 4. Broadcast to other nodes
+        await self._broadcast_transaction(transaction, origin)
+
+    async def accept_transaction_batch(self, transaction_list: List[Transaction], origin: str) -> List[Optional[str]]:
+        # validate transactions in one pass and return error message of each transaction (None if accepted)
+        async with self.lock:
+            new_transaction_list = [
+                tx for tx in transaction_list if tx.transaction_hash_hex not in self.transaction_pool
+            ]
+
+        # 1. Verify signatures of new transactions as one batch
+        signature_result_dict = dict(zip(
+            map(lambda tx: tx.transaction_hash_hex, new_transaction_list),
+            await signature_verifier.verify_batch_async([tx.get_signature_item() for tx in new_transaction_list])
+        ))
+
+        # 2. Validate and add to transaction pool, then queue for broadcasting
+        error_list = []
+        for transaction in transaction_list:
+            if not signature_result_dict.get(transaction.transaction_hash_hex, True):
+                error_list.append("Invalid signature")
+                continue
+            try:
+                if await self._add_to_transaction_pool(transaction, verify_signature=False):
+                    await self._broadcast_transaction(transaction, origin)
+                error_list.append(None)
+            except TransactionValidationError as e:
+                error_list.append(str(e))
+        return error_list
+
+    async def _add_to_transaction_pool(self, transaction: Transaction, verify_signature: bool = True) -> bool:
+        # validate transaction and add it to the transaction pool
+        # return False if the transaction is already in the transaction pool or the full pool has no room for it
+        transaction_hash_hex = transaction.transaction_hash_hex
 
         # 1. Check if transaction in transaction pool
         async with self.lock:
-            if transaction.transaction_hash in self.transaction_pool:
-                return None
+            if transaction_hash_hex in self.transaction_pool:
+                return False
 
-        # 2. Validate transaction
+        # 2. Validate transaction against the balance left after pending transactions of the account
         source_public_key_hex = transaction.transaction_source.source_public_key_hex
         async with self.lock:
             if source_public_key_hex not in self.account_dict:
                 self.account_dict[source_public_key_hex] = Account(source_public_key_hex)
-        transaction.validate(self.account_dict[transaction.transaction_source.source_public_key_hex])
+            pending_account = self.transaction_pool.get_pending_account(self.account_dict[source_public_key_hex])
+        transaction.validate(pending_account, verify_signature=verify_signature)
 
         # 3. Add to transaction pool
         async with self.lock:
-            self.transaction_pool[transaction_hash_hex] = transaction
+            # other transactions of the account may have been added while waiting for the lock
+            current_pending_account = self.transaction_pool.get_pending_account(self.account_dict[source_public_key_hex])
+            if current_pending_account.balance != pending_account.balance:
+                transaction.validate(current_pending_account, verify_signature=False)
+            if not self.transaction_pool.add(transaction, self.account_dict[source_public_key_hex].stake):
+                return False
         # print(f"[INFO {datetime.now().isoformat()}] Added transaction to transaction pool - {transaction_hash_hex}")
-
-        # 4. Broadcast to other nodes
-        await self._broadcast_transaction(transaction, origin)
+        return True
 
     async def _broadcast_transaction(self, transaction: Transaction, origin: str):
-        transaction_hash_hex = binascii.hexlify(transaction.transaction_hash)
-
-        # add transaction to broadcasted set
+        # queue transaction - queued transactions are broadcasted together after TRANSACTION_BATCH_INTERVAL
+        # or as soon as TRANSACTION_BATCH_SIZE transactions are queued
         async with self.lock:
-            if transaction_hash_hex not in self.transaction_broadcasted:
-                self.transaction_broadcasted[transaction_hash_hex] = set([])
+            self.transaction_broadcast_queue.append((transaction, origin))
+            is_batch_full = len(self.transaction_broadcast_queue) >= constants.TRANSACTION_BATCH_SIZE
 
-        # send transcation data to other nodes
-        disconnected_address_set = set([])
-        address_set = self.known_node_address_set.copy()
-        for address in address_set:
-            if address == origin or address in self.transaction_broadcasted[transaction_hash_hex]:
-                continue
-            url = address + constants.TRANSACTION_VALIDATION_PATH
-            headers = {"Content-type": "application/json"}
-            data = transaction.to_dict()
-            data["origin"] = self.address
-            try:
-                async with self.lock:
-                    self.transaction_broadcasted[transaction_hash_hex].add(address)
-                async with httpx.AsyncClient() as client:
-                    await client.post(url, headers=headers, json=data)
-                # print(f'[INFO] Broadcasted transaction {transaction_hash_hex} to {address}')
-            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout):
-                print(f"[WARN] Detected disconnection of {address}")
-                disconnected_address_set.add(address)
+        if is_batch_full:
+            await self._flush_transaction_broadcast_queue()
+        elif self.transaction_broadcast_task is None or self.transaction_broadcast_task.done():
+            self.transaction_broadcast_task = asyncio.create_task(self._flush_transaction_broadcast_queue_later())
+
+    async def _flush_transaction_broadcast_queue_later(self):
+        await asyncio.sleep(constants.TRANSACTION_BATCH_INTERVAL)
+        await self._flush_transaction_broadcast_queue()
 
+    async def _flush_transaction_broadcast_queue(self):
+        # send queued transactions to other nodes as batches
         async with self.lock:
-            self.known_node_address_set.difference_update(
-                disconnected_address_set)
+            transaction_origin_list = self.transaction_broadcast_queue
+            self.transaction_broadcast_queue = []
+
+            # { address: indices of transactions in transaction_origin_list to send }
+            address_index_dict = {address: [] for address in self.known_node_address_set}
+            for idx, (transaction, origin) in enumerate(transaction_origin_list):
+                transaction_hash_hex = transaction.transaction_hash_hex
+                if transaction_hash_hex not in self.transaction_broadcasted:
+                    self.transaction_broadcasted[transaction_hash_hex] = set([])
+                for address in address_index_dict:
+                    if address != origin and address not in self.transaction_broadcasted[transaction_hash_hex]:
+                        address_index_dict[address].append(idx)
+                        self.transaction_broadcasted[transaction_hash_hex].add(address)
+
+        # peers that get the same transactions share the same request content
+        index_address_dict = dict()  # { transaction indices: [address] }
+        for address, index_list in address_index_dict.items():
+            if index_list:
+                index_address_dict.setdefault(tuple(index_list), []).append(address)
+        if not index_address_dict:
+            return
+
+        # 1. Announce transaction hashes - peers respond with the hashes they do not have
+        transaction_hash_hex_list = [
+            transaction.transaction_hash_hex.decode('utf-8') for transaction, _ in transaction_origin_list
+        ]
+        index_list_list = list(index_address_dict.keys())
+        response_dict_list = await asyncio.gather(*[
+            self._post_to_peers(
+                constants.INVENTORY_PATH,
+                index_address_dict[index_list],
+                json.dumps({"transaction_hash_hex_list": [transaction_hash_hex_list[idx] for idx in index_list]}).encode('utf-8')
+            )
+            for index_list in index_list_list
+        ])
+
+        # 2. Send bodies of the missing transactions - each transaction is encoded once
+        transaction_bytes_dict = dict()  # { index: encoded transaction }
+        address_content_list = []
+        for index_list, response_dict in zip(index_list_list, response_dict_list):
+            announced_hash_hex_list = [transaction_hash_hex_list[idx] for idx in index_list]
+            for address, response in response_dict.items():
+                missing_hash_hex_set = _get_missing_hash_hex_set(response, "transaction_hash_hex_list", announced_hash_hex_list)
+                missing_index_list = [idx for idx in index_list if transaction_hash_hex_list[idx] in missing_hash_hex_set]
+                if not missing_index_list:
+                    continue
+                for idx in missing_index_list:
+                    if idx not in transaction_bytes_dict:
+                        transaction_bytes_dict[idx] = json.dumps(transaction_origin_list[idx][0].to_dict()).encode('utf-8')
+                content = b"[" + b",".join(transaction_bytes_dict[idx] for idx in missing_index_list) + b"]"
+                address_content_list.append((address, content))
+
+        await asyncio.gather(*[
+            self._post_to_peers(constants.TRANSACTION_BATCH_VALIDATION_PATH, [address], content)
+            for address, content in address_content_list
+        ])
 
     async def accept_block(self, block: Block, origin: str) -> None:
         block_hash_hex = binascii.hexlify(block.block_hash)
         # print(f"[INFO {datetime.now().isoformat()}] Received block from {origin} - {block_hash_hex}")
 
         # 1. Check if block is already accepted
-        if binascii.hexlify(self.blockchain.head.block_hash) == binascii.hexlify(block.block_hash):
+        if self.blockchain.has_block(block.block_hash):
             # print(f"[INFO {datetime.now().isoformat()}] Received block from {origin} has already been accepted - {block_hash_hex}")
             return
 
-        # 2. Validate block
+        # 2. Keep block whose previous block has not arrived yet - it is accepted with its previous block
+        if self._is_orphan_block(block):
+            # only blocks signed by their validator take a slot in the pool
+            signature_verifier.verify_all([block.get_signature_item()])
+            if self.orphan_block_pool.add(block, origin):
+                print(f"[INFO {datetime.now().isoformat()}] Keeping block from {origin} until its previous block arrives - {block_hash_hex}")
+            return
+
+        # 3. Block on top of a block other than the head belongs to a competing branch
+        if not self._is_on_head(block):
+            if await self._accept_side_block(block, origin):
+                await self._accept_orphan_children(block)
+            return
+
+        # 4. Validate block - account state after the block is kept in a view until the block is added
+        # signatures are verified first without blocking the event loop
+        await signature_verifier.verify_all_async(_get_block_signature_item_list(block))
         try:
-            block.validate(self.account_dict, self.block_validator_dict)
-        except (BlockValidationError, BlockNotHeadError):
-            self._get_longest_blockchain()
+            state_view = block.validate(self.account_dict, self.block_validator_dict, verify_signatures=False)
+        except (BlockValidationError, BlockNotHeadError) as e:
+            # this node may be behind or on another fork - sync the chain in the background
+            print(f"[WARN] Rejected block from {origin}: {e}")
+            self.request_sync()
+            return
 
-        # 3. Add block to blockchain if it is the most recent
+        # 5. Add block to blockchain
+        # 6. Apply account stake and balance changes. Give tokens to the validator.
+        # the head and the account state change together - no await in between
         async with self.lock:
             if self.blockchain is not None:
-                if block.previous_block is not None and block.previous_block.block_hash == self.blockchain.head.block_hash:
-                    self.blockchain.add_new_block(block)
-                elif block.previous_block_hash_hex is not None and block.previous_block_hash_hex == binascii.hexlify(self.blockchain.head.block_hash):
-                    self.blockchain.add_new_block(block)
+                if not self._is_on_head(block):
+                    # head changed while waiting for the lock
+                    return
+                self.blockchain.add_new_block(block)
             else:
-                self.blockchain = Blockchain(block)
+                self.set_blockchain(Blockchain(block))
+            block.commit_state_view(state_view)
+            self.stake_index.update(self.account_dict, block.undo_journal)
+            self._take_snapshot_if_due()
         print(f"[INFO {datetime.now().isoformat()}] Added block to blockchain - updated length: {len(self.blockchain)}")
+        await self._write_to_block_store()
+        await self._save_snapshot()
 
-        # 4. Apply account stake and balance changes. Give tokens to the validator.
-        block.update_account_dict(self.account_dict)
-
-        # 5. Remove transactions from transaction pool
+        # 7. Remove transactions from transaction pool
         async with self.lock:
-            for transaction in block.transaction_list:
-                transaction_hash_hex = binascii.hexlify(transaction.transaction_hash)
-                self.transaction_pool.pop(transaction_hash_hex, None)
-                self.transaction_broadcasted.pop(transaction_hash_hex, None)
+            self._remove_from_transaction_pool(block.transaction_list)
         print(f"[INFO {datetime.now().isoformat()}] Removed {len(block.transaction_list)} transactions from transaction pool")
 
-        # 6. TODO: Remove the block and validator from block_validator_dict and validator_rand_dict
+        # 8. TODO: Remove the block and validator from block_validator_dict and validator_rand_dict
 
-        # 7. Broadcast
+        # 9. Broadcast
         await self.broadcast_block(block, origin)
 
+        # 10. Accept blocks that were waiting for this block
+        await self._accept_orphan_children(block)
+
+    async def _accept_orphan_children(self, block: Block):
+        # blocks on top of the head stay in the pool until the validator of the head is chosen - they would be rejected
+        # without it (see _run_consensus_protocol)
+        block_hash_hex = binascii.hexlify(block.block_hash)
+        if block is self.blockchain.head and self.block_validator_dict is not None \
+                and block_hash_hex not in self.block_validator_dict:
+            return
+        for orphan_block, orphan_origin in self.orphan_block_pool.pop_children(block_hash_hex):
+            await self.accept_block(orphan_block, orphan_origin)
+
+    def _is_on_head(self, block: Block) -> bool:
+        if self.blockchain is None or self.blockchain.head is None:
+            return True
+        if block.previous_block is not None:
+            return block.previous_block is self.blockchain.head
+        return block.previous_block_hash_hex == binascii.hexlify(self.blockchain.head.block_hash)
+
+    async def _accept_side_block(self, block: Block, origin: str) -> bool:
+        # keep block of a competing branch and switch to the branch when it becomes the longest (fork choice)
+        # the current chain wins ties - return True if the block is kept
+        # only blocks whose block and transaction signatures are valid are kept
+        await signature_verifier.verify_all_async(_get_block_signature_item_list(block))
+
+        async with self.lock:
+            previous_block_hash = binascii.unhexlify(block.previous_block_hash_hex)
+            previous_block = self.blockchain.get_block_by_hash(previous_block_hash) or self.blockchain.get_side_block(previous_block_hash)
+            if previous_block is None or previous_block.height < len(self.blockchain) - constants.MAX_REORG_DEPTH:
+                # fork is too deep to switch to block by block - sync the chain in the background
+                print(f"[WARN] Rejected block forking too deep below the head - {binascii.hexlify(block.block_hash)}")
+                self.request_sync()
+                return False
+
+            if not self.blockchain.add_side_block(block):
+                print(f"[WARN] Dropped block of a competing branch - side blocks are full at higher heights")
+                return False
+            if block.height <= self.blockchain.head.height:
+                print(f"[INFO {datetime.now().isoformat()}] Kept block of a competing branch at height {block.height}")
+                return True
+            applied_block_list = self._switch_branch(block)
+            if applied_block_list is None:
+                return False
+            self._take_snapshot_if_due()
+        print(f"[INFO {datetime.now().isoformat()}] Switched to the longest branch - updated length: {len(self.blockchain)}")
+        await self._write_to_block_store()
+        await self._save_snapshot()
+
+        # peers that followed the other branch may not have the blocks of this branch
+        for applied_block in applied_block_list:
+            await self.broadcast_block(applied_block, origin)
+        return True
+
+    def _switch_branch(self, block: Block) -> Optional[List[Block]]:
+        # make the input side block the head - only the blocks above the fork point are unapplied and applied
+        # so the cost is proportional to the depth of the fork rather than the length of the chain
+        # account state is changed in a view until all blocks of the branch are valid
+        # if a block of the branch is invalid, the branch is dropped and the view is thrown away
+        # return the applied blocks (None if the chain is not changed)
+        fork = self.blockchain.get_fork(block)
+        if fork is None:
+            self.blockchain.remove_side_block(block)
+            return None
+        unapply_block_list, apply_block_list = fork
+        if any(unapply_block.undo_journal is None for unapply_block in unapply_block_list):
+            # blocks applied before the account snapshot that the node started from cannot be unapplied
+            self.request_sync()
+            return None
+
+        # 1. Unapply blocks of the current chain above the fork point - head first
+        state_view = AccountStateView(self.account_dict)
+        for unapply_block in unapply_block_list:
+            unapply_block.revert_account_dict(state_view)
+
+        # 2. Apply blocks of the branch - fork point first
+        for apply_block in apply_block_list:
+            try:
+                # signatures of side blocks are verified when they are kept
+                apply_block.commit_state_view(apply_block.validate(state_view, verify_signatures=False))
+            except (BlockValidationError, TransactionValidationError, InvalidSignature) as e:
+                print(f"[WARN] Rejected branch with invalid block {binascii.hexlify(apply_block.block_hash)}: {e}")
+                self.blockchain.remove_side_block(apply_block)
+                return None
+
+        # 3. Switch the chain and commit the account state
+        for _ in unapply_block_list:
+            self.blockchain.remove_head()
+        for apply_block in apply_block_list:
+            self.blockchain.add_new_block(apply_block)
+        self.stake_index.update(self.account_dict, state_view.commit())
+
+        self._update_transaction_pool(unapply_block_list, apply_block_list)
+        return apply_block_list
+
+    def _update_transaction_pool(self, unapply_block_list: List[Block], apply_block_list: List[Block]):
+        # transactions of the unapplied blocks that are not in the applied blocks go back to the transaction pool
+        for unapply_block in unapply_block_list:
+            for transaction in unapply_block.transaction_list:
+                if transaction.transaction_hash not in self.blockchain.transaction_index:
+                    source_account = self.account_dict.get(transaction.transaction_source.source_public_key_hex, None)
+                    self.transaction_pool.add(transaction, source_account.stake if source_account is not None else 0)
+        for apply_block in apply_block_list:
+            self._remove_from_transaction_pool(apply_block.transaction_list)
+
+    def _remove_from_transaction_pool(self, transaction_list: List[Transaction]):
+        for transaction in transaction_list:
+            self.transaction_pool.pop(transaction.transaction_hash_hex, None)
+            self.transaction_broadcasted.pop(transaction.transaction_hash_hex, None)
+
+    def _is_orphan_block(self, block: Block) -> bool:
+        # previous block of the block is neither in the blockchain nor linked
+        if block.previous_block is not None or block.previous_block_hash_hex is None:
+            return False
+        return not self.blockchain.has_block(binascii.unhexlify(block.previous_block_hash_hex))
+
     async def broadcast_block(self, block: Block, origin: str):
         block_hash_hex = binascii.hexlify(block.block_hash)
 
@@ -274,27 +843,88 @@ class Node:
                 self.block_broadcasted[block_hash_hex] = set([])
 
         # send block data to other nodes
-        disconnected_address_set = set([])
-        address_set = self.known_node_address_set.copy()  # self.known_node_address may change during for loop
-        for address in address_set:
-            if address == origin or address in self.block_broadcasted[block_hash_hex]:
-                continue
-            url = address + constants.BLOCK_VALIDATION_PATH
-            headers = {"Content-type": "application/json"}
-            data = block.to_dict()
-            data["origin"] = self.address
-            try:
-                async with self.lock:
-                    self.block_broadcasted[block_hash_hex].add(address)
-                async with httpx.AsyncClient() as client:
-                    await client.post(url, headers=headers, json=data)
-                # print(f'[INFO {datetime.now().isoformat()}] Broadcasted block {block_hash_hex} to {address}')
-            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout):
-                print(f"[WARN] Detected disconnection of {address}")
-                disconnected_address_set.add(address)
-
         async with self.lock:
-            self.known_node_address_set.difference_update(disconnected_address_set)
+            address_list = [
+                address for address in self.known_node_address_set
+                if address != origin and address not in self.block_broadcasted[block_hash_hex]
+            ]
+            self.block_broadcasted[block_hash_hex].update(address_list)
+
+        # 1. Announce block hash - peers respond with the hash if they do not have the block
+        block_hash_hex_str = block_hash_hex.decode('utf-8')
+        content = json.dumps({"block_hash_hex_list": [block_hash_hex_str]}).encode('utf-8')
+        response_dict = await self._post_to_peers(constants.INVENTORY_PATH, address_list, content)
+
+        # 2. Send block to the peers missing the block - encode once and send the same bytes to every peer
+        address_list = [
+            address for address, response in response_dict.items()
+            if block_hash_hex_str in _get_missing_hash_hex_set(response, "block_hash_hex_list", [block_hash_hex_str])
+        ]
+        if not address_list:
+            return
+        content = json.dumps(block.to_compact_dict()).encode('utf-8')
+        response_dict = await self._post_to_peers(constants.COMPACT_BLOCK_VALIDATION_PATH, address_list, content)
+
+        # 3. Send full block to the peers that could not reconstruct the block from the compact block
+        address_list = [address for address, response in response_dict.items() if response.status_code != 200]
+        if address_list:
+            content = json.dumps(block.to_dict()).encode('utf-8')
+            await self._post_to_peers(constants.BLOCK_VALIDATION_PATH, address_list, content)
+
+    async def create_block_from_compact_dict(self, block_dict: dict, origin: str) -> Block:
+        # rebuild block from the transactions in the transaction pool
+        # transactions that are not in the transaction pool are requested from the origin
+        transaction_hash_hex_list = [hash_hex.encode('utf-8') for hash_hex in block_dict["transaction_hash_hex_list"]]
+        async with self.lock:
+            transaction_dict = {
+                transaction_hash_hex: self.transaction_pool[transaction_hash_hex]
+                for transaction_hash_hex in transaction_hash_hex_list
+                if transaction_hash_hex in self.transaction_pool
+            }
+
+        missing_transaction_hash_hex_list = [
+            transaction_hash_hex for transaction_hash_hex in transaction_hash_hex_list
+            if transaction_hash_hex not in transaction_dict
+        ]
+        if missing_transaction_hash_hex_list:
+            print(f"[INFO {datetime.now().isoformat()}] Requesting {len(missing_transaction_hash_hex_list)} missing transactions of compact block from {origin}")
+            transaction_dict.update(await self._request_transactions(origin, missing_transaction_hash_hex_list))
+
+        block_hash = binascii.unhexlify(block_dict["block_hash_hex"].encode('utf-8'))
+        if any(transaction_hash_hex not in transaction_dict for transaction_hash_hex in transaction_hash_hex_list):
+            raise BlockValidationError(None, message="Missing transactions of compact block", block_hash=block_hash)
+
+        block = create_block_from_compact_dict(
+            block_dict, [transaction_dict[transaction_hash_hex] for transaction_hash_hex in transaction_hash_hex_list]
+        )
+        if block.block_hash != block_hash:
+            raise BlockValidationError(None, message="Reconstructed block hash does not match", block_hash=block_hash)
+        return block
+
+    async def _request_transactions(self, address: str, transaction_hash_hex_list: List[bytes]) -> Dict[bytes, Transaction]:
+        # request transactions by hashes from a peer - return only the requested transactions that are received
+        content = json.dumps({
+            "transaction_hash_hex_list": [hash_hex.decode('utf-8') for hash_hex in transaction_hash_hex_list]
+        }).encode('utf-8')
+        try:
+            response = await self._get_http_client().post(
+                address + constants.GETDATA_PATH,
+                headers={"Content-type": "application/json", constants.ORIGIN_HEADER: self.address},
+                content=content
+            )
+        except httpx.TransportError:
+            print(f"[WARN] Detected disconnection of {address}")
+            return dict()
+        if response.status_code != 200:
+            return dict()
+
+        requested_hash_hex_set = set(transaction_hash_hex_list)
+        transaction_dict = dict()
+        for transaction_dict_item in response.json().get("transaction_dict_list", []):
+            transaction = create_transaction_from_dict(transaction_dict_item)
+            if transaction.transaction_hash_hex in requested_hash_hex_set:
+                transaction_dict[transaction.transaction_hash_hex] = transaction
+        return transaction_dict
 
     async def accept_validator_rand(self, validator_rand: ValidatorRand):
         # print(f"[INFO {datetime.now().isoformat()}] Received validator rand {validator_rand.rand} from validator {validator_rand.validator_public_key_hex} for head {validator_rand.previous_block_hash_hex}")
@@ -319,22 +949,106 @@ class Node:
         # TODO: assume receiving same number multiple times like block and transaction
 
         # 1. Broadcast the validator rand to known nodes
-        disconnected_address_set = set([])
-        address_set = self.known_node_address_set.copy()
-        for address in address_set:
-            url = address + constants.VALIDATOR_RAND_PATH
-            headers = {"Content-type": "application/json"}
-            data = validator_rand.to_dict()
-            try:
-                async with httpx.AsyncClient() as client:
-                    await client.post(url, headers=headers, json=data)
-                # print(f'[INFO {datetime.now().isoformat()}] Broadcasted validator rand {data["rand"]} to {address} - block {validator_rand.previous_block_hash_hex}')
-            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout):
-                print(f"[WARN] Detected disconnection of {address}")
-                disconnected_address_set.add(address)
-
+        address_list = list(self.known_node_address_set)
+        content = json.dumps(validator_rand.to_dict()).encode('utf-8')
+        await self._post_to_peers(constants.VALIDATOR_RAND_PATH, address_list, content)
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        # one pooled client per node so that connections to peers are kept alive and reused
+        # created on first use so that it is bound to the running event loop
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=constants.PEER_MAX_CONNECTIONS,
+                    max_keepalive_connections=constants.PEER_MAX_CONNECTIONS
+                ),
+                timeout=httpx.Timeout(constants.PEER_REQUEST_TIMEOUT)
+            )
+        return self.http_client
+
+    async def close(self):
+        if self.sync_task is not None and not self.sync_task.done():
+            self.sync_task.cancel()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def _post_to_peers(self, path: str, address_list: List[str], content: bytes) -> Dict[str, httpx.Response]:
+        # send json encoded content to all peers concurrently - at most BROADCAST_CONCURRENCY requests in flight
+        # origin is sent as a header so that the same content is shared by all peers
+        # return responses of the connected peers { address: response }
+        client = self._get_http_client()
+        semaphore = asyncio.Semaphore(constants.BROADCAST_CONCURRENCY)
+        headers = {"Content-type": "application/json", constants.ORIGIN_HEADER: self.address}
+
+        async def post(address: str) -> Optional[httpx.Response]:
+            # return None if the peer is disconnected
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(address + path, headers=headers, content=content)
+                except httpx.TransportError:
+                    print(f"[WARN] Detected disconnection of {address}")
+                    return None
+                self.peer_latency_dict[address] = time.perf_counter() - start
+                return response
+
+        response_list = await asyncio.gather(*map(post, address_list))
+        response_dict = {
+            address: response for address, response in zip(address_list, response_list) if response is not None
+        }
+
+        disconnected_address_set = set(address_list).difference(response_dict.keys())
         async with self.lock:
             self.known_node_address_set.difference_update(disconnected_address_set)
+            for address in disconnected_address_set:
+                self.peer_latency_dict.pop(address, None)
+
+        return response_dict
+
+    def get_missing_inventory(
+        self,
+        transaction_hash_hex_list: List[bytes],
+        block_hash_hex_list: List[bytes]
+    ) -> Tuple[List[bytes], List[bytes]]:
+        # return transaction and block hashes that this node does not have among the announced ones
+        missing_transaction_hash_hex_list = []
+        for transaction_hash_hex in transaction_hash_hex_list:
+            if transaction_hash_hex in self.transaction_pool:
+                continue
+            if self.blockchain is not None and binascii.unhexlify(transaction_hash_hex) in self.blockchain.transaction_index:
+                continue
+            missing_transaction_hash_hex_list.append(transaction_hash_hex)
+
+        missing_block_hash_hex_list = []
+        for block_hash_hex in block_hash_hex_list:
+            if self.blockchain is not None and self.blockchain.has_block(binascii.unhexlify(block_hash_hex)):
+                continue
+            missing_block_hash_hex_list.append(block_hash_hex)
+
+        return missing_transaction_hash_hex_list, missing_block_hash_hex_list
+
+    def get_inventory_data(
+        self,
+        transaction_hash_hex_list: List[bytes],
+        block_hash_hex_list: List[bytes]
+    ) -> Tuple[List[dict], List[dict]]:
+        # return dicts of the requested transactions and blocks that this node has
+        transaction_dict_list = []
+        for transaction_hash_hex in transaction_hash_hex_list:
+            transaction = self.transaction_pool.get(transaction_hash_hex, None)
+            if transaction is None and self.blockchain is not None:
+                transaction = self.blockchain.get_transaction(binascii.unhexlify(transaction_hash_hex))
+            if transaction is not None:
+                transaction_dict_list.append(transaction.to_dict())
+
+        block_dict_list = []
+        for block_hash_hex in block_hash_hex_list:
+            block = self.blockchain.get_block_by_hash(binascii.unhexlify(block_hash_hex)) if self.blockchain is not None else None
+            if block is not None:
+                block_dict_list.append(block.to_dict())
+
+        return transaction_dict_list, block_dict_list
 
     ##### PoS Consesus functions #####
 
@@ -366,30 +1080,17 @@ class Node:
             return None
 
         # assume that all stake amounts and random numbers are integers
-        account_stake_dict = get_stakes_from_accounts(self.account_dict)
-        stake_sum = sum(account_stake_dict.values())
+        stake_sum = self.stake_index.get_stake_sum()
+        if stake_sum == 0:
+            return None
         rand_num = sum(self.block_validator_rand_dict[head_block_hash_hex].values()) % stake_sum
-
-        validator_arr, stake_arr = list(zip(*sorted(account_stake_dict.items(), key=lambda x: x[1])))
-        for i, stake in enumerate(itertools.accumulate(stake_arr)):
-            if rand_num < stake:
-                validator = validator_arr[i]
-                break
-        return validator
+        return self.stake_index.choose(rand_num)
 
     def create_block(self) -> Block:
-        # 1. order transactions in transaction pool by the amount of stake
+        # 1. take transactions with the highest priority (stake of the source account, fee) from the transaction pool
         # TODO: eventual inclusion?
-        account_stake_dict = get_stakes_from_accounts(self.account_dict)
-        transaction_candidates = []  # tuple of transaction and account stake
         # TODO: come up with an updated method to calculate the parent stake
-        for transaction_hash_hex in self.transaction_pool:
-            transaction = self.transaction_pool[transaction_hash_hex]
-            transaction_candidates.append(
-                (transaction, account_stake_dict.get(transaction.transaction_source.source_public_key_hex, 0))
-            )
-        transaction_candidates = sorted(transaction_candidates, key=lambda x: x[1], reverse=True)[:constants.MAX_TX_PER_BLOCK]
-        tx_list = list(map(lambda x: x[0], transaction_candidates))
+        tx_list = self.transaction_pool.get_top(constants.MAX_TX_PER_BLOCK)
         block = Block(
             None,
             binascii.hexlify(self.blockchain.head.block_hash),
@@ -403,12 +1104,11 @@ class Node:
         return block
 
     def is_validator(self):
-        account_stake_dict = get_stakes_from_accounts(self.account_dict)
         head_block_hash_hex = binascii.hexlify(self.blockchain.head.block_hash)
         if head_block_hash_hex not in self.block_validator_rand_dict:
             return False
 
-        validators = set(filter(lambda x: account_stake_dict[x] > constants.VALIATOR_MINIMUM_STAKE, account_stake_dict.keys()))
+        validators = self.stake_index.get_validator_set()
         validators_with_rand = set(self.block_validator_rand_dict[head_block_hash_hex].keys())
 
         if binascii.hexlify(self.blockchain.head.block_hash) not in self.block_validator_dict:
@@ -420,9 +1120,8 @@ class Node:
 
     # updates the node's dictionary to track block validator
     def _run_consensus_protocol(self):
-        account_stake_dict = get_stakes_from_accounts(self.account_dict)
         head_block_hash_hex = binascii.hexlify(self.blockchain.head.block_hash)
-        validators = set(filter(lambda x: account_stake_dict[x] > constants.VALIATOR_MINIMUM_STAKE, account_stake_dict.keys()))
+        validators = self.stake_index.get_validator_set()
         validators_with_rand = set(self.block_validator_rand_dict[head_block_hash_hex].keys())
 
         # Check if the node has received rand from all validators
@@ -431,5 +1130,47 @@ class Node:
         # TODO: add slashing to transaction pool?
         if validators == validators_with_rand:
             validator = self._choose_validator()
-            self.block_validator_dict[binascii.hexlify(self.blockchain.head.block_hash)] = validator
+            self.block_validator_dict[head_block_hash_hex] = validator
             print(f"[INFO {datetime.now().isoformat()}] Validator chosen through PoS - {validator}")
+
+            # blocks that arrived before the validator was chosen can be validated now
+            if self.orphan_block_pool.has_children(head_block_hash_hex):
+                self.orphan_task = asyncio.ensure_future(self._accept_orphan_children(self.blockchain.head))
+
+
+def _get_block_signature_item_list(block: Block) -> list:
+    # signatures of the block and its transactions to verify in one batch
+    return [block.get_signature_item()] + [tx.get_signature_item() for tx in block.transaction_list]
+
+
+def _get_missing_hash_hex_set(response: httpx.Response, key: str, announced_hash_hex_list: List[str]) -> set:
+    # hashes that the peer asked for in its response to the inventory announcement
+    # peer not supporting inventory announcement gets everything
+    if response.status_code != 200:
+        return set(announced_hash_hex_list)
+    return set(response.json().get(key, []))
+
+
+def _replay_block_list(block_list: Iterable[Block], account_dict: Dict[bytes, Account]) -> None:
+    # apply blocks of the current chain to account_dict - already validated when they were accepted
+    # runs in a worker thread - unlike update_account_dict, undo journals of the blocks are left as they are
+    def get_account(public_key_hex: bytes) -> Account:
+        return get_or_create_account(account_dict, public_key_hex)
+
+    for block in block_list:
+        block_applier.apply(block.transaction_list, get_account)
+        get_account(block.validator_public_key_hex).balance += constants.VALIDATION_REWARD
+
+
+def _create_block_list_from_headers(block_dict_list: Optional[Any], header_dict_list: List[dict]) -> Optional[List[Block]]:
+    # decode blocks (not linked yet) and check them against the headers
+    # return None if the peer sent blocks of a different chain
+    if not isinstance(block_dict_list, list) or len(block_dict_list) != len(header_dict_list):
+        return None
+    block_list = []
+    for block_dict, header_dict in zip(block_dict_list, header_dict_list):
+        block = create_block_from_dict(block_dict)
+        if binascii.hexlify(block.block_hash).decode('utf-8') != header_dict["block_hash_hex"]:
+            return None
+        block_list.append(block)
+    return block_list
@@ -0,0 +1,68 @@
+import bisect
+import itertools
+from typing import Dict, Iterable, List, Optional, Set
+
+from account.account import Account
+from utils import constants
+
+
+# Validators (accounts with stake above VALIATOR_MINIMUM_STAKE) and their stakes for validator selection
+#
+# The index is updated with the accounts that a block touched (keys of its undo journal) instead of scanning all
+# accounts on every consensus tick. Validators are ordered by (stake, public key) so that every node builds the same
+# order, and cumulative stakes of that order are kept for weighted selection with bisect in O(log n).
+# The order and the cumulative stakes are rebuilt lazily - at most once per change of the stakes.
+
+class StakeIndex:
+    def __init__(self, minimum_stake: float = constants.VALIATOR_MINIMUM_STAKE):
+        self.minimum_stake = minimum_stake
+        self.stake_dict: Dict[bytes, float] = dict()  # { public_key_hex: stake } of validators
+
+        # built from stake_dict when needed - None if stake_dict changed since
+        self.validator_list: Optional[List[bytes]] = None
+        self.cumulative_stake_list: List[float] = []
+
+    def __len__(self):
+        return len(self.stake_dict)
+
+    def rebuild(self, account_dict: Dict[bytes, Account]) -> None:
+        # index all accounts - used when the whole account state is replaced
+        self.stake_dict = {
+            public_key_hex: account.stake for public_key_hex, account in account_dict.items()
+            if account.stake > self.minimum_stake
+        }
+        self.validator_list = None
+
+    def update(self, account_dict: Dict[bytes, Account], public_key_hex_iter: Iterable[bytes]) -> None:
+        # re-index the input accounts - accounts whose stake did not change cost one lookup
+        for public_key_hex in public_key_hex_iter:
+            account = account_dict.get(public_key_hex, None)
+            stake = account.stake if account is not None and account.stake > self.minimum_stake else None
+            if self.stake_dict.get(public_key_hex, None) == stake:
+                continue
+            if stake is None:
+                del self.stake_dict[public_key_hex]
+            else:
+                self.stake_dict[public_key_hex] = stake
+            self.validator_list = None
+
+    def get_validator_set(self) -> Set[bytes]:
+        return set(self.stake_dict)
+
+    def get_stake_sum(self) -> float:
+        self._build()
+        return self.cumulative_stake_list[-1] if self.cumulative_stake_list else 0
+
+    def choose(self, rand_num: float) -> Optional[bytes]:
+        # return the validator whose range of cumulative stake contains rand_num (0 <= rand_num < stake sum)
+        self._build()
+        idx = bisect.bisect_right(self.cumulative_stake_list, rand_num)
+        return self.validator_list[idx] if idx < len(self.validator_list) else None
+
+    def _build(self) -> None:
+        if self.validator_list is not None:
+            return
+        self.validator_list = sorted(self.stake_dict, key=lambda public_key_hex: (self.stake_dict[public_key_hex], public_key_hex))
+        self.cumulative_stake_list = list(itertools.accumulate(
+            self.stake_dict[public_key_hex] for public_key_hex in self.validator_list
+        ))
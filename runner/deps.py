@@ -5,7 +5,9 @@ import os
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import serialization
 
-from block.blockchain import Blockchain
+from account.account_snapshot import AccountSnapshotStore
+from block.block_store import BlockStore
+from block.blockchain import Blockchain, load_blockchain_from_store
 from genesis.initial_block import create_initial_block, load_initial_accounts
 from node.node import Node
 from utils import constants
@@ -18,9 +20,17 @@ PRIVATE_KEY = serialization.load_der_private_key(private_key_serialized, None)
 PUBLIC_KEY = PRIVATE_KEY.public_key()
 PUBLIC_KEY_HEX = get_public_key_hex(PUBLIC_KEY)
 
-node = Node(os.environ["ADDRESS"], private_key=PRIVATE_KEY)
+block_store_path = os.environ.get("BLOCK_STORE_PATH", constants.BLOCK_STORE_PATH)
+block_store = BlockStore(block_store_path)
+snapshot_store = AccountSnapshotStore(block_store_path)
+node = Node(os.environ["ADDRESS"], private_key=PRIVATE_KEY, block_store=block_store, snapshot_store=snapshot_store)
 print(f"[INFO] Initialized node with public key: {PUBLIC_KEY_HEX}")
 
+# load blockchain saved by the previous run of the node
+if len(block_store) > 0:
+    node.load_blockchain(load_blockchain_from_store(block_store))
+    print(f"[INFO] Loaded {len(block_store)} blocks from block store")
+
 node.join_network()
 
 # initialize blockchain with given data - assume INIT_BLOCKCHAIN_FILE_NAME contains ICO data
@@ -29,8 +39,9 @@ if "INIT_BLOCKCHAIN_FILE_NAME" in os.environ:
         blockchain_dict_list = json.load(fp)
     blockchain = Blockchain()
     blockchain.from_dict_list(blockchain_dict_list)
-    node.blockchain = blockchain
-    node.account_dict = blockchain.initialize_accounts()
+    node.set_blockchain(blockchain)
+    blockchain.write_to_block_store()
+    node.set_account_dict(blockchain.initialize_accounts())
 
 # if node does not have blockchain initialize genesis block that has ICO details
 if node.blockchain is None or node.blockchain.head is None:
@@ -10,6 +10,9 @@ from fastapi_utils.tasks import repeat_every
 from runner.deps import get_node
 from runner.routes import p2p as p2p_route, data as data_route
 from runner.routes.service import transaction as transaction_route, account as account_route
+from runner.routes.service.pagination import NEXT_CURSOR_HEADER
+from block.block_applier import block_applier
+from utils.signature_verifier import signature_verifier
 
 FORMAT = "%(levelname)s:     %(message)s"
 logging.basicConfig(format=FORMAT, level=logging.INFO)
@@ -30,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # browser can read the cursor of the next page
 )
 
 
@@ -54,6 +58,13 @@ async def choose_validator():
             await node.broadcast_block(block, os.environ["ADDRESS"])
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await get_node().close()
+    signature_verifier.shutdown()
+    block_applier.shutdown()
+
+
 api_router = APIRouter()
 api_router.include_router(p2p_route.router)
 api_router.include_router(data_route.router)
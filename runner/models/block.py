@@ -15,4 +15,17 @@ class BlockValidationRequest(BaseModel):
     block_hash_hex: str                     # bytes decoded to str
     transaction_dict_list: List[dict]
 
-    origin: str                             # address of origin
+    origin: Optional[str]                   # address of origin - sent in ORIGIN_HEADER by default
+
+
+# Request for compact block validation - block_dict model without transaction_dict_list
+# transactions are taken from the transaction pool of the receiving node or requested from the origin
+class CompactBlockValidationRequest(BaseModel):
+    previous_block_hash_hex: str            # bytes decoded to str
+    transaction_hash_hex_list: List[str]    # list of bytes decoded to str
+    validator_public_key_hex: str           # bytes decoded to str
+    timestamp: float                        # unix timestamp float
+    signature_hex: Optional[str]            # bytes decoded to str
+    block_hash_hex: str                     # bytes decoded to str
+
+    origin: Optional[str]                   # address of origin - sent in ORIGIN_HEADER by default
@@ -0,0 +1,17 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+# Announcement of transactions and blocks that a node has
+# the response to the announcement has the same format and holds the hashes that the receiving node does not have
+class Inventory(BaseModel):
+    transaction_hash_hex_list: List[str] = []  # list of bytes decoded to str
+    block_hash_hex_list: List[str] = []        # list of bytes decoded to str
+
+
+# Response to the request for the bodies of the announced transactions and blocks
+# holds only the requested items that the responding node has
+class InventoryData(BaseModel):
+    transaction_dict_list: List[dict] = []
+    block_dict_list: List[dict] = []
@@ -21,7 +21,13 @@ class Transaction(BaseModel):
 
 
 class TransactionValidationRequest(Transaction):
-    origin: str                                     # address of origin
+    origin: Optional[str]                           # address of origin - sent in ORIGIN_HEADER by default
+
+
+class TransactionValidationResult(BaseModel):
+    transaction_hash_hex: str                       # bytes decoded to str
+    accepted: bool                                  # False if the transaction is invalid
+    error: Optional[str]                            # validation error message
 
 
 class TransactionCreateRequest(BaseModel):
@@ -1,8 +1,10 @@
 
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from node.node import Node
 from runner.deps import get_node
+from utils import constants
+from utils.crypto import public_key_cache
 
 
 router = APIRouter(prefix="/data", tags=["data"])
@@ -27,6 +29,32 @@ async def get_blockchain_length(node: Node = Depends(get_node)):
     return len(node.blockchain)
 
 
+@router.get("/blockchain/headers")
+async def get_blockchain_headers(
+    start_height: int = Query(0, ge=0),
+    limit: int = Query(constants.SYNC_HEADERS_LIMIT, ge=1, le=constants.SYNC_HEADERS_LIMIT),
+    node: Node = Depends(get_node)
+):
+    # block headers from start_height in ascending order - other nodes use them to find the common ancestor
+    if node.blockchain is None:
+        return []
+
+    return node.blockchain.get_header_dict_list(start_height, limit)
+
+
+@router.get("/blockchain/blocks")
+async def get_blockchain_blocks(
+    start_height: int = Query(0, ge=0),
+    limit: int = Query(constants.SYNC_BLOCKS_LIMIT, ge=1, le=constants.SYNC_BLOCKS_LIMIT),
+    node: Node = Depends(get_node)
+):
+    # blocks from start_height in ascending order - other nodes download the missing part of the chain
+    if node.blockchain is None:
+        return []
+
+    return node.blockchain.get_block_dict_list(start_height, limit)
+
+
 # get all accounts stored in the node
 @router.get("/accounts")
 async def get_accounts(node: Node = Depends(get_node)):
@@ -42,3 +70,15 @@ async def get_transaction_pool(node: Node = Depends(get_node)):
         tx_hash_hex.decode('utf-8'): tx.to_dict()
         for tx_hash_hex, tx in node.transaction_pool.items()
     }
+
+
+@router.get("/peer-latency")
+async def get_peer_latency(node: Node = Depends(get_node)):
+    # seconds taken by the last delivery to each peer
+    return node.peer_latency_dict
+
+
+@router.get("/public-key-cache")
+async def get_public_key_cache():
+    # hit/miss counters of parsed public keys used for signature verification
+    return public_key_cache.to_dict()
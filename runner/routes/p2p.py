@@ -1,15 +1,16 @@
 import binascii
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 
 from block.block import create_block_from_dict
 from validation.block.exception import BlockNotHeadError
 from block.validator_rand import ValidatorRand
-from runner.models.block import BlockValidationRequest
+from runner.models.block import BlockValidationRequest, CompactBlockValidationRequest
+from runner.models.inventory import Inventory, InventoryData
 from runner.models.node import NodeAddress
 from runner.models.validator_rand import ValidatorRandRequest
-from runner.models.transaction import TransactionValidationRequest
+from runner.models.transaction import Transaction, TransactionValidationRequest, TransactionValidationResult
 from node.node import Node
 from runner.deps import get_node
 from transaction.transaction_utils import create_transaction_from_dict
@@ -24,46 +25,141 @@ router = APIRouter(tags=["p2p"])
 @router.post(constants.BLOCK_VALIDATION_PATH, response_model=None)
 async def validate_block(
     blockRequest: BlockValidationRequest,
+    origin: Optional[str] = Header(None, alias=constants.ORIGIN_HEADER),
     node: Node = Depends(get_node)
 ):
-    # TODO: what if the block does not reach this node in order? - make a block pool to store candidate blocks?
-
     # 1. create block instance
     previous_block = None
 
     # accepted block guaranteed to have previous_block_hash_hex (genesis block is not broacasted)
-    # check that block hash is either previous block hash or head hash
-    req_prev_block_hash = binascii.unhexlify(blockRequest.previous_block_hash_hex.encode('utf-8'))
-    req_block_hash = binascii.unhexlify(blockRequest.block_hash_hex.encode('utf-8'))
-    if node.blockchain.head.block_hash not in (req_prev_block_hash, req_block_hash):
-        raise BlockNotHeadError(
-            None, message="Requested block is not linked to the current head",
-            block_hash=blockRequest.block_hash_hex.encode('utf-8')
-        )
+    # block that arrives before its previous block is kept in the orphan block pool of the node
+    _check_not_stale(node, blockRequest.previous_block_hash_hex, blockRequest.block_hash_hex)
 
     block = create_block_from_dict(blockRequest.dict(), previous_block=previous_block)  # linked to previous_block
 
     # 2. add block to blockchain
-    await node.accept_block(block, blockRequest.dict()["origin"])
+    await node.accept_block(block, origin if origin is not None else blockRequest.origin)
+
+
+# other nodes hit this endpoint to broadcast compact block (without transaction bodies) to this node
+# error response makes the sender fall back to the full block
+@router.post(constants.COMPACT_BLOCK_VALIDATION_PATH, response_model=None)
+async def validate_compact_block(
+    blockRequest: CompactBlockValidationRequest,
+    origin: Optional[str] = Header(None, alias=constants.ORIGIN_HEADER),
+    node: Node = Depends(get_node)
+):
+    if origin is None:
+        origin = blockRequest.origin
+    _check_not_stale(node, blockRequest.previous_block_hash_hex, blockRequest.block_hash_hex)
+
+    # 1. rebuild block from transaction pool - missing transactions are requested from the origin
+    block = await node.create_block_from_compact_dict(blockRequest.dict(), origin)
+
+    # 2. add block to blockchain
+    await node.accept_block(block, origin)
+
+
+def _check_not_stale(node: Node, previous_block_hash_hex: str, block_hash_hex: str):
+    # check that block is not on top of a block too far below the head to switch branches block by block
+    # blocks on top of the head, of recent blocks, of side blocks or of unknown blocks (orphan blocks) pass
+    req_prev_block_hash = binascii.unhexlify(previous_block_hash_hex.encode('utf-8'))
+    previous_height = node.blockchain.get_height(req_prev_block_hash)
+    if previous_height is not None and previous_height < len(node.blockchain) - constants.MAX_REORG_DEPTH:
+        raise BlockNotHeadError(
+            None, message="Requested block forks too deep below the current head",
+            block_hash=block_hash_hex.encode('utf-8')
+        )
 
 
 @router.post(constants.TRANSACTION_VALIDATION_PATH, response_model=None)
 async def validate_transaction(
     transactionRequest: TransactionValidationRequest,
+    origin: Optional[str] = Header(None, alias=constants.ORIGIN_HEADER),
     node: Node = Depends(get_node)
 ):
     # other nodes hit this endpoint to broadcast transaction to this node
 
     # 1. create Transaction instance
-    transaction_dict = transactionRequest.dict()
-    origin = transaction_dict["origin"]
-    del transaction_dict["origin"]
+    if origin is None:
+        origin = transactionRequest.origin
     transaction = create_transaction_from_dict(transactionRequest.dict())
 
     # 2. add transaction to transaction pool
     await node.accept_transaction(transaction, origin)
 
 
+@router.post(constants.TRANSACTION_BATCH_VALIDATION_PATH, response_model=List[TransactionValidationResult])
+async def validate_transaction_batch(
+    transactionRequestList: List[Transaction],
+    origin: Optional[str] = Header(None, alias=constants.ORIGIN_HEADER),
+    node: Node = Depends(get_node)
+):
+    # other nodes hit this endpoint to broadcast a batch of transactions to this node
+
+    # 1. create Transaction instances
+    transaction_list = [
+        create_transaction_from_dict(transactionRequest.dict()) for transactionRequest in transactionRequestList
+    ]
+
+    # 2. add transactions to transaction pool - return result of each transaction
+    error_list = await node.accept_transaction_batch(transaction_list, origin)
+    return [
+        {
+            "transaction_hash_hex": transaction.transaction_hash_hex.decode('utf-8'),
+            "accepted": error is None,
+            "error": error
+        }
+        for transaction, error in zip(transaction_list, error_list)
+    ]
+
+
+@router.post(constants.INVENTORY_PATH, response_model=Inventory)
+async def accept_inventory(
+    inventory: Inventory,
+    node: Node = Depends(get_node)
+):
+    # other nodes announce hashes of transactions and blocks they have
+    # respond with the hashes that this node does not have so that the announcer sends only those
+
+    # skip malformed hashes
+    transaction_hash_hex_list = [
+        hash_hex.encode('utf-8') for hash_hex in inventory.transaction_hash_hex_list if _is_hex(hash_hex)
+    ]
+    block_hash_hex_list = [
+        hash_hex.encode('utf-8') for hash_hex in inventory.block_hash_hex_list if _is_hex(hash_hex)
+    ]
+
+    missing_transaction_hash_hex_list, missing_block_hash_hex_list = node.get_missing_inventory(
+        transaction_hash_hex_list, block_hash_hex_list
+    )
+    return {
+        "transaction_hash_hex_list": [hash_hex.decode('utf-8') for hash_hex in missing_transaction_hash_hex_list],
+        "block_hash_hex_list": [hash_hex.decode('utf-8') for hash_hex in missing_block_hash_hex_list],
+    }
+
+
+@router.post(constants.GETDATA_PATH, response_model=InventoryData)
+async def get_inventory_data(
+    inventory: Inventory,
+    node: Node = Depends(get_node)
+):
+    # other nodes request bodies of the transactions and blocks that they do not have
+    transaction_dict_list, block_dict_list = node.get_inventory_data(
+        [hash_hex.encode('utf-8') for hash_hex in inventory.transaction_hash_hex_list if _is_hex(hash_hex)],
+        [hash_hex.encode('utf-8') for hash_hex in inventory.block_hash_hex_list if _is_hex(hash_hex)]
+    )
+    return {"transaction_dict_list": transaction_dict_list, "block_dict_list": block_dict_list}
+
+
+def _is_hex(hash_hex: str) -> bool:
+    try:
+        binascii.unhexlify(hash_hex.encode('utf-8'))
+    except (binascii.Error, ValueError):
+        return False
+    return True
+
+
 @router.post(constants.NODE_REQUEST_PATH, response_model=None)
 async def accept_new_node(
     data: NodeAddress,
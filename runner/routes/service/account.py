@@ -3,12 +3,14 @@ from typing import List, Optional
 
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import ec
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 
 from runner.models.account import Account
 from node.node import Node
 from runner.deps import get_node
 from runner.models.transaction import Transaction
+from runner.routes.service.pagination import decode_cursor, set_next_cursor
+from utils import constants
 
 
 router = APIRouter(prefix="/service/accounts", tags=["service_accounts"])
@@ -33,23 +35,25 @@ async def get_account(
     return None
 
 
-# get transactions by the input public_key_hex - desc order
+# get transactions sent or received by the input public_key_hex - desc order
+# pass the X-Next-Cursor response header as cursor to get the next page
 @router.get("/{public_key_hex}/transactions", response_model=List[Transaction])
 async def get_account_transactions(
     public_key_hex: str,
+    response: Response,
+    limit: int = Query(constants.DEFAULT_PAGE_LIMIT, ge=1, le=constants.MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
     node: Node = Depends(get_node)
 ):
-    transactions = []
-    public_key_hex = public_key_hex.encode('utf-8')
+    before = decode_cursor(cursor)
+    if node.blockchain is None:
+        return []
 
-    curr_block = node.blockchain.head
-    while curr_block is not None:
-        for tx in curr_block.transaction_list:
-            if public_key_hex == tx.transaction_source.source_public_key_hex:
-                transactions.append(tx.to_dict())
-        curr_block = curr_block.previous_block
+    public_key_hex = public_key_hex.encode('utf-8')
+    location_transaction_list = node.blockchain.get_account_transactions(public_key_hex, limit, before=before)
+    set_next_cursor(response, [location for location, _ in location_transaction_list], limit)
 
-    return transactions
+    return [tx.to_dict() for _, tx in location_transaction_list]
 
 
 # create account - return private key encoded hex
@@ -0,0 +1,32 @@
+import base64
+import binascii
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Response
+
+
+# Cursor based pagination for service endpoints
+# cursor is an opaque string that encodes the location (block height, position) of the last returned transaction.
+# The cursor of the next page is returned in the NEXT_CURSOR_HEADER response header (absent on the last page).
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(location: Tuple[int, int]) -> str:
+    return base64.urlsafe_b64encode(f"{location[0]}:{location[1]}".encode('utf-8')).decode('utf-8')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    if cursor is None:
+        return None
+    try:
+        height, position = base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8').split(":")
+        return int(height), int(position)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, location_list: list, limit: int) -> None:
+    # there may be more items only if the page is full
+    if len(location_list) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(location_list[-1])
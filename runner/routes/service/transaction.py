@@ -2,12 +2,15 @@
 import binascii
 import os
 from typing import List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 
 from node.node import Node
 from runner.deps import get_node
 from runner.models.transaction import Transaction, TransactionCreateRequest
+from runner.routes.service.pagination import decode_cursor, set_next_cursor
+from transaction.transaction import Transaction as TransactionObject
 from transaction.transaction_utils import create_transaction_from_request, get_content_from_transaction
+from utils import constants
 
 router = APIRouter(prefix="/service/transactions", tags=["service_transactions"])
 
@@ -33,34 +36,32 @@ async def get_transaction(
     transaction_hash_hex: str,
     node: Node = Depends(get_node)
 ):
-    transaction_hash_hex = transaction_hash_hex.encode('utf-8')
-    curr_block = node.blockchain.head
-    while curr_block is not None:
-        for tx in curr_block.transaction_list:
-            if binascii.hexlify(tx.transaction_hash) == transaction_hash_hex:
-                return tx.to_dict()
-        curr_block = curr_block.previous_block
+    tx = _find_transaction(transaction_hash_hex, node)
+    if tx is None:
+        return None
 
-    return None
+    return tx.to_dict()
 
 
-# get all children transactions of the given transaction_hash_hex - desc order
+# get children transactions of the given transaction_hash_hex - desc order
+# pass the X-Next-Cursor response header as cursor to get the next page
 @router.get("/{transaction_hash_hex}/children", response_model=List[Transaction])
 async def get_transaction_children(
     transaction_hash_hex: str,
+    response: Response,
+    limit: int = Query(constants.DEFAULT_PAGE_LIMIT, ge=1, le=constants.MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
     node: Node = Depends(get_node)
 ):
-    transactions = []
-    transaction_hash_hex = transaction_hash_hex.encode('utf-8')
+    before = decode_cursor(cursor)
+    if node.blockchain is None:
+        return []
 
-    curr_block = node.blockchain.head
-    while curr_block is not None:
-        for tx in curr_block.transaction_list:
-            if tx.transaction_target.target_transaction_hash_hex == transaction_hash_hex:
-                transactions.append(tx.to_dict())
-        curr_block = curr_block.previous_block
+    transaction_hash_hex = transaction_hash_hex.encode('utf-8')
+    location_transaction_list = node.blockchain.get_transaction_children(transaction_hash_hex, limit, before=before)
+    set_next_cursor(response, [location for location, _ in location_transaction_list], limit)
 
-    return transactions
+    return [tx.to_dict() for _, tx in location_transaction_list]
 
 
 # get the content
@@ -70,14 +71,21 @@ async def get_transaction_content(
     encryption_key: Optional[str] = None,
     node: Node = Depends(get_node)
 ):
-    transaction_hash_hex = transaction_hash_hex.encode('utf-8')
+    tx = _find_transaction(transaction_hash_hex, node)
+    if tx is None:
+        return None
+
+    return get_content_from_transaction(tx, encryption_key)
+
+
+# find transaction in the blockchain through the transaction index
+def _find_transaction(transaction_hash_hex: str, node: Node) -> Optional[TransactionObject]:
+    if node.blockchain is None:
+        return None
 
-    curr_block = node.blockchain.head
-    while curr_block is not None:
-        for tx in curr_block.transaction_list:
-            if binascii.hexlify(tx.transaction_hash) == transaction_hash_hex:
-                content = get_content_from_transaction(tx, encryption_key)
-                return content
-        curr_block = curr_block.previous_block
+    try:
+        transaction_hash = binascii.unhexlify(transaction_hash_hex.encode('utf-8'))
+    except binascii.Error:
+        return None
 
-    return None
+    return node.blockchain.get_transaction(transaction_hash)
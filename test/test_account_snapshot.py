@@ -0,0 +1,115 @@
+import asyncio
+import binascii
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from account.account_full import FullAccount
+from account.account_snapshot import AccountSnapshotStore, get_account_value_list
+from block.block import Block
+from block.blockchain import Blockchain
+from node.node import Node
+from utils import constants
+from utils.crypto import get_public_key_hex
+
+
+class AccountSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.account1 = FullAccount()
+        self.public_key_hex1 = get_public_key_hex(self.account1.private_key.public_key())
+
+        self.block_list = []
+        previous_block = None
+        for idx in range(5):
+            block = Block(previous_block, None, [], self.public_key_hex1, float(idx))
+            block.sign_block(self.account1.private_key)
+            self.block_list.append(block)
+            previous_block = block
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_blockchain(self):
+        blockchain = Blockchain()
+        for block in self.block_list:
+            blockchain.add_new_block(block)
+        return blockchain
+
+    def test_save_and_load(self):
+        store = AccountSnapshotStore(self.temp_dir.name)
+        self.assertIsNone(store.load())
+
+        account_dict = self._create_blockchain().initialize_accounts()
+        store.save(4, self.block_list[4].block_hash, get_account_value_list(account_dict))
+
+        height, block_hash, loaded_account_dict = store.load()
+        self.assertEqual(height, 4)
+        self.assertEqual(block_hash, self.block_list[4].block_hash)
+        self.assertEqual(loaded_account_dict[self.public_key_hex1].balance, 5 * constants.VALIDATION_REWARD)
+
+    def test_replay_after_snapshot(self):
+        # account state after the block at height 2 - blocks 3 and 4 are replayed
+        store = AccountSnapshotStore(self.temp_dir.name)
+        snapshot_account_dict = self._create_blockchain().initialize_accounts()
+        snapshot_account_dict[self.public_key_hex1].balance = 3 * constants.VALIDATION_REWARD
+        store.save(2, self.block_list[2].block_hash, get_account_value_list(snapshot_account_dict))
+        for block in self.block_list:
+            block.undo_journal = None
+
+        node = Node("http://node0", snapshot_store=store)
+        node.load_blockchain(self._create_blockchain())
+        self.assertEqual(node.snapshot_height, 2)
+        self.assertEqual(node.account_dict[self.public_key_hex1].balance, 5 * constants.VALIDATION_REWARD)
+
+        # blocks before the snapshot were not applied by this node - they cannot be unapplied
+        self.assertIsNone(self.block_list[2].undo_journal)
+        self.assertIsNotNone(self.block_list[3].undo_journal)
+
+    def test_snapshot_of_other_chain_ignored(self):
+        store = AccountSnapshotStore(self.temp_dir.name)
+        store.save(2, b"\x00" * 32, [])
+
+        node = Node("http://node0", snapshot_store=store)
+        node.load_blockchain(self._create_blockchain())
+        self.assertEqual(node.snapshot_height, -1)
+        self.assertEqual(node.account_dict[self.public_key_hex1].balance, 5 * constants.VALIDATION_REWARD)
+
+    def test_snapshot_saved_off_event_loop(self):
+        store = AccountSnapshotStore(self.temp_dir.name)
+        node = Node("http://node0", snapshot_store=store)
+        node.block_validator_dict = None
+        node.known_node_address_set = set()
+        node.set_blockchain(Blockchain(self.block_list[0]))
+        node.set_account_dict(node.blockchain.initialize_accounts())
+        save_thread_list = []
+        save = store.save
+
+        def record_save(*args):
+            save_thread_list.append(threading.get_ident())
+            save(*args)
+
+        async def accept_blocks():
+            for block in self.block_list[1:]:
+                copied_block = Block(None, binascii.hexlify(block.previous_block.block_hash), [],
+                                     block.validator_public_key_hex, block.timestamp)
+                copied_block.signature = block.signature
+                await node.accept_block(copied_block, "http://node1")
+            await node.close()
+
+        with mock.patch.object(constants, "CHECKPOINT_INTERVAL", 2), \
+                mock.patch.object(store, "save", side_effect=record_save):
+            asyncio.run(accept_blocks())
+
+        # snapshots at heights 1 and 3 are written in worker threads
+        self.assertEqual(len(save_thread_list), 2)
+        self.assertNotIn(threading.get_ident(), save_thread_list)
+        height, block_hash, account_dict = store.load()
+        self.assertEqual(height, 3)
+        self.assertEqual(block_hash, self.block_list[3].block_hash)
+        self.assertEqual(account_dict[self.public_key_hex1].balance, 4 * constants.VALIDATION_REWARD)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from account.account import Account
+from account.account_full import FullAccount
+from account.account_state import AccountStateView
+from block.block import Block
+from transaction.transaction_type import TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils import constants
+from utils.crypto import get_public_key_hex
+from validation.transaction.exception import TransactionTransferError
+
+
+class AccountStateViewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account1 = FullAccount()
+        self.account2 = FullAccount()
+        self.public_key_hex1 = get_public_key_hex(self.account1.private_key.public_key())
+        self.public_key_hex2 = get_public_key_hex(self.account2.private_key.public_key())
+
+        account = Account(self.public_key_hex1)
+        account.balance = 100
+        self.account_dict = {self.public_key_hex1: account}
+
+    def _create_block(self, tx_token_list):
+        transaction_list = []
+        for tx_token in tx_token_list:
+            transaction = generate_transaction(
+                self.account1.private_key.public_key(),
+                TransactionType.TRANSFER,
+                target_public_key=self.account2.private_key.public_key(),
+                tx_token=tx_token
+            )
+            transaction.sign_transaction(self.account1.private_key)
+            transaction_list.append(transaction)
+        block = Block(None, b"00" * 32, transaction_list, self.public_key_hex2, 1.0)
+        block.sign_block(self.account2.private_key)
+        return block
+
+    def test_view_does_not_change_base(self):
+        state_view = AccountStateView(self.account_dict)
+        state_view[self.public_key_hex1].balance -= 30
+        state_view[self.public_key_hex2] = Account(self.public_key_hex2)
+
+        self.assertEqual(state_view[self.public_key_hex1].balance, 70)
+        self.assertIn(self.public_key_hex2, state_view)
+        self.assertEqual(self.account_dict[self.public_key_hex1].balance, 100)
+        self.assertNotIn(self.public_key_hex2, self.account_dict)
+
+        undo_journal = state_view.commit()
+        self.assertEqual(self.account_dict[self.public_key_hex1].balance, 70)
+        self.assertIn(self.public_key_hex2, self.account_dict)
+        self.assertEqual(undo_journal, {self.public_key_hex1: (0, 100), self.public_key_hex2: None})
+
+    def test_stacked_view(self):
+        state_view = AccountStateView(self.account_dict)
+        inner_state_view = AccountStateView(state_view)
+        del inner_state_view[self.public_key_hex1]
+        self.assertNotIn(self.public_key_hex1, inner_state_view)
+
+        inner_state_view.commit()
+        self.assertNotIn(self.public_key_hex1, state_view)
+        self.assertIn(self.public_key_hex1, self.account_dict)
+
+    def test_validate_block_in_view(self):
+        block = self._create_block([30, 50])
+        state_view = block.validate(self.account_dict)
+        self.assertEqual(self.account_dict[self.public_key_hex1].balance, 100)
+
+        block.commit_state_view(state_view)
+        self.assertEqual(self.account_dict[self.public_key_hex1].balance, 20)
+        self.assertEqual(self.account_dict[self.public_key_hex2].balance, 80 + constants.VALIDATION_REWARD)
+
+        # block is unapplied with the journal recorded by the commit
+        block.revert_account_dict(self.account_dict)
+        self.assertEqual(self.account_dict[self.public_key_hex1].balance, 100)
+        self.assertNotIn(self.public_key_hex2, self.account_dict)
+
+    def test_validate_block_against_intra_block_balance(self):
+        # each transfer is within the balance but both together are not
+        block = self._create_block([60, 50])
+        with self.assertRaises(TransactionTransferError):
+            block.validate(self.account_dict)
+        self.assertEqual(self.account_dict[self.public_key_hex1].balance, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
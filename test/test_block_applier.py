@@ -0,0 +1,73 @@
+import unittest
+
+from account.account import Account
+from account.account_full import FullAccount
+from account.account_state import apply_transaction, get_or_create_account
+from block.block_applier import BlockApplier, partition_transactions
+from transaction.transaction_type import TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils.crypto import get_public_key_hex
+
+
+class BlockApplierTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account_list = [FullAccount() for _ in range(5)]
+        self.public_key_hex_list = [get_public_key_hex(account.private_key.public_key()) for account in self.account_list]
+
+        # accounts 0, 1, 2 are connected by transfers - accounts 3 and 4 are not
+        self.transaction_list = [
+            self._create_transfer(0, 1, 10, 0.1),
+            self._create_transfer(3, None, 5, None),
+            self._create_transfer(1, 2, 15, 0.3),
+            self._create_transfer(4, None, 7, 0.2),
+            self._create_transfer(2, 0, 20, None),
+        ]
+
+    def _create_transfer(self, source_idx, target_idx, tx_token, tx_fee):
+        if target_idx is None:
+            return generate_transaction(
+                self.account_list[source_idx].private_key.public_key(),
+                TransactionType.STAKE,
+                tx_fee=tx_fee,
+                tx_token=tx_token
+            )
+        return generate_transaction(
+            self.account_list[source_idx].private_key.public_key(),
+            TransactionType.TRANSFER,
+            tx_fee=tx_fee,
+            target_public_key=self.account_list[target_idx].private_key.public_key(),
+            tx_token=tx_token
+        )
+
+    def _create_account_dict(self):
+        account_dict = dict()
+        for public_key_hex in self.public_key_hex_list[:4]:
+            account = Account(public_key_hex)
+            account.balance = 100
+            account_dict[public_key_hex] = account
+        return account_dict
+
+    def _get_values(self, account_dict):
+        return {key: (account.stake, account.balance) for key, account in account_dict.items()}
+
+    def test_partition_transactions(self):
+        self.assertEqual(partition_transactions(self.transaction_list), [[0, 2, 4], [1], [3]])
+
+    def test_parallel_apply(self):
+        serial_account_dict = self._create_account_dict()
+        for transaction in self.transaction_list:
+            apply_transaction(transaction, lambda key: get_or_create_account(serial_account_dict, key))
+
+        block_applier = BlockApplier(max_workers=2, min_parallel_transactions=1)
+        try:
+            account_dict = self._create_account_dict()
+            block_applier.apply(self.transaction_list, lambda key: get_or_create_account(account_dict, key))
+        finally:
+            block_applier.shutdown()
+
+        self.assertEqual(self._get_values(account_dict), self._get_values(serial_account_dict))
+        self.assertEqual(account_dict[self.public_key_hex_list[4]].stake, 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import time
+import unittest
+
+from account.account_full import FullAccount
+from block.block import Block
+from block.block_store import BlockStore
+from block.blockchain import Blockchain, load_blockchain_from_store
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils.crypto import get_public_key_hex
+
+
+class BlockStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.account1 = FullAccount()
+
+        self.block_list = []
+        previous_block = None
+        for idx in range(5):
+            transaction = generate_transaction(
+                self.account1.private_key.public_key(),
+                TransactionType.POST,
+                content=f"Random content {idx}",
+                content_type=TransactionContentType.STRING
+            )
+            transaction.sign_transaction(self.account1.private_key)
+            block = Block(
+                previous_block,
+                None,
+                [transaction],
+                get_public_key_hex(self.account1.private_key.public_key()),
+                time.time()
+            )
+            block.sign_block(self.account1.private_key)
+            self.block_list.append(block)
+            previous_block = block
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_append_and_read(self):
+        # small segment size so that blocks are spread over multiple segment files
+        block_store = BlockStore(self.temp_dir.name, segment_size=2048)
+        for height, block in enumerate(self.block_list):
+            self.assertEqual(block_store.append(block), height)
+        self.assertGreater(len(os.listdir(self.temp_dir.name)), 2)
+
+        block_store = BlockStore(self.temp_dir.name, segment_size=2048)
+        self.assertEqual(len(block_store), 5)
+        self.assertEqual(block_store.get_block_dict(3), self.block_list[3].to_dict())
+        self.assertEqual(block_store.get_height(self.block_list[4].block_hash), 4)
+        self.assertEqual(block_store.get_block_dict_by_hash(self.block_list[2].block_hash), self.block_list[2].to_dict())
+        self.assertEqual(
+            list(block_store.iter_block_dicts(start_height=1)),
+            [block.to_dict() for block in self.block_list[1:]]
+        )
+
+    def test_truncate(self):
+        block_store = BlockStore(self.temp_dir.name, segment_size=2048)
+        for block in self.block_list:
+            block_store.append(block)
+
+        block_store.truncate(2)
+        self.assertEqual(len(block_store), 2)
+        self.assertNotIn(self.block_list[3].block_hash, block_store)
+
+        block_store.append(self.block_list[2])
+        block_store = BlockStore(self.temp_dir.name, segment_size=2048)
+        self.assertEqual(len(block_store), 3)
+        self.assertEqual(block_store.get_block_dict(2), self.block_list[2].to_dict())
+
+    def test_partial_write_recovery(self):
+        block_store = BlockStore(self.temp_dir.name)
+        for block in self.block_list:
+            block_store.append(block)
+
+        # cut the last block in the middle as if the node crashed while appending it
+        segment, offset, length = block_store.location_list[-1]
+        with open(block_store._segment_path(segment), 'r+b') as fp:
+            fp.truncate(offset + length // 2)
+
+        block_store = BlockStore(self.temp_dir.name)
+        self.assertEqual(len(block_store), 4)
+        self.assertEqual(block_store.append(self.block_list[4]), 4)
+        self.assertEqual(block_store.get_block_dict(4), self.block_list[4].to_dict())
+
+    def test_blockchain_backed_by_store(self):
+        block_store = BlockStore(self.temp_dir.name)
+        blockchain = Blockchain(self.block_list[2])
+        blockchain.set_block_store(block_store)
+        self.assertEqual(len(block_store), 3)
+
+        # blocks are written in batches
+        blockchain.add_new_block(self.block_list[3])
+        blockchain.add_new_block(self.block_list[4])
+        self.assertEqual(len(block_store), 3)
+        self.assertEqual(blockchain.get_block_store_change(), (3, self.block_list[3:5]))
+        blockchain.write_to_block_store()
+        self.assertEqual(len(block_store), 5)
+
+        blockchain_loaded = load_blockchain_from_store(BlockStore(self.temp_dir.name))
+        self.assertEqual(len(blockchain_loaded), 5)
+        self.assertTrue(blockchain_loaded.head == self.block_list[4])
+        self.assertEqual(blockchain_loaded.to_dict_list(), blockchain.to_dict_list())
+
+    def test_blockchain_memory_window(self):
+        expected_blockchain = Blockchain(self.block_list[4])
+        header_dict_list = expected_blockchain.get_header_dict_list(0, 5)
+        dict_list = expected_blockchain.to_dict_list()
+        account_dict = expected_blockchain.initialize_accounts()
+        transaction = self.block_list[0].transaction_list[0]
+
+        # blocks below the window are dropped from memory once they are written
+        blockchain = Blockchain(self.block_list[4], memory_window=2)
+        blockchain.set_block_store(BlockStore(self.temp_dir.name))
+        for blockchain in (blockchain, load_blockchain_from_store(BlockStore(self.temp_dir.name), memory_window=2)):
+            self.assertEqual(len(blockchain), 5)
+            self.assertEqual(len(blockchain.block_list), 2)
+            self.assertEqual(blockchain.head.block_hash, self.block_list[4].block_hash)
+
+            # older blocks are read from the block store
+            self.assertTrue(blockchain.has_block(self.block_list[1].block_hash))
+            self.assertEqual(blockchain.get_block_by_height(1).to_dict(), self.block_list[1].to_dict())
+            self.assertEqual(blockchain.get_block_by_hash(self.block_list[0].block_hash).height, 0)
+            self.assertEqual(blockchain.get_header_dict_list(0, 5), header_dict_list)
+            self.assertEqual(blockchain.to_dict_list(), dict_list)
+            self.assertEqual(blockchain.get_transaction(transaction.transaction_hash).to_dict(), transaction.to_dict())
+            self.assertEqual(len(blockchain.get_account_transactions(transaction.transaction_source.source_public_key_hex, 10)), 5)
+            self.assertEqual(
+                {key: (account.stake, account.balance) for key, account in blockchain.initialize_accounts().items()},
+                {key: (account.stake, account.balance) for key, account in account_dict.items()}
+            )
+
+        # chain is replaced below the window
+        blockchain.truncate(2)
+        self.assertEqual(len(blockchain), 2)
+        self.assertEqual(blockchain.head.block_hash, self.block_list[1].block_hash)
+        self.assertIsNone(blockchain.get_transaction(self.block_list[3].transaction_list[0].transaction_hash))
+
+
+if __name__ == '__main__':
+    unittest.main()
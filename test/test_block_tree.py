@@ -0,0 +1,146 @@
+import asyncio
+import binascii
+import unittest
+
+from account.account_full import FullAccount
+from block.block import Block
+from block.blockchain import Blockchain
+from node.node import Node
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils import constants
+from utils.crypto import get_public_key_hex
+
+
+class BlockTreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account1 = FullAccount()
+        self.account2 = FullAccount()
+        self.public_key_hex1 = get_public_key_hex(self.account1.private_key.public_key())
+        self.public_key_hex2 = get_public_key_hex(self.account2.private_key.public_key())
+
+        self.transaction1 = self._create_transaction(self.account1, "Post on branch a")
+        self.transaction2 = self._create_transaction(self.account2, "Post on branch b")
+
+        # initial <- a1 <- a2 (chain of the node)
+        #         <- b1 <- b2 <- b3 (competing branch)
+        self.initial_block = self._create_block(None, self.account1, [], 0.0)
+        self.a1 = self._create_block(self.initial_block, self.account1, [self.transaction1], 1.0)
+        self.a2 = self._create_block(self.a1, self.account1, [], 2.0)
+        self.b1 = self._create_block(self.initial_block, self.account2, [self.transaction2], 1.5)
+        self.b2 = self._create_block(self.b1, self.account2, [], 2.5)
+        self.b3 = self._create_block(self.b2, self.account2, [], 3.5)
+
+        self.node = Node("http://node0")
+        self.node.known_node_address_set = set()
+        self.node.block_validator_dict = None
+        self.node.blockchain = Blockchain(self._copy_block(self.initial_block))
+        self.node.account_dict = self.node.blockchain.initialize_accounts()
+
+    def tearDown(self):
+        asyncio.run(self.node.close())
+
+    def _create_transaction(self, account, content):
+        transaction = generate_transaction(
+            account.private_key.public_key(),
+            TransactionType.POST,
+            content=content,
+            content_type=TransactionContentType.STRING
+        )
+        transaction.sign_transaction(account.private_key)
+        return transaction
+
+    def _create_block(self, previous_block, account, transaction_list, timestamp):
+        block = Block(
+            previous_block,
+            None,
+            transaction_list,
+            get_public_key_hex(account.private_key.public_key()),
+            timestamp
+        )
+        block.sign_block(account.private_key)
+        return block
+
+    def _copy_block(self, block):
+        # block as received from other nodes - linked by previous block hash only
+        previous_block_hash_hex = binascii.hexlify(block.previous_block.block_hash) if block.previous_block else None
+        copied_block = Block(
+            None,
+            previous_block_hash_hex,
+            block.transaction_list,
+            block.validator_public_key_hex,
+            block.timestamp
+        )
+        copied_block.signature = block.signature
+        return copied_block
+
+    def _accept_blocks(self, block_list):
+        async def accept_blocks():
+            for block in block_list:
+                await self.node.accept_block(self._copy_block(block), "http://node1")
+        asyncio.run(accept_blocks())
+
+    def test_side_block_kept_until_longer(self):
+        self._accept_blocks([self.a1, self.a2, self.b1, self.b2])
+
+        # branch b is as long as branch a - the current chain wins ties
+        self.assertEqual(self.node.blockchain.head.block_hash, self.a2.block_hash)
+        self.assertTrue(self.node.blockchain.has_block(self.b2.block_hash))
+        self.assertEqual(self.node.blockchain.get_side_block(self.b2.block_hash).height, 2)
+
+    def test_switch_branch(self):
+        self._accept_blocks([self.a1, self.a2, self.b1, self.b2, self.b3])
+
+        blockchain = self.node.blockchain
+        self.assertEqual(
+            [block.block_hash for block in blockchain.block_list],
+            [block.block_hash for block in (self.initial_block, self.b1, self.b2, self.b3)]
+        )
+
+        # rewards of the unapplied blocks are taken back
+        self.assertEqual(self.node.account_dict[self.public_key_hex1].balance, constants.VALIDATION_REWARD)
+        self.assertEqual(self.node.account_dict[self.public_key_hex2].balance, 3 * constants.VALIDATION_REWARD)
+
+        # transaction index follows the chain and transaction of the unapplied branch goes back to the pool
+        self.assertIsNone(blockchain.get_transaction(self.transaction1.transaction_hash))
+        self.assertIsNotNone(blockchain.get_transaction(self.transaction2.transaction_hash))
+        self.assertEqual(blockchain.get_account_transactions(self.public_key_hex1, 10), [])
+        self.assertIn(self.transaction1.transaction_hash_hex, self.node.transaction_pool)
+
+        # unapplied blocks are kept as side blocks
+        _, apply_block_list = blockchain.get_fork(blockchain.get_side_block(self.a2.block_hash))
+        self.assertEqual([block.block_hash for block in apply_block_list], [self.a1.block_hash, self.a2.block_hash])
+
+    def test_get_fork(self):
+        blockchain = Blockchain(self.a2)
+        blockchain.add_side_block(self._copy_block(self.b1))
+        b2 = self._copy_block(self.b2)
+        blockchain.add_side_block(b2)
+
+        unapply_block_list, apply_block_list = blockchain.get_fork(b2)
+        self.assertEqual([block.block_hash for block in unapply_block_list], [self.a2.block_hash, self.a1.block_hash])
+        self.assertEqual([block.block_hash for block in apply_block_list], [self.b1.block_hash, self.b2.block_hash])
+
+        # removed head becomes a side block
+        removed_block = blockchain.remove_head()
+        self.assertIs(removed_block, self.a2)
+        self.assertIs(blockchain.head, self.a1)
+        self.assertIsNotNone(blockchain.get_side_block(self.a2.block_hash))
+
+    def test_side_block_pool_size(self):
+        blockchain = Blockchain(self.a2)
+        blockchain.max_side_block_count = 2
+        b1, b2, b3 = [self._copy_block(block) for block in (self.b1, self.b2, self.b3)]
+        self.assertTrue(blockchain.add_side_block(b1))
+        self.assertTrue(blockchain.add_side_block(b2))
+        self.assertEqual(sorted(blockchain.side_height_dict), [1, 2])
+
+        # the lowest side block is evicted with its descendants
+        self.assertFalse(blockchain.add_side_block(b3))
+        self.assertFalse(blockchain.has_block(b1.block_hash))
+        self.assertFalse(blockchain.has_block(b3.block_hash))
+        self.assertEqual(blockchain.side_height_dict, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import binascii
+import time
+import unittest
+
+from account.account_full import FullAccount
+from block.block import Block
+from block.blockchain import Blockchain
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils.crypto import get_public_key_hex
+
+
+class BlockchainIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account1 = FullAccount()
+        self.account2 = FullAccount()
+        self.public_key_hex1 = get_public_key_hex(self.account1.private_key.public_key())
+        self.public_key_hex2 = get_public_key_hex(self.account2.private_key.public_key())
+
+        # account1 posts
+        self.transaction1 = generate_transaction(
+            self.account1.private_key.public_key(),
+            TransactionType.POST,
+            content="Random content",
+            content_type=TransactionContentType.STRING
+        )
+        self.transaction1.sign_transaction(self.account1.private_key)
+
+        # account2 comments to the post of account1
+        self.transaction2 = generate_transaction(
+            self.account2.private_key.public_key(),
+            TransactionType.COMMENT,
+            content="Random comment",
+            content_type=TransactionContentType.STRING,
+            target_transaction_hash=self.transaction1.transaction_hash
+        )
+        self.transaction2.sign_transaction(self.account2.private_key)
+
+        # account1 follows account2
+        self.transaction3 = generate_transaction(
+            self.account1.private_key.public_key(),
+            TransactionType.FOLLOW,
+            target_public_key=self.account2.private_key.public_key()
+        )
+        self.transaction3.sign_transaction(self.account1.private_key)
+
+        # account1 replies to the comment of account2
+        self.transaction4 = generate_transaction(
+            self.account1.private_key.public_key(),
+            TransactionType.COMMENT,
+            content="Random comment 2",
+            content_type=TransactionContentType.STRING,
+            target_transaction_hash=self.transaction1.transaction_hash
+        )
+        self.transaction4.sign_transaction(self.account1.private_key)
+
+        self.block1 = Block(
+            None,
+            None,
+            [self.transaction1],
+            self.public_key_hex1,
+            time.time()
+        )
+        self.block1.sign_block(self.account1.private_key)
+
+        self.block2 = Block(
+            self.block1,
+            None,
+            [self.transaction2, self.transaction3],
+            self.public_key_hex2,
+            time.time()
+        )
+        self.block2.sign_block(self.account2.private_key)
+
+        # block3 is linked by previous block hash only, as blocks received from other nodes
+        self.block3 = Block(
+            None,
+            binascii.hexlify(self.block2.block_hash),
+            [self.transaction4],
+            self.public_key_hex1,
+            time.time()
+        )
+        self.block3.sign_block(self.account1.private_key)
+
+    def test_block_height(self):
+        self.assertEqual(self.block1.height, 0)
+        self.assertEqual(self.block2.height, 1)
+        self.assertIsNone(self.block3.height)
+        self.assertEqual(len(self.block2), 2)
+
+        blockchain = Blockchain(self.block2)
+        blockchain.add_new_block(self.block3)
+        self.assertEqual(self.block3.height, 2)
+        self.assertEqual(len(blockchain), 3)
+        self.assertEqual(len(self.block3), 3)
+
+    def test_block_lookup(self):
+        blockchain = Blockchain(self.block2)
+        blockchain.add_new_block(self.block3)
+
+        self.assertIs(blockchain.get_block_by_hash(self.block1.block_hash), self.block1)
+        self.assertIs(blockchain.get_block_by_height(2), self.block3)
+        self.assertIsNone(blockchain.get_block_by_height(3))
+        self.assertIsNone(blockchain.get_block_by_hash(self.transaction1.transaction_hash))
+
+        blockchain_same = Blockchain()
+        blockchain_same.from_dict_list(blockchain.to_dict_list())
+        self.assertEqual(len(blockchain_same), 3)
+        self.assertTrue(blockchain_same.get_block_by_height(1) == self.block2)
+
+    def test_transaction_lookup(self):
+        blockchain = Blockchain(self.block2)
+        blockchain.add_new_block(self.block3)
+
+        self.assertIs(blockchain.get_transaction(self.transaction3.transaction_hash), self.transaction3)
+        self.assertIs(blockchain.get_transaction(self.transaction4.transaction_hash), self.transaction4)
+        self.assertEqual(blockchain.transaction_index.get_location(self.transaction3.transaction_hash), (1, 1))
+        self.assertIsNone(blockchain.get_transaction(self.block1.block_hash))
+
+        # index is rebuilt when the chain is replaced
+        blockchain.from_dict_list(Blockchain(self.block1).to_dict_list())
+        self.assertIsNotNone(blockchain.get_transaction(self.transaction1.transaction_hash))
+        self.assertIsNone(blockchain.get_transaction(self.transaction2.transaction_hash))
+
+    def test_account_transactions(self):
+        blockchain = Blockchain(self.block2)
+        blockchain.add_new_block(self.block3)
+
+        # account1 sent transaction1, transaction3, transaction4 - newest first
+        page = blockchain.get_account_transactions(self.public_key_hex1, 2)
+        self.assertEqual([tx for _, tx in page], [self.transaction4, self.transaction3])
+        page = blockchain.get_account_transactions(self.public_key_hex1, 2, before=page[-1][0])
+        self.assertEqual([tx for _, tx in page], [self.transaction1])
+
+        # account2 sent transaction2 and received transaction3
+        page = blockchain.get_account_transactions(self.public_key_hex2, 10)
+        self.assertEqual([tx for _, tx in page], [self.transaction3, self.transaction2])
+
+    def test_transaction_children(self):
+        blockchain = Blockchain(self.block2)
+        blockchain.add_new_block(self.block3)
+        transaction1_hash_hex = binascii.hexlify(self.transaction1.transaction_hash)
+
+        page = blockchain.get_transaction_children(transaction1_hash_hex, 1)
+        self.assertEqual([tx for _, tx in page], [self.transaction4])
+        page = blockchain.get_transaction_children(transaction1_hash_hex, 1, before=page[-1][0])
+        self.assertEqual([tx for _, tx in page], [self.transaction2])
+        page = blockchain.get_transaction_children(transaction1_hash_hex, 1, before=page[-1][0])
+        self.assertEqual(page, [])
+
+        transaction2_hash_hex = binascii.hexlify(self.transaction2.transaction_hash)
+        self.assertEqual(blockchain.get_transaction_children(transaction2_hash_hex, 10), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
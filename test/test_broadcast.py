@@ -0,0 +1,185 @@
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from account.account_full import FullAccount
+from block.block import Block
+from node.node import Node
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils import constants
+from utils.crypto import get_public_key_hex
+from validation.block.exception import BlockValidationError
+
+
+class BroadcastTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account1 = FullAccount()
+        self.transaction = generate_transaction(
+            self.account1.private_key.public_key(),
+            TransactionType.POST,
+            content="Random content",
+            content_type=TransactionContentType.STRING
+        )
+        self.transaction.sign_transaction(self.account1.private_key)
+
+        self.node = Node("http://node0")
+        self.node.known_node_address_set = {"http://node1", "http://node2", "http://node3"}
+        self.request_list = []
+        self.inventory_request_list = []
+        self.known_hash_hex_dict = {"node1": set(), "node2": set()}  # { host: hashes the peer already has }
+        self.compact_block_failing_host_set = set()  # hosts that cannot reconstruct compact blocks
+        self.peer_transaction_dict_list = []  # transactions returned by peers on getdata
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.host == "node3":
+                raise httpx.ConnectError("Connection refused", request=request)
+            if request.url.path == constants.INVENTORY_PATH:
+                # respond with the announced hashes that the peer does not have
+                self.inventory_request_list.append(request)
+                known_hash_hex_set = self.known_hash_hex_dict[request.url.host]
+                return httpx.Response(200, json={
+                    key: [hash_hex for hash_hex in hash_hex_list if hash_hex not in known_hash_hex_set]
+                    for key, hash_hex_list in json.loads(request.content).items()
+                })
+            if request.url.path == constants.GETDATA_PATH:
+                return httpx.Response(200, json={"transaction_dict_list": self.peer_transaction_dict_list})
+            self.request_list.append(request)
+            if request.url.path == constants.COMPACT_BLOCK_VALIDATION_PATH and \
+                    request.url.host in self.compact_block_failing_host_set:
+                return httpx.Response(500)
+            return httpx.Response(200, json=None)
+
+        self.node.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def tearDown(self):
+        asyncio.run(self.node.close())
+
+    async def _broadcast_transaction_list(self, transaction_list, origin):
+        for transaction in transaction_list:
+            await self.node._broadcast_transaction(transaction, origin)
+        await self.node._flush_transaction_broadcast_queue()
+
+    def test_broadcast_transaction(self):
+        asyncio.run(self._broadcast_transaction_list([self.transaction], "http://node2"))
+
+        # origin is skipped and disconnected node is removed
+        self.assertEqual([request.url.host for request in self.request_list], ["node1"])
+        self.assertEqual(self.request_list[0].url.path, constants.TRANSACTION_BATCH_VALIDATION_PATH)
+        self.assertEqual(self.node.known_node_address_set, {"http://node1", "http://node2"})
+        self.assertIn("http://node1", self.node.peer_latency_dict)
+
+        data = json.loads(self.request_list[0].content)
+        self.assertEqual(data[0]["transaction_hash_hex"], self.transaction.transaction_hash_hex.decode('utf-8'))
+        self.assertEqual(self.request_list[0].headers[constants.ORIGIN_HEADER], "http://node0")
+
+        # hash is announced before the body is sent
+        self.assertEqual([request.url.host for request in self.inventory_request_list], ["node1"])
+        self.assertEqual(
+            json.loads(self.inventory_request_list[0].content),
+            {"transaction_hash_hex_list": [self.transaction.transaction_hash_hex.decode('utf-8')]}
+        )
+
+        # transaction is not sent again to the same node
+        asyncio.run(self._broadcast_transaction_list([self.transaction], "http://node2"))
+        self.assertEqual(len(self.request_list), 1)
+        self.assertEqual(len(self.inventory_request_list), 1)
+
+    def test_broadcast_transaction_known_by_peer(self):
+        self.known_hash_hex_dict["node1"].add(self.transaction.transaction_hash_hex.decode('utf-8'))
+        asyncio.run(self._broadcast_transaction_list([self.transaction], "http://node0"))
+
+        # both peers get the announcement but only the peer missing the transaction gets the body
+        self.assertEqual(sorted(request.url.host for request in self.inventory_request_list), ["node1", "node2"])
+        self.assertEqual([request.url.host for request in self.request_list], ["node2"])
+
+    def test_get_missing_inventory(self):
+        transaction_hash_hex = self.transaction.transaction_hash_hex
+        self.assertEqual(self.node.get_missing_inventory([transaction_hash_hex], []), ([transaction_hash_hex], []))
+
+        self.node.transaction_pool.add(self.transaction, 0)
+        self.assertEqual(self.node.get_missing_inventory([transaction_hash_hex], []), ([], []))
+
+    def test_broadcast_transaction_batch(self):
+        transaction2 = generate_transaction(
+            self.account1.private_key.public_key(),
+            TransactionType.POST,
+            content="Random content 2",
+            content_type=TransactionContentType.STRING
+        )
+        transaction2.sign_transaction(self.account1.private_key)
+
+        async def broadcast():
+            await self.node._broadcast_transaction(self.transaction, "http://node2")
+            await self.node._broadcast_transaction(transaction2, "http://node1")
+            await self.node._flush_transaction_broadcast_queue()
+
+        # both transactions are sent in one flush and each is not sent back to its origin
+        asyncio.run(broadcast())
+        hash_hex_dict = {
+            request.url.host: [tx_dict["transaction_hash_hex"] for tx_dict in json.loads(request.content)]
+            for request in self.request_list
+        }
+        self.assertEqual(hash_hex_dict, {
+            "node1": [self.transaction.transaction_hash_hex.decode('utf-8')],
+            "node2": [transaction2.transaction_hash_hex.decode('utf-8')]
+        })
+
+    def _create_block(self, transaction_list):
+        block = Block(
+            None,
+            b"00" * 32,
+            transaction_list,
+            get_public_key_hex(self.account1.private_key.public_key()),
+            1.0
+        )
+        block.sign_block(self.account1.private_key)
+        return block
+
+    def test_broadcast_compact_block(self):
+        self.compact_block_failing_host_set.add("node2")
+        block = self._create_block([self.transaction])
+        asyncio.run(self.node.broadcast_block(block, "http://node0"))
+
+        # compact block is sent without transaction bodies and the full block only to the peer that failed
+        path_dict = {}
+        for request in self.request_list:
+            path_dict.setdefault(request.url.host, []).append(request.url.path)
+        self.assertEqual(path_dict, {
+            "node1": [constants.COMPACT_BLOCK_VALIDATION_PATH],
+            "node2": [constants.COMPACT_BLOCK_VALIDATION_PATH, constants.BLOCK_VALIDATION_PATH]
+        })
+
+        compact_block_dict = json.loads(self.request_list[0].content)
+        self.assertNotIn("transaction_dict_list", compact_block_dict)
+        self.assertEqual(
+            compact_block_dict["transaction_hash_hex_list"], [self.transaction.transaction_hash_hex.decode('utf-8')]
+        )
+
+    def test_create_block_from_compact_dict(self):
+        transaction2 = generate_transaction(
+            self.account1.private_key.public_key(),
+            TransactionType.POST,
+            content="Random content 2",
+            content_type=TransactionContentType.STRING
+        )
+        transaction2.sign_transaction(self.account1.private_key)
+        block = self._create_block([self.transaction, transaction2])
+
+        # one transaction is in the transaction pool and the other is requested from the origin
+        self.node.transaction_pool.add(self.transaction, 0)
+        self.peer_transaction_dict_list.append(transaction2.to_dict())
+        reconstructed_block = asyncio.run(self.node.create_block_from_compact_dict(block.to_compact_dict(), "http://node1"))
+        self.assertEqual(reconstructed_block, block)
+        self.assertIs(reconstructed_block.transaction_list[0], self.transaction)
+
+        # missing transaction that the origin does not have either
+        self.peer_transaction_dict_list.clear()
+        with self.assertRaises(BlockValidationError):
+            asyncio.run(self.node.create_block_from_compact_dict(block.to_compact_dict(), "http://node1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,307 @@
+import asyncio
+import binascii
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+from account.account import Account
+from account.account_full import FullAccount
+from block.block import Block
+from block.block_store import BlockStore
+from block.blockchain import Blockchain
+from node.node import Node
+from utils import constants
+from utils.crypto import get_public_key_hex
+
+
+class ChainSyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account = FullAccount()
+        self.public_key_hex = get_public_key_hex(self.account.private_key.public_key())
+
+        # chain of 6 blocks served by the peers
+        self.remote_blockchain = Blockchain(self._create_chain(None, 6, 1.0))
+
+        self.node = Node("http://node0")
+        self.node.known_node_address_set = {"http://node1", "http://node2"}
+        self.request_list = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.request_list.append(request)
+            start_height = int(request.url.params.get("start_height", 0))
+            limit = int(request.url.params.get("limit", 0))
+            if request.url.path == constants.BLOCKCHAIN_LENGTH_PATH:
+                return httpx.Response(200, json=len(self.remote_blockchain))
+            if request.url.path == constants.BLOCKCHAIN_HEADERS_PATH:
+                return httpx.Response(200, json=self.remote_blockchain.get_header_dict_list(start_height, limit))
+            if request.url.path == constants.BLOCKCHAIN_BLOCKS_PATH:
+                return httpx.Response(200, json=self.remote_blockchain.get_block_dict_list(start_height, limit))
+            return httpx.Response(404)
+
+        self.node.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def tearDown(self):
+        asyncio.run(self.node.close())
+
+    def _create_chain(self, previous_block, n, timestamp):
+        block = previous_block
+        for idx in range(n):
+            block = Block(block, None, [], self.public_key_hex, timestamp + idx)
+            block.sign_block(self.account.private_key)
+        return block
+
+    def _set_local_blockchain(self, block_dict_list):
+        blockchain = Blockchain()
+        blockchain.from_dict_list(block_dict_list)
+        self.node.blockchain = blockchain
+        self.node.account_dict = blockchain.initialize_accounts()
+
+    def _get_block_request_height_list(self):
+        return [
+            int(request.url.params["start_height"]) for request in self.request_list
+            if request.url.path == constants.BLOCKCHAIN_BLOCKS_PATH
+        ]
+
+    def test_sync_extension(self):
+        # local chain has the first 3 blocks of the remote chain
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[3:])
+
+        self.assertTrue(asyncio.run(self.node.sync_blockchain()))
+        self.assertEqual(len(self.node.blockchain), 6)
+        self.assertEqual(self.node.blockchain.head.block_hash, self.remote_blockchain.head.block_hash)
+        self.assertEqual(self.node.account_dict[self.public_key_hex].balance, 6 * constants.VALIDATION_REWARD)
+
+        # only missing blocks are downloaded
+        self.assertEqual(self._get_block_request_height_list(), [3])
+
+        # nothing to sync when chains have the same length
+        self.assertFalse(asyncio.run(self.node.sync_blockchain()))
+
+    def test_sync_fork(self):
+        # local chain shares the first 2 blocks and has a different block at height 2
+        local_head = self._create_chain(self.remote_blockchain.get_block_by_height(1), 1, 100.0)
+        self._set_local_blockchain(Blockchain(local_head).to_dict_list())
+
+        self.assertTrue(asyncio.run(self.node.sync_blockchain()))
+        self.assertEqual(
+            [block.block_hash for block in self.node.blockchain.block_list],
+            [block.block_hash for block in self.remote_blockchain.block_list]
+        )
+        self.assertEqual(self.node.account_dict[self.public_key_hex].balance, 6 * constants.VALIDATION_REWARD)
+        self.assertEqual(self._get_block_request_height_list(), [2])
+
+    def test_sync_fork_writes_block_store(self):
+        local_head = self._create_chain(self.remote_blockchain.get_block_by_height(1), 1, 100.0)
+        self._set_local_blockchain(Blockchain(local_head).to_dict_list())
+        with tempfile.TemporaryDirectory() as temp_dir:
+            block_store = BlockStore(temp_dir)
+            self.node.block_store = block_store
+            self.node.blockchain.set_block_store(block_store)
+
+            # blocks above the common ancestor are replaced in one batch
+            with mock.patch.object(block_store, "append_list", wraps=block_store.append_list) as append_list:
+                self.assertTrue(asyncio.run(self.node.sync_blockchain()))
+            self.assertEqual(append_list.call_count, 1)
+            self.assertEqual(
+                [block_store.get_block_hash(height) for height in range(len(block_store))],
+                [block.block_hash for block in self.remote_blockchain.block_list]
+            )
+
+    def test_accept_block_while_writing_block_store(self):
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[3:])
+        self.node.block_validator_dict = None
+        self.node.known_node_address_set = set()
+        block3, block4 = [
+            Block(None, block.previous_block_hash_hex or binascii.hexlify(block.previous_block.block_hash), [],
+                  block.validator_public_key_hex, block.timestamp)
+            for block in self.remote_blockchain.block_list[3:5]
+        ]
+        for block in (block3, block4):
+            block.sign_block(self.account.private_key)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            block_store = BlockStore(temp_dir)
+            self.node.block_store = block_store
+            self.node.blockchain.set_block_store(block_store)
+            replace_from = block_store.replace_from
+
+            def slow_replace_from(height, block_list):
+                time.sleep(0.05)
+                replace_from(height, block_list)
+
+            async def accept_blocks():
+                # block at height 4 arrives while the block at height 3 is written to the block store
+                task = asyncio.ensure_future(self.node.accept_block(block3, "http://node1"))
+                while self.node.blockchain.head is not block3:
+                    await asyncio.sleep(0)
+                await self.node.accept_block(block4, "http://node1")
+                await task
+
+            with mock.patch.object(block_store, "replace_from", side_effect=slow_replace_from):
+                asyncio.run(accept_blocks())
+            self.assertEqual(len(block_store), 5)
+
+        self.assertEqual(len(self.node.blockchain), 5)
+        self.assertEqual(self.node.account_dict[self.public_key_hex].balance, 5 * constants.VALIDATION_REWARD)
+
+    def test_sync_fork_without_undo_journals(self):
+        # blocks below the snapshot the node started from have no undo journals - account state is replayed
+        local_head = self._create_chain(self.remote_blockchain.get_block_by_height(1), 1, 100.0)
+        self._set_local_blockchain(Blockchain(local_head).to_dict_list())
+        local_block_list = list(self.node.blockchain.block_list)
+        for block in local_block_list:
+            block.undo_journal = None
+
+        self.assertTrue(asyncio.run(self.node.sync_blockchain()))
+        self.assertEqual(self.node.blockchain.head.block_hash, self.remote_blockchain.head.block_hash)
+        self.assertEqual(self.node.account_dict[self.public_key_hex].balance, 6 * constants.VALIDATION_REWARD)
+        # replayed blocks of the old chain are not changed
+        self.assertTrue(all(block.undo_journal is None for block in local_block_list))
+
+    def test_sync_empty(self):
+        self.assertTrue(asyncio.run(self.node.sync_blockchain()))
+        self.assertEqual(
+            binascii.hexlify(self.node.blockchain.head.block_hash),
+            binascii.hexlify(self.remote_blockchain.head.block_hash)
+        )
+        self.assertEqual(self._get_block_request_height_list(), [0])
+
+    @mock.patch.object(constants, "SYNC_BLOCKS_LIMIT", 2)
+    def test_sync_in_chunks(self):
+        self.assertTrue(asyncio.run(self.node.sync_blockchain()))
+        self.assertEqual(len(self.node.blockchain), 6)
+        self.assertEqual(self.node.account_dict[self.public_key_hex].balance, 6 * constants.VALIDATION_REWARD)
+        self.assertEqual(sorted(set(self._get_block_request_height_list())), [0, 2, 4])
+
+    @mock.patch.object(constants, "SYNC_BLOCKS_LIMIT", 2)
+    def test_sync_stops_at_bad_chunk(self):
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[5:])
+
+        # peers serve blocks of another chain from height 4 - chunks before it are validated already
+        other_head = self._create_chain(self.remote_blockchain.get_block_by_height(3), 2, 100.0)
+        get_block_dict_list = self.remote_blockchain.get_block_dict_list
+        self.remote_blockchain.get_block_dict_list = lambda start_height, limit: (
+            Blockchain(other_head).get_block_dict_list(start_height, limit) if start_height >= 4
+            else get_block_dict_list(start_height, limit)
+        )
+
+        self.assertFalse(asyncio.run(self.node.sync_blockchain()))
+        self.assertEqual(len(self.node.blockchain), 1)
+        self.assertEqual(self.node.account_dict[self.public_key_hex].balance, constants.VALIDATION_REWARD)
+
+    def test_request_sync_deduplicated(self):
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[3:])
+
+        async def request_sync_twice():
+            task1 = self.node.request_sync()
+            task2 = self.node.request_sync()
+            self.assertIs(task1, task2)
+            return await task1
+
+        self.assertTrue(asyncio.run(request_sync_twice()))
+        self.assertEqual(len(self.node.blockchain), 6)
+
+        # one sync asks each peer for its chain length once
+        length_request_list = [
+            request for request in self.request_list if request.url.path == constants.BLOCKCHAIN_LENGTH_PATH
+        ]
+        self.assertEqual(len(length_request_list), 2)
+
+    def test_accept_invalid_block_syncs_in_background(self):
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[3:])
+
+        # block on top of the local head without known validator
+        block = Block(None, binascii.hexlify(self.node.blockchain.head.block_hash), [], self.public_key_hex, 10.0)
+        block.sign_block(self.account.private_key)
+        self.node.block_validator_dict = {}
+
+        async def accept_block():
+            await self.node.accept_block(block, "http://node1")
+            # block is not added and the sync runs in the background
+            self.assertEqual(len(self.node.blockchain), 3)
+            self.assertIsNotNone(self.node.sync_task)
+            await self.node.sync_task
+
+        asyncio.run(accept_block())
+        self.assertEqual(len(self.node.blockchain), 6)
+
+    def test_accept_orphan_block(self):
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[3:])
+        self.node.block_validator_dict = None
+        self.node.known_node_address_set = set()
+
+        # blocks at height 4 and 5 arrive before the block at height 3
+        block3, block4, block5 = [
+            Block(None, block.previous_block_hash_hex or binascii.hexlify(block.previous_block.block_hash), [],
+                  block.validator_public_key_hex, block.timestamp)
+            for block in self.remote_blockchain.block_list[3:]
+        ]
+        for block in (block3, block4, block5):
+            block.sign_block(self.account.private_key)
+
+        async def accept_blocks():
+            await self.node.accept_block(block5, "http://node1")
+            await self.node.accept_block(block4, "http://node1")
+            self.assertEqual(len(self.node.blockchain), 3)
+            self.assertEqual(len(self.node.orphan_block_pool), 2)
+            self.assertIsNone(self.node.sync_task)
+
+            # previous block arrives and connects the waiting blocks
+            await self.node.accept_block(block3, "http://node1")
+
+        asyncio.run(accept_blocks())
+        self.assertEqual(len(self.node.blockchain), 6)
+        self.assertEqual(self.node.blockchain.head.block_hash, self.remote_blockchain.head.block_hash)
+        self.assertEqual(len(self.node.orphan_block_pool), 0)
+
+    def test_accept_orphan_block_after_validator_is_chosen(self):
+        self._set_local_blockchain(self.remote_blockchain.to_dict_list()[3:])
+        self.node.known_node_address_set = set()
+
+        # the test account validates every block - the other validators only send rands
+        other_public_key_hex_list = [get_public_key_hex(FullAccount().private_key.public_key()) for _ in range(2)]
+        for public_key_hex, stake in [(self.public_key_hex, 100)] + [(key, 11) for key in other_public_key_hex_list]:
+            self.node.account_dict.setdefault(public_key_hex, Account(public_key_hex)).stake = stake
+        self.node.stake_index.rebuild(self.node.account_dict)
+
+        block3, block4 = [
+            Block(None, block.previous_block_hash_hex or binascii.hexlify(block.previous_block.block_hash), [],
+                  block.validator_public_key_hex, block.timestamp)
+            for block in self.remote_blockchain.block_list[3:5]
+        ]
+        for block in (block3, block4):
+            block.sign_block(self.account.private_key)
+        self.node.block_validator_dict = {block3.previous_block_hash_hex: self.public_key_hex}
+
+        def choose_validator(head_block_hash_hex):
+            # rands of all validators - the rand sum falls in the stake range of the test account
+            self.node.block_validator_rand_dict[head_block_hash_hex] = {
+                self.public_key_hex: 50, other_public_key_hex_list[0]: 0, other_public_key_hex_list[1]: 0
+            }
+            self.node._run_consensus_protocol()
+
+        async def accept_blocks():
+            await self.node.accept_block(block4, "http://node1")
+            await self.node.accept_block(block3, "http://node1")
+
+            # block at height 4 waits for the validator of the block at height 3
+            self.assertEqual(len(self.node.blockchain), 4)
+            self.assertEqual(len(self.node.orphan_block_pool), 1)
+            self.assertIsNone(self.node.sync_task)
+
+            choose_validator(binascii.hexlify(block3.block_hash))
+            self.assertIsNotNone(self.node.orphan_task)
+            await self.node.orphan_task
+
+        asyncio.run(accept_blocks())
+        self.assertEqual(len(self.node.blockchain), 5)
+        self.assertEqual(self.node.blockchain.head.block_hash, block4.block_hash)
+        self.assertEqual(len(self.node.orphan_block_pool), 0)
+        self.assertIsNone(self.node.sync_task)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from account.account_full import FullAccount
+from utils.crypto import PublicKeyCache, get_public_key_hex
+
+
+class PublicKeyCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.public_key_hex_list = [get_public_key_hex(FullAccount().private_key.public_key()) for _ in range(3)]
+
+    def test_hit_and_miss(self):
+        public_key_cache = PublicKeyCache(maxsize=2)
+        public_key = public_key_cache.get(self.public_key_hex_list[0])
+        self.assertEqual(get_public_key_hex(public_key), self.public_key_hex_list[0])
+        self.assertIs(public_key_cache.get(self.public_key_hex_list[0]), public_key)
+        self.assertEqual((public_key_cache.hits, public_key_cache.misses), (1, 1))
+
+    def test_eviction(self):
+        public_key_cache = PublicKeyCache(maxsize=2)
+        public_key_cache.get(self.public_key_hex_list[0])
+        public_key_cache.get(self.public_key_hex_list[1])
+        public_key_cache.get(self.public_key_hex_list[0])  # account 1 becomes least recently used
+        public_key_cache.get(self.public_key_hex_list[2])
+
+        self.assertEqual(len(public_key_cache), 2)
+        self.assertIn(self.public_key_hex_list[0], public_key_cache.public_key_dict)
+        self.assertNotIn(self.public_key_hex_list[1], public_key_cache.public_key_dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import binascii
+import unittest
+
+from account.account_full import FullAccount
+from block.block import Block
+from block.orphan_pool import OrphanBlockPool
+from utils.crypto import get_public_key_hex
+
+
+class OrphanBlockPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account = FullAccount()
+        self.public_key_hex = get_public_key_hex(self.account.private_key.public_key())
+        self.previous_block_hash_hex1 = binascii.hexlify(b"\x01" * 32)
+        self.previous_block_hash_hex2 = binascii.hexlify(b"\x02" * 32)
+
+    def _create_block(self, previous_block_hash_hex, timestamp):
+        return Block(None, previous_block_hash_hex, [], self.public_key_hex, timestamp)
+
+    def test_pop_children(self):
+        pool = OrphanBlockPool(max_size=10, ttl=60.0)
+        block1 = self._create_block(self.previous_block_hash_hex1, 1.0)
+        block2 = self._create_block(self.previous_block_hash_hex1, 2.0)
+        block3 = self._create_block(self.previous_block_hash_hex2, 3.0)
+
+        self.assertTrue(pool.add(block1, "http://node1", now=0.0))
+        self.assertTrue(pool.add(block2, "http://node2", now=0.0))
+        self.assertTrue(pool.add(block3, "http://node1", now=0.0))
+        self.assertFalse(pool.add(block1, "http://node1", now=0.0))
+        self.assertEqual(len(pool), 3)
+
+        self.assertEqual(
+            pool.pop_children(self.previous_block_hash_hex1, now=1.0),
+            [(block1, "http://node1"), (block2, "http://node2")]
+        )
+        self.assertEqual(pool.pop_children(self.previous_block_hash_hex1, now=1.0), [])
+        self.assertEqual(len(pool), 1)
+        self.assertIn(block3.block_hash, pool)
+
+    def test_evict_by_size(self):
+        pool = OrphanBlockPool(max_size=2, ttl=60.0)
+        block_list = [self._create_block(self.previous_block_hash_hex1, float(idx)) for idx in range(3)]
+        for block in block_list:
+            pool.add(block, "http://node1", now=0.0)
+
+        # the oldest block is evicted
+        self.assertEqual(len(pool), 2)
+        self.assertNotIn(block_list[0].block_hash, pool)
+        self.assertEqual(
+            [block for block, _ in pool.pop_children(self.previous_block_hash_hex1, now=0.0)],
+            block_list[1:]
+        )
+
+    def test_evict_by_age(self):
+        pool = OrphanBlockPool(max_size=10, ttl=60.0)
+        block1 = self._create_block(self.previous_block_hash_hex1, 1.0)
+        block2 = self._create_block(self.previous_block_hash_hex2, 2.0)
+        pool.add(block1, "http://node1", now=0.0)
+        pool.add(block2, "http://node1", now=30.0)
+
+        self.assertEqual(pool.pop_children(self.previous_block_hash_hex1, now=61.0), [])
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.pop_children(self.previous_block_hash_hex2, now=61.0), [(block2, "http://node1")])
+        self.assertEqual(pool.children_dict, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
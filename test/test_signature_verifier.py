@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+
+from cryptography.exceptions import InvalidSignature
+
+from account.account_full import FullAccount
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils.signature_verifier import SignatureVerifier
+
+
+class SignatureVerifierTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account1 = FullAccount()
+        self.transaction_list = []
+        for idx in range(8):
+            transaction = generate_transaction(
+                self.account1.private_key.public_key(),
+                TransactionType.POST,
+                content=f"Random content {idx}",
+                content_type=TransactionContentType.STRING
+            )
+            transaction.sign_transaction(self.account1.private_key)
+            self.transaction_list.append(transaction)
+
+        # manipulate one transaction after signing
+        self.transaction_list[5].transaction_target.tx_token = 1
+
+    def test_serial_verification(self):
+        signature_verifier = SignatureVerifier(max_workers=1)
+        result_list = signature_verifier.verify_batch([tx.get_signature_item() for tx in self.transaction_list])
+        self.assertEqual(result_list, [idx != 5 for idx in range(8)])
+
+    def test_parallel_verification(self):
+        signature_verifier = SignatureVerifier(max_workers=2, min_parallel_batch=1)
+        try:
+            item_list = [tx.get_signature_item() for tx in self.transaction_list]
+            self.assertEqual(signature_verifier.verify_batch(item_list), [idx != 5 for idx in range(8)])
+            self.assertRaises(InvalidSignature, lambda: signature_verifier.verify_all(item_list))
+            signature_verifier.verify_all(item_list[:5])
+        finally:
+            signature_verifier.shutdown()
+
+    def test_parallel_verification_async(self):
+        signature_verifier = SignatureVerifier(max_workers=2, min_parallel_batch=1)
+        item_list = [tx.get_signature_item() for tx in self.transaction_list]
+
+        async def verify():
+            self.assertEqual(await signature_verifier.verify_batch_async(item_list), [idx != 5 for idx in range(8)])
+            with self.assertRaises(InvalidSignature):
+                await signature_verifier.verify_all_async(item_list)
+
+        try:
+            asyncio.run(verify())
+        finally:
+            signature_verifier.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from account.account import Account
+from node.stake_index import StakeIndex
+
+
+class StakeIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account_dict = dict()
+        for public_key_hex, stake in [(b"aa", 30), (b"bb", 10), (b"cc", 5), (b"dd", 20)]:
+            account = Account(public_key_hex)
+            account.stake = stake
+            self.account_dict[public_key_hex] = account
+
+    def test_choose(self):
+        stake_index = StakeIndex(minimum_stake=5)
+        stake_index.rebuild(self.account_dict)
+
+        # validators ordered by stake - bb [0, 10), dd [10, 30), aa [30, 60)
+        self.assertEqual(stake_index.get_validator_set(), {b"aa", b"bb", b"dd"})
+        self.assertEqual(stake_index.get_stake_sum(), 60)
+        self.assertEqual(
+            [stake_index.choose(rand_num) for rand_num in (0, 9, 10, 29, 30, 59)],
+            [b"bb", b"bb", b"dd", b"dd", b"aa", b"aa"]
+        )
+
+    def test_update(self):
+        stake_index = StakeIndex(minimum_stake=5)
+        stake_index.rebuild(self.account_dict)
+        self.assertEqual(stake_index.get_stake_sum(), 60)
+
+        # cc reaches the minimum stake, bb leaves, ee is a new account with stake
+        self.account_dict[b"cc"].stake = 15
+        del self.account_dict[b"bb"]
+        self.account_dict[b"ee"] = Account(b"ee")
+        self.account_dict[b"ee"].stake = 15
+        stake_index.update(self.account_dict, [b"bb", b"cc", b"ee", b"aa"])
+
+        self.assertEqual(stake_index.get_validator_set(), {b"aa", b"cc", b"dd", b"ee"})
+        self.assertEqual(stake_index.get_stake_sum(), 80)
+        # equal stakes are ordered by public key - cc [0, 15), ee [15, 30)
+        self.assertEqual(stake_index.choose(14), b"cc")
+        self.assertEqual(stake_index.choose(15), b"ee")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import binascii
+import json
 
 from cryptography.hazmat.primitives import hashes
 
@@ -75,3 +76,15 @@ class TransactionConversionTestCase(unittest.TestCase):
         transaction = create_transaction_from_dict(self.tx_dict)
         tx_dict_same = transaction.to_dict()
         self.assertDictEqual(self.tx_dict, tx_dict_same)
+
+    def test_presigned_bytes_cache(self):
+        presigned_bytes = self.transaction.get_presigned_bytes()
+        self.assertIs(self.transaction.get_presigned_bytes(), presigned_bytes)
+        self.assertEqual(presigned_bytes, json.dumps(self.transaction._to_presigned_dict()).encode('utf-8'))
+
+        # changing presigned data invalidates the cache
+        self.transaction.transaction_target.tx_token = 1
+        self.assertNotEqual(self.transaction.get_presigned_bytes(), presigned_bytes)
+        self.assertEqual(self.transaction.to_dict()["tx_token"], 1)
+        self.transaction.transaction_target.tx_token = None
+        self.assertEqual(self.transaction.get_presigned_bytes(), presigned_bytes)
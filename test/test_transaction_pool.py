@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+
+from account.account import Account
+from account.account_full import FullAccount
+from node.node import Node
+from transaction.transaction_pool import TransactionPool
+from transaction.transaction_type import TransactionContentType, TransactionType
+from transaction.transaction_utils import generate_transaction
+from utils.crypto import get_public_key_hex
+from validation.transaction.exception import TransactionTransferError
+
+
+class TransactionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account = FullAccount()
+        self.public_key_hex = get_public_key_hex(self.account.private_key.public_key())
+        self.target_account = FullAccount()
+
+    def _create_transaction(self, content, tx_fee=None):
+        transaction = generate_transaction(
+            self.account.private_key.public_key(),
+            TransactionType.POST,
+            tx_fee=tx_fee,
+            content=content,
+            content_type=TransactionContentType.STRING
+        )
+        transaction.sign_transaction(self.account.private_key)
+        return transaction
+
+    def test_get_top(self):
+        pool = TransactionPool(max_size=10, ttl=60.0)
+        transaction1 = self._create_transaction("Stake 5")
+        transaction2 = self._create_transaction("Stake 10")
+        transaction3 = self._create_transaction("Stake 10 with fee", tx_fee=1.0)
+        transaction4 = self._create_transaction("Stake 1")
+
+        self.assertTrue(pool.add(transaction1, 5, now=0.0))
+        self.assertTrue(pool.add(transaction2, 10, now=0.0))
+        self.assertTrue(pool.add(transaction3, 10, now=0.0))
+        self.assertTrue(pool.add(transaction4, 1, now=0.0))
+        self.assertFalse(pool.add(transaction1, 5, now=0.0))
+
+        self.assertEqual(pool.get_top(3, now=0.0), [transaction3, transaction2, transaction1])
+        # transactions stay in the pool until they are removed
+        self.assertEqual(len(pool), 4)
+
+        self.assertIs(pool.pop(transaction3.transaction_hash_hex), transaction3)
+        self.assertIsNone(pool.pop(transaction3.transaction_hash_hex))
+        self.assertEqual(pool.get_top(10, now=0.0), [transaction2, transaction1, transaction4])
+
+    def test_evict_lowest_priority(self):
+        pool = TransactionPool(max_size=2, ttl=60.0)
+        transaction1 = self._create_transaction("Stake 5")
+        transaction2 = self._create_transaction("Stake 1")
+        transaction3 = self._create_transaction("Stake 3")
+        transaction4 = self._create_transaction("Stake 0")
+
+        pool.add(transaction1, 5, now=0.0)
+        pool.add(transaction2, 1, now=0.0)
+        self.assertTrue(pool.add(transaction3, 3, now=0.0))
+        self.assertNotIn(transaction2.transaction_hash_hex, pool)
+
+        # full pool does not take a transaction with lower priority than all of its transactions
+        self.assertFalse(pool.add(transaction4, 0, now=0.0))
+        self.assertEqual(pool.get_top(10, now=0.0), [transaction1, transaction3])
+
+    def test_evict_by_age(self):
+        pool = TransactionPool(max_size=10, ttl=60.0)
+        transaction1 = self._create_transaction("Added first")
+        transaction2 = self._create_transaction("Added later")
+        pool.add(transaction1, 10, now=0.0)
+        pool.add(transaction2, 1, now=30.0)
+
+        self.assertEqual(pool.get_top(10, now=61.0), [transaction2])
+        self.assertEqual(len(pool), 1)
+        self.assertIsNone(pool.get(transaction1.transaction_hash_hex))
+
+    def _create_transfer(self, tx_token, tx_fee=None):
+        transaction = generate_transaction(
+            self.account.private_key.public_key(),
+            TransactionType.TRANSFER,
+            tx_fee=tx_fee,
+            target_public_key=self.target_account.private_key.public_key(),
+            tx_token=tx_token
+        )
+        transaction.sign_transaction(self.account.private_key)
+        return transaction
+
+    def test_pending_account(self):
+        pool = TransactionPool(max_size=10, ttl=60.0)
+        account = Account(self.public_key_hex)
+        account.balance = 100
+        transaction1 = self._create_transfer(30, tx_fee=1)
+        transaction2 = self._create_transfer(20)
+
+        self.assertIs(pool.get_pending_account(account), account)
+        pool.add(transaction1, 0, now=0.0)
+        pool.add(transaction2, 0, now=0.0)
+        self.assertEqual(pool.get_pending_account(account).balance, 49)
+        self.assertEqual(account.balance, 100)
+
+        pool.pop(transaction1.transaction_hash_hex)
+        self.assertEqual(pool.get_pending_account(account).balance, 80)
+        pool.pop(transaction2.transaction_hash_hex)
+        self.assertEqual(pool.pending_spend_dict, {})
+
+    def test_reject_overspend(self):
+        node = Node("http://node0")
+        account = Account(self.public_key_hex)
+        account.balance = 100
+        node.account_dict = {self.public_key_hex: account}
+
+        async def add_transactions():
+            self.assertTrue(await node._add_to_transaction_pool(self._create_transfer(60)))
+            # confirmed balance covers the transfer but the pending transfer already spends most of it
+            with self.assertRaises(TransactionTransferError):
+                await node._add_to_transaction_pool(self._create_transfer(50))
+            self.assertTrue(await node._add_to_transaction_pool(self._create_transfer(40)))
+            await node.close()
+
+        asyncio.run(add_transactions())
+        self.assertEqual(len(node.transaction_pool), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -121,6 +121,28 @@ class TransactionValidationTestCase(unittest.TestCase):
         # account4
         self.assertIsNone(self.account_dict.get(self.public_key_hex5, None))
 
+    def test_revert_account_dict(self):
+        def snapshot(account_dict):
+            return {key: (account.stake, account.balance) for key, account in account_dict.items()}
+
+        account_dict = dict()
+        self.block0.update_account_dict(account_dict)
+        self.block1.update_account_dict(account_dict)
+        account_values_block1 = snapshot(account_dict)
+        self.block2.update_account_dict(account_dict)
+        self.block3.update_account_dict(account_dict)
+        self.assertEqual(snapshot(account_dict), snapshot(self.account_dict))
+
+        # blocks are unapplied from the head with their undo journals
+        self.block3.revert_account_dict(account_dict)
+        self.block2.revert_account_dict(account_dict)
+        self.assertEqual(snapshot(account_dict), account_values_block1)
+
+        # accounts created by a block are removed
+        self.block1.revert_account_dict(account_dict)
+        self.block0.revert_account_dict(account_dict)
+        self.assertEqual(account_dict, {})
+
     def test_invalid_stake_transactions(self):
         # Balance insufficient for staking
         transaction_error = generate_transaction(
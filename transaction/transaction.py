@@ -1,12 +1,13 @@
 import binascii
 import time
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 import json
 
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import hashes
 from cryptography.exceptions import InvalidSignature
 from account.account import Account
+from utils.crypto import load_public_key
 from validation.transaction.task import TransactionValidationTask
 from .transaction_type import TransactionType, TransactionContentType
 
@@ -108,8 +109,14 @@ class Transaction:
         else:
             self.timestamp = timestamp
 
+        # presigned dict and its canonical json bytes - computed once and reused for hashing, signing,
+        # verification and to_dict until any presigned field changes
+        self._presigned_key = None
+        self._presigned_cache: Optional[Tuple[dict, bytes]] = None
+
         # transaction hash is used as an id of the transaction (e.g. finding the post for a comment)
         self.transaction_hash = self._get_hash()
+        self.transaction_hash_hex = binascii.hexlify(self.transaction_hash)
 
         self.signature = None
 
@@ -128,8 +135,29 @@ class Transaction:
             "timestamp": self.timestamp
         }
 
+    def _get_presigned_key(self) -> tuple:
+        # all values that the presigned dict is made of
+        source, target = self.transaction_source, self.transaction_target
+        return (
+            source.source_public_key_hex, source.transaction_type, source.content_type, source.content_hash,
+            source.tx_fee, target.target_transaction_hash_hex, target.target_public_key_hex, target.tx_token,
+            target.tx_object, self.timestamp
+        )
+
+    def _get_presigned(self) -> Tuple[dict, bytes]:
+        presigned_key = self._get_presigned_key()
+        if self._presigned_cache is None or self._presigned_key != presigned_key:
+            presigned_dict = self._to_presigned_dict()
+            self._presigned_cache = (presigned_dict, json.dumps(presigned_dict).encode('utf-8'))
+            self._presigned_key = presigned_key
+        return self._presigned_cache
+
+    def get_presigned_bytes(self) -> bytes:
+        # canonical bytes that are hashed and signed
+        return self._get_presigned()[1]
+
     def to_dict(self) -> dict:
-        tx_dict = self._to_presigned_dict()
+        tx_dict = dict(self._get_presigned()[0])
 
         # Add signature hex
         if self.signature is not None:
@@ -139,18 +167,18 @@ class Transaction:
         tx_dict["signature_hex"] = signature_hex if signature_hex is not None else None
 
         # Add transaction hash
-        tx_dict["transaction_hash_hex"] = binascii.hexlify(self.transaction_hash).decode('utf-8')
+        tx_dict["transaction_hash_hex"] = self.transaction_hash_hex.decode('utf-8')
 
         return tx_dict
 
     def _get_hash(self) -> bytes:
         digest = hashes.Hash(hashes.SHA256())
-        digest.update(json.dumps(self._to_presigned_dict()).encode('utf-8'))
+        digest.update(self.get_presigned_bytes())
         return digest.finalize()
 
     def sign_transaction(self, private_key: ec.EllipticCurvePrivateKey):
         self.signature = private_key.sign(
-            json.dumps(self._to_presigned_dict()).encode('utf-8'),
+            self.get_presigned_bytes(),
             ec.ECDSA(hashes.SHA256())
         )
 
@@ -158,17 +186,21 @@ class Transaction:
         # If the signature is not verified, throw InvalidSignature excxeption
         if self.signature is None:
             raise InvalidSignature
-        public_key_serialized = binascii.unhexlify(self.transaction_source.source_public_key_hex)
-        public_key = serialization.load_der_public_key(public_key_serialized)
+        public_key = load_public_key(self.transaction_source.source_public_key_hex)
         public_key.verify(
             self.signature,
-            json.dumps(self._to_presigned_dict()).encode('utf-8'),
+            self.get_presigned_bytes(),
             ec.ECDSA(hashes.SHA256())
         )
 
-    def validate(self, account: Account, is_initial_block: bool = False) -> None:
-        # verify transaction signature
-        self._verify_transaction()
+    def get_signature_item(self) -> Tuple[bytes, bytes, Optional[bytes]]:
+        # (public key hex, signed payload, signature) used for batch signature verification
+        return self.transaction_source.source_public_key_hex, self.get_presigned_bytes(), self.signature
+
+    def validate(self, account: Account, is_initial_block: bool = False, verify_signature: bool = True) -> None:
+        # verify transaction signature - skipped when the signature is already verified in a batch
+        if verify_signature:
+            self._verify_transaction()
 
         # validate the transaction itself
         transaction_validation = TransactionValidationTask(self, account, is_initial_block=is_initial_block)
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from account.account import Account
+from transaction.transaction import Transaction
+from transaction.transaction_type import TransactionType
+from utils import constants
+
+
+# Transactions waiting to be included in a block
+#
+# Transactions are ordered by priority (stake of the source account when the transaction is added, transaction fee).
+# Two heaps keep the order - the highest priority first for block creation and the lowest priority first for eviction.
+# Removed transactions stay in the heaps until they reach the top (lazy deletion), so add and remove are O(log n).
+# The pool is bounded by size and age - the lowest priority transaction is evicted when the pool is full.
+# Tokens that pending transactions spend are summed per account, so that a new transaction is validated against
+# the balance left after the pending transactions of its account.
+
+class TransactionPool:
+    def __init__(self, max_size: int = constants.TRANSACTION_POOL_SIZE, ttl: float = constants.TRANSACTION_POOL_TTL):
+        self.max_size = max_size
+        self.ttl = ttl  # seconds a transaction is kept
+
+        # { transaction_hash_hex: (transaction, priority, sequence number, time added) } - in the order of arrival
+        self.transaction_dict: Dict[bytes, Tuple[Transaction, Tuple[float, float], int, float]] = dict()
+        # heap entries are (priority key, sequence number, transaction_hash_hex) - sequence number breaks ties by arrival
+        self.high_heap: List[Tuple[Tuple[float, float], int, bytes]] = []  # negated priority - highest first
+        self.low_heap: List[Tuple[Tuple[float, float], int, bytes]] = []  # lowest first
+        self.counter = itertools.count()
+        self.pending_spend_dict: Dict[bytes, float] = dict()  # { source_public_key_hex: tokens spent by pending transactions }
+
+    def __len__(self):
+        return len(self.transaction_dict)
+
+    def __contains__(self, transaction_hash_hex: bytes):
+        return transaction_hash_hex in self.transaction_dict
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.transaction_dict)
+
+    def __getitem__(self, transaction_hash_hex: bytes) -> Transaction:
+        return self.transaction_dict[transaction_hash_hex][0]
+
+    def get(self, transaction_hash_hex: bytes, default: Optional[Transaction] = None) -> Optional[Transaction]:
+        item = self.transaction_dict.get(transaction_hash_hex, None)
+        return item[0] if item is not None else default
+
+    def items(self) -> Iterator[Tuple[bytes, Transaction]]:
+        return ((transaction_hash_hex, item[0]) for transaction_hash_hex, item in self.transaction_dict.items())
+
+    def add(self, transaction: Transaction, stake: float, now: Optional[float] = None) -> bool:
+        # return False if the transaction is already in the pool or has lower priority than all of a full pool
+        transaction_hash_hex = transaction.transaction_hash_hex
+        if transaction_hash_hex in self.transaction_dict:
+            return False
+        now = time.monotonic() if now is None else now
+        priority = (stake, transaction.transaction_source.tx_fee or 0)
+
+        self.evict_expired(now)
+        if len(self.transaction_dict) >= self.max_size:
+            lowest_hash_hex = self._peek(self.low_heap)
+            if priority <= self.transaction_dict[lowest_hash_hex][1]:
+                return False
+            self.pop(lowest_hash_hex)
+
+        self._add_pending_spend(transaction, 1)
+        sequence_number = next(self.counter)
+        self.transaction_dict[transaction_hash_hex] = (transaction, priority, sequence_number, now)
+        heapq.heappush(self.high_heap, ((-priority[0], -priority[1]), sequence_number, transaction_hash_hex))
+        heapq.heappush(self.low_heap, (priority, -sequence_number, transaction_hash_hex))
+        return True
+
+    def pop(self, transaction_hash_hex: bytes, default: Optional[Transaction] = None) -> Optional[Transaction]:
+        # heap entries are dropped when they reach the top
+        item = self.transaction_dict.pop(transaction_hash_hex, None)
+        if item is None:
+            return default
+        self._add_pending_spend(item[0], -1)
+        if len(self.high_heap) > 2 * len(self.transaction_dict) + 32:
+            self._rebuild_heaps()
+        return item[0]
+
+    def get_pending_account(self, account: Account) -> Account:
+        # return account with the balance left after its pending transactions - input account if nothing is pending
+        pending_spend = self.pending_spend_dict.get(account.public_key_hex, 0)
+        if pending_spend == 0:
+            return account
+        pending_account = Account(account.public_key_hex)
+        pending_account.stake = account.stake
+        pending_account.balance = account.balance - pending_spend
+        return pending_account
+
+    def get_top(self, k: int, now: Optional[float] = None) -> List[Transaction]:
+        # return up to k transactions with the highest priority without removing them - O(k log n)
+        self.evict_expired(time.monotonic() if now is None else now)
+        entry_list = []
+        while self.high_heap and len(entry_list) < k:
+            entry = heapq.heappop(self.high_heap)
+            if self._is_live(entry):
+                entry_list.append(entry)
+        for entry in entry_list:
+            heapq.heappush(self.high_heap, entry)
+        return [self.transaction_dict[entry[2]][0] for entry in entry_list]
+
+    def evict_expired(self, now: float) -> None:
+        # transactions are in the order of arrival - stop at the first transaction that has not expired
+        while self.transaction_dict:
+            transaction_hash_hex = next(iter(self.transaction_dict))
+            if now - self.transaction_dict[transaction_hash_hex][3] < self.ttl:
+                break
+            self.pop(transaction_hash_hex)
+
+    def _add_pending_spend(self, transaction: Transaction, sign: int) -> None:
+        spend = get_transaction_spend(transaction)
+        if spend == 0:
+            return
+        public_key_hex = transaction.transaction_source.source_public_key_hex
+        pending_spend = self.pending_spend_dict.get(public_key_hex, 0) + sign * spend
+        if pending_spend == 0:
+            self.pending_spend_dict.pop(public_key_hex, None)
+        else:
+            self.pending_spend_dict[public_key_hex] = pending_spend
+
+    def _peek(self, heap: List[Tuple[Tuple[float, float], int, bytes]]) -> bytes:
+        # drop entries of removed transactions from the top and return hash of the top transaction
+        while not self._is_live(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][2]
+
+    def _is_live(self, entry: Tuple[Tuple[float, float], int, bytes]) -> bool:
+        # entry of a removed transaction (or of an earlier add of the same transaction) is stale
+        item = self.transaction_dict.get(entry[2], None)
+        return item is not None and item[2] == abs(entry[1])
+
+    def _rebuild_heaps(self) -> None:
+        # keep the heaps from growing with stale entries when many transactions are removed without reaching the top
+        self.high_heap = [
+            ((-priority[0], -priority[1]), sequence_number, transaction_hash_hex)
+            for transaction_hash_hex, (_, priority, sequence_number, _) in self.transaction_dict.items()
+        ]
+        self.low_heap = [
+            (priority, -sequence_number, transaction_hash_hex)
+            for transaction_hash_hex, (_, priority, sequence_number, _) in self.transaction_dict.items()
+        ]
+        heapq.heapify(self.high_heap)
+        heapq.heapify(self.low_heap)
+
+
+def get_transaction_spend(transaction: Transaction) -> float:
+    # tokens taken from the balance of the source account when the transaction is applied (see Block.update_account_dict)
+    spend = transaction.transaction_source.tx_fee or 0
+    if transaction.transaction_source.transaction_type in (TransactionType.STAKE, TransactionType.TRANSFER, TransactionType.TIP):
+        spend += transaction.transaction_target.tx_token or 0
+    return spend
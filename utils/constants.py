@@ -7,16 +7,51 @@ ICO_PUBLIC_KEY_FILE = os.path.join(os.getcwd(), "genesis", "ico_accounts.json")
 KNOWN_NODES_PATH = "/known_nodes"
 NODE_REQUEST_PATH = "/node"
 TRANSACTION_VALIDATION_PATH = "/validation/transaction"
+TRANSACTION_BATCH_VALIDATION_PATH = "/validation/transactions/batch"
 BLOCK_VALIDATION_PATH = "/validation/block"
+COMPACT_BLOCK_VALIDATION_PATH = "/validation/block/compact"
 VALIDATOR_RAND_PATH = "/validator/rand"
+INVENTORY_PATH = "/inventory"
+GETDATA_PATH = "/getdata"
+BLOCKCHAIN_LENGTH_PATH = "/data/blockchain/length"
+BLOCKCHAIN_HEADERS_PATH = "/data/blockchain/headers"
+BLOCKCHAIN_BLOCKS_PATH = "/data/blockchain/blocks"
+
+ORIGIN_HEADER = "X-Origin"  # address of the node that sent the p2p request
+
+PEER_REQUEST_TIMEOUT = 5.0  # seconds to wait for a peer to respond
+PEER_MAX_CONNECTIONS = 100  # maximum number of open connections to peers
+BROADCAST_CONCURRENCY = 32  # maximum number of concurrent requests when broadcasting to peers
+TRANSACTION_BATCH_INTERVAL = 0.005  # seconds to collect transactions before broadcasting them as one batch
+TRANSACTION_BATCH_SIZE = 100  # maximum number of transactions broadcasted as one batch
+SYNC_HEADERS_LIMIT = 2000  # maximum number of block headers per chain sync request
+SYNC_BLOCKS_LIMIT = 100  # maximum number of blocks per chain sync request
+SYNC_CONCURRENCY = 8  # maximum number of concurrent block requests when syncing the chain
+ORPHAN_BLOCK_POOL_SIZE = 100  # maximum number of blocks kept while waiting for their previous block
+ORPHAN_BLOCK_TTL = 120.0  # seconds a block is kept while waiting for its previous block
+MAX_REORG_DEPTH = 100  # side blocks forking deeper than this below the head are dropped (chain is synced instead)
+SIDE_BLOCK_POOL_SIZE = 1000  # maximum number of blocks of competing branches kept - the lowest are evicted
+CHECKPOINT_INTERVAL = 100  # number of blocks between snapshots of the account state
 
 ICO_TOKENS = 1_000_000
 VALIDATION_REWARD = 100  # TODO: make it a function of staked tokens in a block
 VALIATOR_MINIMUM_STAKE = 10  # minimum staked token to become a validator # TODO: apply logi based on this number
 MAX_TX_PER_BLOCK = 50  # maximum number of transactions per block # TODO: can calculate precisely backwards form desired block size
+TRANSACTION_POOL_SIZE = 10000  # maximum number of transactions waiting in the pool - the lowest priority is evicted
+TRANSACTION_POOL_TTL = 3600.0  # seconds a transaction waits in the pool before it is dropped
 
 MIN_VALIDATOR_CNT = 3  # minimum number of validators needed to create a block
 
+PUBLIC_KEY_CACHE_SIZE = 4096  # number of parsed public keys kept for signature verification
+PARALLEL_VERIFICATION_MIN_BATCH = 16  # smaller batches of signatures are verified serially
+PARALLEL_APPLY_MIN_TRANSACTIONS = 100000  # replayed blocks with fewer transactions are applied serially - see benchmark.block_apply
+
+DEFAULT_PAGE_LIMIT = 20  # default number of items returned by paginated service endpoints
+MAX_PAGE_LIMIT = 100  # maximum number of items returned by paginated service endpoints
+
 # Make the RANDAO function also consider the most recent timestamp of becoming forger
 
 STORAGE_PATH = os.path.join(os.getcwd(), "storage")
+BLOCK_STORE_PATH = os.path.join(os.getcwd(), "block_store")
+BLOCK_STORE_SEGMENT_SIZE = 64 * 1024 * 1024  # maximum size of one block segment file in bytes
+BLOCK_MEMORY_WINDOW = 1000  # latest blocks kept in memory when the block store holds the chain - above MAX_REORG_DEPTH and CHECKPOINT_INTERVAL
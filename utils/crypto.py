@@ -1,10 +1,14 @@
 import binascii
 import codecs
+from collections import OrderedDict
+import threading
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives import hashes, serialization
 
+from utils.constants import PUBLIC_KEY_CACHE_SIZE
+
 
 def get_public_key_hex(public_key: ec.EllipticCurvePublicKey) -> bytes:
     public_key_serialized = public_key.public_bytes(
@@ -14,6 +18,61 @@ def get_public_key_hex(public_key: ec.EllipticCurvePublicKey) -> bytes:
     return binascii.hexlify(public_key_serialized)
 
 
+class PublicKeyCache:
+    # bounded LRU cache of parsed public keys - the same accounts sign most of the transactions
+    # so unhexlify and DER parsing is skipped for them
+    # used from the event loop and from worker threads (sync validation) - the dict is changed under a lock
+    def __init__(self, maxsize: int = PUBLIC_KEY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.public_key_dict = OrderedDict()  # { public_key_hex: EllipticCurvePublicKey } - least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.public_key_dict)
+
+    def get(self, public_key_hex: bytes) -> ec.EllipticCurvePublicKey:
+        with self.lock:
+            public_key = self.public_key_dict.get(public_key_hex, None)
+            if public_key is not None:
+                self.hits += 1
+                self.public_key_dict.move_to_end(public_key_hex)
+                return public_key
+            self.misses += 1
+
+        # parse outside the lock - another thread may add the same key meanwhile, which is harmless
+        public_key = serialization.load_der_public_key(binascii.unhexlify(public_key_hex))
+        with self.lock:
+            self.public_key_dict[public_key_hex] = public_key
+            if len(self.public_key_dict) > self.maxsize:
+                self.public_key_dict.popitem(last=False)
+        return public_key
+
+    def clear(self) -> None:
+        with self.lock:
+            self.public_key_dict.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "size": len(self.public_key_dict),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# shared by all signature verification paths (transaction, block, validator rand)
+public_key_cache = PublicKeyCache()
+
+
+def load_public_key(public_key_hex: bytes) -> ec.EllipticCurvePublicKey:
+    # load public key from DER serialized hex through the shared LRU cache
+    return public_key_cache.get(public_key_hex)
+
+
 def get_fernet(encryption_key: str) -> Fernet:
     digest = hashes.Hash(hashes.SHA256())
     digest.update(encryption_key.encode('utf-8'))
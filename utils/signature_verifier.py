@@ -0,0 +1,94 @@
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from utils import constants
+from utils.crypto import load_public_key
+
+
+# (public key hex, signed payload, signature)
+SignatureItem = Tuple[bytes, bytes, Optional[bytes]]
+
+
+def verify_signature(item: SignatureItem) -> bool:
+    public_key_hex, payload, signature = item
+    if signature is None:
+        return False
+    try:
+        load_public_key(public_key_hex).verify(signature, payload, ec.ECDSA(hashes.SHA256()))
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
+def _verify_signature_chunk(item_list: List[SignatureItem]) -> List[bool]:
+    # runs in a worker process - each worker has its own public key cache
+    return [verify_signature(item) for item in item_list]
+
+
+class SignatureVerifier:
+    # verifies batches of ECDSA signatures across a pool of worker processes
+    # batches smaller than min_parallel_batch are verified serially in the calling process
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_parallel_batch: int = constants.PARALLEL_VERIFICATION_MIN_BATCH
+    ):
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.min_parallel_batch = min_parallel_batch
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawn instead of fork - the node process runs an event loop and http client threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    def verify_batch(self, item_list: List[SignatureItem]) -> List[bool]:
+        # return verification result of each item in the input order
+        if self.max_workers <= 1 or len(item_list) < self.min_parallel_batch:
+            return _verify_signature_chunk(item_list)
+
+        # a few chunks per worker so that workers finishing early pick up the rest
+        chunk_size = math.ceil(len(item_list) / (self.max_workers * 4))
+        chunk_list = [item_list[idx:idx + chunk_size] for idx in range(0, len(item_list), chunk_size)]
+
+        result_list = []
+        for chunk_result_list in self._get_executor().map(_verify_signature_chunk, chunk_list):
+            result_list.extend(chunk_result_list)
+        return result_list
+
+    def verify_all(self, item_list: List[SignatureItem]) -> None:
+        # raise InvalidSignature if any of the signatures is invalid
+        if not all(self.verify_batch(item_list)):
+            raise InvalidSignature
+
+    async def verify_batch_async(self, item_list: List[SignatureItem]) -> List[bool]:
+        # verify_batch for the event loop - a batch for the worker processes is waited for in a thread
+        # (which also starts the worker processes on the first batch) so that the loop keeps running
+        if self.max_workers <= 1 or len(item_list) < self.min_parallel_batch:
+            return _verify_signature_chunk(item_list)
+        return await asyncio.get_running_loop().run_in_executor(None, self.verify_batch, item_list)
+
+    async def verify_all_async(self, item_list: List[SignatureItem]) -> None:
+        if not all(await self.verify_batch_async(item_list)):
+            raise InvalidSignature
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+# shared by block and blockchain validation
+signature_verifier = SignatureVerifier()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 import binascii
 from typing import TYPE_CHECKING, Dict, Optional
-from account.account import Account
+from account.account_state import AccountStateView, apply_transaction, get_or_create_account
 
+from utils.signature_verifier import signature_verifier
 from validation.block.exception import BlockPreviousBlockError, BlockValidationError, BlockValidatorError
 
 if TYPE_CHECKING:
@@ -12,20 +13,30 @@ if TYPE_CHECKING:
 class BlockValidationTask:
     def __init__(
         self, block: Block,
-        account_dict: Optional[Dict[bytes, Account]],
-        block_validator_dict: Optional[Dict[bytes, bytes]] = None
+        account_dict: AccountStateView,
+        block_validator_dict: Optional[Dict[bytes, bytes]] = None,
+        verify_signatures: bool = True
     ):
         self.block = block
         self.block_validator_dict = block_validator_dict
-        self.account_dict = account_dict
+        self.account_dict = account_dict  # transactions are applied to the view as they are validated
+        self.verify_signatures = verify_signatures
 
     def _validate_transactions(self):
+        # verify all transaction signatures as one batch (in parallel for large blocks)
+        if self.verify_signatures:
+            signature_verifier.verify_all([tx.get_signature_item() for tx in self.block.transaction_list])
+
+        # each transaction is validated against the balances left by the previous transactions of the block
+        is_initial_block = self.block._is_initial_block()
         for transaction in self.block.transaction_list:
             tx_publick_key_hex = transaction.transaction_source.source_public_key_hex
             transaction.validate(
                 self.account_dict.get(tx_publick_key_hex, None),
-                is_initial_block=self.block._is_initial_block()
+                is_initial_block=is_initial_block,
+                verify_signature=False
             )
+            apply_transaction(transaction, lambda public_key_hex: get_or_create_account(self.account_dict, public_key_hex))
 
     def _validate_validator(self):
         if self.block.previous_block is not None:
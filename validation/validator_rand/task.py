@@ -1,11 +1,10 @@
 from __future__ import annotations
-import binascii
-import json
 from typing import TYPE_CHECKING
 
 from block.validator_rand import ValidatorRand
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import hashes
+from utils.crypto import load_public_key
 from validation.validator_rand.exception import ValidatorRandSignatureError, ValidatorRandValueError
 
 if TYPE_CHECKING:
@@ -20,11 +19,10 @@ class ValidatorRandValidationTask:
         if self.validator_rand.signature is None:
             raise ValidatorRandSignatureError("Signature null")
 
-        public_key_serialized = binascii.unhexlify(self.validator_rand.validator_public_key_hex)
-        public_key = serialization.load_der_public_key(public_key_serialized)
+        public_key = load_public_key(self.validator_rand.validator_public_key_hex)
         public_key.verify(
             self.validator_rand.signature,
-            json.dumps(self.validator_rand._to_presigned_dict()).encode('utf-8'),
+            self.validator_rand.get_presigned_bytes(),
             ec.ECDSA(hashes.SHA256())
         )
 